@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Benchmark of updating enemies from the EnemyTable against one sprite at a time: runs the same
+formation, with groups of 8 entering every 500 ms and waves of 1 to 3 divers per 40 enemies at the
+game's fastest attack rate, both ways and prints the time a simulation step takes for each number
+of enemies. The per-sprite run is how Formation and Enemy moved enemies before EnemyTable: placed
+in the formation one by one with get_position, stepping toward the next point of their path
+through the position properties of their rect and asked one by one if they fire
+
+    python benchmark_enemies.py --steps 3000 --enemies 40 160 640
+"""
+
+import argparse
+import math
+import random
+import time
+
+import numpy as np
+import pygame
+
+from source import constants as c
+from source.enemy_table import ATTACKING, ENEMY_TYPES, ENTERING, ENTRANCE_PATH, PATH_SPEED, EnemyTable
+from source.patterns import PatternEngine
+from source.stage_data import stages
+
+# The formation grid of Formation
+COLUMNS = 10
+COL_SPACING = 18
+ROW_SPACING = 20
+BASE_X = c.GAME_SIZE.width // 2
+BASE_Y = 60
+COL_BASE_X = BASE_X + (np.arange(COLUMNS) - COLUMNS // 2) * COL_SPACING
+COL_SPREAD = (np.abs(np.arange(COLUMNS) - COLUMNS / 2.0) / (COLUMNS / 2.0)
+              * np.where(np.arange(COLUMNS) >= COLUMNS / 2.0, 1, -1))
+GROUP_SIZE = 8
+GROUP_DELAY = 500
+DIVE_INTERVAL = c.DEFAULT_DIFFICULTY.min_attack_frequency
+FIRE_COOLDOWN = 1000
+PLAYER_X, PLAYER_Y = c.GAME_SIZE.width // 2, c.GAME_SIZE.height - 32
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the enemy table against per-sprite updates")
+    parser.add_argument('--steps', type=int, default=3000,
+                        help="simulation steps to run")
+    parser.add_argument('--enemies', type=int, nargs='+', default=[40, 160, 640],
+                        help="numbers of enemies to run with")
+    return parser.parse_args()
+
+
+def entrance_paths(num_enemies: int) -> list:
+    """The entrance paths of the enemies, by group of GROUP_SIZE going through the stage file's patterns"""
+    names = [name for name in stages.entrances if name != 'default']
+    paths = []
+    for first in range(0, num_enemies, GROUP_SIZE):
+        slots = range(first, min(first + GROUP_SIZE, num_enemies))
+        group = stages.entrance_paths(names[first // GROUP_SIZE % len(names)], range(len(slots)),
+                                      [(slot // COLUMNS, slot % COLUMNS) for slot in slots])
+        paths.extend(group)
+    return paths
+
+
+def sway(current_time: int):
+    """The x offset and spread of the formation, like Formation.update"""
+    cycle_progress = (current_time % c.FORMATION_CYCLE_TIME) / c.FORMATION_CYCLE_TIME
+    if cycle_progress < 0.5:
+        spread = c.FORMATION_MIN_SPREAD + (c.FORMATION_MAX_SPREAD - c.FORMATION_MIN_SPREAD) * (cycle_progress * 2)
+    else:
+        spread = c.FORMATION_MAX_SPREAD - (c.FORMATION_MAX_SPREAD - c.FORMATION_MIN_SPREAD) * ((cycle_progress - 0.5) * 2)
+    return int(c.FORMATION_MAX_X * math.sin(cycle_progress * 2 * 3.14159)), spread
+
+
+def formation_position(row: int, col: int, x_offset: int, spread: float):
+    """Formation.get_position"""
+    x = BASE_X + (col - COLUMNS // 2) * COL_SPACING + x_offset
+    y = BASE_Y + row * ROW_SPACING
+    center_col = COLUMNS / 2.0
+    spread_factor = abs(col - center_col) / center_col
+    x += spread * spread_factor * (1 if col >= center_col else -1)
+    return int(x), int(y)
+
+
+def formation_positions(num_rows: int, x_offset: int, spread: float):
+    """Formation.get_positions, the x of each column and y of each row"""
+    col_x = COL_BASE_X + x_offset + spread * COL_SPREAD
+    return col_x.astype(np.int64), BASE_Y + np.arange(num_rows) * ROW_SPACING
+
+
+def num_attackers(rng: random.Random, num_enemies: int) -> int:
+    """The enemies of an attack wave, 1 to 3 like Formation.trigger_attack_wave for every 40"""
+    return sum(rng.randint(1, 3) for _ in range(max(1, num_enemies // 40)))
+
+
+class Marker:
+    """A sprite of the table run, only its rect is kept in step"""
+
+    def __init__(self, slot: int):
+        self.slot = slot
+        self.rect = pygame.Rect(0, 0, 16, 16)
+
+
+class ScalarEnemy:
+    """An enemy of the per-sprite run, moving like Enemy before EnemyTable: its position is its rect's center"""
+
+    def __init__(self, slot: int):
+        self.enemy_type = ENEMY_TYPES[slot % len(ENEMY_TYPES)]
+        self.row, self.col = divmod(slot, COLUMNS)
+        self.rect = pygame.Rect(0, 0, 16, 16)
+        self.entrance_path = []
+        self.attack_path = []
+        self.path_index = 0
+        self.path_speed = PATH_SPEED
+        self.is_entering = False
+        self.is_attacking = False
+        self.can_fire = True
+        self.last_fire_time = 0
+        self.fire_cooldown = FIRE_COOLDOWN
+
+    @property
+    def x(self):
+        return self.rect.centerx
+
+    @x.setter
+    def x(self, value: int):
+        self.rect.centerx = value
+
+    @property
+    def y(self):
+        return self.rect.centery
+
+    @y.setter
+    def y(self, value: int):
+        self.rect.centery = value
+
+    def update(self, delta_time: int):
+        """Enemy.update without the animation"""
+        if self.is_entering and self.entrance_path:
+            self._follow_entrance_path(delta_time)
+        elif self.is_attacking and self.attack_path:
+            self._follow_attack_path(delta_time)
+
+    def _follow_path(self, path, delta_time):
+        """Step toward the next point of the path, return whether the end has been reached"""
+        if self.path_index >= len(path):
+            return True
+        target_x, target_y = path[self.path_index]
+        step = self.path_speed * delta_time
+        dx = target_x - self.x
+        dy = target_y - self.y
+        distance = (dx**2 + dy**2)**0.5
+        if distance < step:
+            self.x = target_x
+            self.y = target_y
+            self.path_index += 1
+        else:
+            self.x += int(dx / distance * step)
+            self.y += int(dy / distance * step)
+        return False
+
+    def _follow_entrance_path(self, delta_time):
+        if self._follow_path(self.entrance_path, delta_time):
+            self.is_entering = False
+            self.path_index = 0
+
+    def _follow_attack_path(self, delta_time):
+        if self._follow_path(self.attack_path, delta_time):
+            self.is_attacking = False
+            self.path_index = 0
+
+    def should_fire(self, current_time, player_pos):
+        if not self.can_fire or not self.is_attacking:
+            return False
+        if current_time - self.last_fire_time < self.fire_cooldown:
+            return False
+        return self.y < player_pos[1] - 50
+
+    def fire(self, current_time):
+        self.last_fire_time = current_time
+
+
+def run_scalar(num_enemies: int, steps: int) -> list:
+    """Run the formation one sprite at a time, return the time of every step in seconds"""
+    paths = entrance_paths(num_enemies)
+    engine = PatternEngine(random.Random(0))
+    rng = random.Random(0)
+    grid = [[None] * COLUMNS for _ in range((num_enemies + COLUMNS - 1) // COLUMNS)]
+    enemies = []
+    times = []
+    for step in range(steps):
+        current_time = step * c.SIM_STEP
+        start = time.perf_counter()
+        while len(enemies) < num_enemies and current_time >= len(enemies) // GROUP_SIZE * GROUP_DELAY:
+            enemy = ScalarEnemy(len(enemies))
+            enemy.entrance_path = paths[enemy.row * COLUMNS + enemy.col].tolist()
+            enemy.x, enemy.y = enemy.entrance_path[0]
+            enemy.is_entering = True
+            grid[enemy.row][enemy.col] = enemy
+            enemies.append(enemy)
+        if current_time % DIVE_INTERVAL < c.SIM_STEP:
+            resting = [enemy for enemy in enemies if not (enemy.is_entering or enemy.is_attacking)]
+            for enemy in rng.sample(resting, min(len(resting), num_attackers(rng, num_enemies))):
+                enemy.attack_path = engine.create_dive_pattern(enemy.enemy_type, (enemy.x, enemy.y),
+                                                               (PLAYER_X, PLAYER_Y))
+                enemy.path_index = 0
+                enemy.is_attacking = True
+        x_offset, spread = sway(current_time)
+        for row, enemies_of_row in enumerate(grid):
+            for col, enemy in enumerate(enemies_of_row):
+                if enemy and not enemy.is_attacking and not enemy.is_entering:
+                    enemy.x, enemy.y = formation_position(row, col, x_offset, spread)
+        for enemy in enemies:
+            enemy.update(c.SIM_STEP)
+        for enemy in enemies:
+            if enemy.should_fire(current_time, (PLAYER_X, PLAYER_Y)):
+                enemy.fire(current_time)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def run_table(num_enemies: int, steps: int) -> list:
+    """Run the formation from an EnemyTable, return the time of every step in seconds"""
+    paths = entrance_paths(num_enemies)
+    table = EnemyTable(num_enemies, path_width=max(len(path) for path in paths))
+    rng = random.Random(0)
+    num_rows = (num_enemies + COLUMNS - 1) // COLUMNS
+    spawned = 0
+    times = []
+    for step in range(steps):
+        current_time = step * c.SIM_STEP
+        start = time.perf_counter()
+        while spawned < num_enemies and current_time >= spawned // GROUP_SIZE * GROUP_DELAY:
+            slot = spawned
+            table.sprites[slot] = Marker(slot)
+            table.type[slot] = slot % len(ENEMY_TYPES)
+            table.row[slot], table.col[slot] = divmod(slot, COLUMNS)
+            table.can_fire[slot] = True
+            table.fire_cooldown[slot] = FIRE_COOLDOWN
+            table.position[slot] = paths[slot][0]
+            table.state[slot] = ENTERING
+            table.alive[slot] = True
+            table.set_path(slot, ENTRANCE_PATH, paths[slot])
+            spawned += 1
+        if current_time % DIVE_INTERVAL < c.SIM_STEP:
+            resting = (table.alive & (table.state == 0)).nonzero()[0].tolist()
+            for slot in rng.sample(resting, min(len(resting), num_attackers(rng, num_enemies))):
+                table.state[slot] |= ATTACKING
+                table.set_dive(slot, PLAYER_X)
+        table.update(c.SIM_STEP, *formation_positions(num_rows, *sway(current_time)))
+        for sprite in table.ready_to_fire(current_time, PLAYER_Y):
+            table.last_fire_time[sprite.slot] = current_time
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def print_times(name: str, times: list):
+    times = sorted(times)
+    mean = sum(times) / len(times)
+    print(f"  {name}: mean {mean * 1e6:.0f} us, p50 {times[len(times) // 2] * 1e6:.0f} us, "
+          f"p99 {times[len(times) * 99 // 100] * 1e6:.0f} us")
+    return mean
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    for num_enemies in args.enemies:
+        print(f"{num_enemies} enemies, {args.steps} steps")
+        scalar = print_times("per sprite", run_scalar(num_enemies, args.steps))
+        table = print_times("enemy table", run_table(num_enemies, args.steps))
+        print(f"  the table takes {table / scalar:.2f}x the time")
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Checks the paths of the stage file (resources/stages.json):
+- its layouts and challenging waves only use patterns the file has
+- every entrance and challenging pattern makes the paths of check_paths.npz, which the scalar
+  StagePatterns and ChallengingStage generators made before the file replaced them, and so do
+  the NumPy kernels of source/path_kernels.py
+- its patterns make the same paths as the kernels for every entrance group of its layouts that
+  has one and the challenging stage
+- the kernels make the same PatternEngine entrances and dives as its scalar generators, from a
+  grid of start positions, and the Bézier segments, which no layout uses, make the PatternEngine
+  sweeps (SWEEPS)
+- the dive templates enemies attack with stay within a pixel of the scalar dives (they are added
+  up in a different order)
+Prints the paths that differ and exits with 1 if there are any
+
+    python check_paths.py
+"""
+
+import os
+import sys
+
+import numpy as np
+
+os.environ.setdefault('GALAGA_HEADLESS', '1')
+
+from source import path_kernels  # noqa: E402
+from source.patterns import DIVE_TEMPLATES, PatternEngine  # noqa: E402
+from source.stage_data import SIZE, PathPattern, stages  # noqa: E402
+
+# The paths the scalar generators made before the stage file, int16 arrays (enemies, steps, 2) by
+# 'entrance_' or 'challenging_' and the pattern name. Entrance path n is of the enemy with index
+# n % 10 in its group and formation slot (n // 10, n % 10), challenging path n of the enemy with index n
+GOLDEN_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'check_paths.npz')
+GOLDEN_SLOTS = [(row, col) for row in range(5) for col in range(10)]
+GOLDEN_INDICES = [n % 10 for n in range(len(GOLDEN_SLOTS))]
+
+# Patterns the stage file only makes the same for the first indices, the ones of its groups:
+# bosses_single_file splits its bosses linearly in i//2, the generator only for the four of them
+GOLDEN_INDEX_LIMIT = {'bosses_single_file': 4}
+
+# The left and right sweeps of PatternEngine as stage file patterns
+SWEEPS = {
+    PatternEngine.PATTERN_LEFT_SWEEP: {"steps": 60, "segments": [
+        {"bezier": {"from": [-20, "50 + 20 row"], "control": ["0.3w", "0.7h"], "to": ["0.5w", "50 + 20 row"]}}
+    ]},
+    PatternEngine.PATTERN_RIGHT_SWEEP: {"steps": 60, "segments": [
+        {"bezier": {"from": ["w + 20", "50 + 20 row"], "control": ["0.7w", "0.7h"], "to": ["0.5w", "50 + 20 row"]}}
+    ]},
+}
+
+
+def compare(name: str, paths, scalar_paths) -> int:
+    """Print the paths of a group that differ from the reference ones, return how many do"""
+    mismatches = 0
+    for n, (path, scalar_path) in enumerate(zip(paths.tolist(), scalar_paths)):
+        expected = [list(point) for point in scalar_path]
+        if path != expected:
+            first = next((i for i, (a, b) in enumerate(zip(path, expected)) if a != b), min(len(path), len(expected)))
+            print(f"{name} #{n}: {len(path)} points against {len(expected)}, first difference at point {first}")
+            mismatches += 1
+    return mismatches
+
+
+def check_golden() -> tuple:
+    """Compare every pattern of the stage file and the kernels with the golden paths, return (paths, mismatches)"""
+    mismatches = 0
+    num_paths = 0
+    golden = np.load(GOLDEN_FILE)
+    for kind, patterns in ('entrance', stages.entrances), ('challenging', stages.challenging):
+        for name in patterns:
+            if f"{kind}_{name}" not in golden:
+                print(f"{kind} pattern {name} has no golden paths, not compared")
+                continue
+            expected = golden[f"{kind}_{name}"].tolist()
+            if kind == 'entrance':
+                pattern_name = name if name != 'default' else 'unknown'
+                paths = stages.entrance_paths(pattern_name, GOLDEN_INDICES, GOLDEN_SLOTS)
+                kernel_paths = path_kernels.entrance_paths(pattern_name, GOLDEN_INDICES, GOLDEN_SLOTS)
+                compared = [n for n, index in enumerate(GOLDEN_INDICES) if index < GOLDEN_INDEX_LIMIT.get(name, 10)]
+            else:
+                paths = stages.challenging_paths(name, range(len(expected)))
+                kernel_paths = path_kernels.challenging_paths(name, range(len(expected)))
+                compared = range(len(expected))
+            mismatches += compare(f"{kind} {name}", paths[compared], [expected[n] for n in compared])
+            mismatches += compare(f"{kind} kernel {name}", kernel_paths, expected)
+            num_paths += len(compared) + len(expected)
+    return num_paths, mismatches
+
+
+def check() -> int:
+    num_paths, mismatches = check_golden()
+    for name in stages.layouts:
+        for group in stages.layout_groups(name):
+            if group['pattern'] not in stages.entrances:
+                print(f"layout {name} uses unknown pattern {group['pattern']}, its enemies take the default path")
+                mismatches += 1
+            if group['pattern'] not in path_kernels.ENTRANCE_KERNELS:
+                continue
+            slots = [(enemy['row'], enemy['col']) for enemy in group['enemies']]
+            indices = range(len(slots))
+            mismatches += compare(group['pattern'], stages.entrance_paths(group['pattern'], indices, slots),
+                                  path_kernels.entrance_paths(group['pattern'], indices, slots).tolist())
+            num_paths += len(slots)
+    # the default path, for every formation slot
+    slots = [(row, col) for row in range(5) for col in range(10)]
+    mismatches += compare('default', stages.entrance_paths('unknown', [0] * len(slots), slots),
+                          path_kernels.entrance_paths('unknown', [0] * len(slots), slots).tolist())
+    num_paths += len(slots)
+
+    for wave in stages.challenging_waves():
+        by_pattern = {}
+        for enemy in wave['enemies']:
+            if enemy['pattern'] not in stages.challenging:
+                print(f"challenging wave at {wave['delay']} ms uses unknown pattern {enemy['pattern']}")
+                mismatches += 1
+            by_pattern.setdefault(enemy['pattern'], []).append(enemy['index'])
+        for pattern, indices in by_pattern.items():
+            mismatches += compare(pattern, stages.challenging_paths(pattern, indices),
+                                  path_kernels.challenging_paths(pattern, indices).tolist())
+            num_paths += len(indices)
+
+    engine = PatternEngine(None)
+    row, col = np.array(slots).T[:, :, None]
+    for pattern_type, spec in SWEEPS.items():
+        index = np.arange(len(slots))[:, None]
+        mismatches += compare(f"sweep {pattern_type}", PathPattern(spec).paths(dict(SIZE, i=index, row=row, col=col), len(slots)),
+                              [engine.create_entrance_path(pattern_type, i, slot) for i, slot in enumerate(slots)])
+        num_paths += len(slots)
+    for pattern_type in PatternEngine.PATTERN_LEFT_SWEEP, PatternEngine.PATTERN_RIGHT_SWEEP, PatternEngine.PATTERN_TOP_CASCADE:
+        mismatches += compare(f"pattern {pattern_type}", path_kernels.pattern_entrance_paths(pattern_type, range(len(slots)), slots),
+                              [engine.create_entrance_path(pattern_type, i, slot) for i, slot in enumerate(slots)])
+        num_paths += len(slots)
+
+    starts = [(x, y) for x in range(8, 224, 8) for y in range(16, 200, 8)]
+    for enemy_type in path_kernels.DIVE_KERNELS:
+        for player_x in range(0, 224, 16):
+            mismatches += compare(f"{enemy_type} dive", path_kernels.dive_paths(enemy_type, starts, player_x),
+                                  [engine.create_dive_pattern(enemy_type, start, (player_x, 0)) for start in starts])
+            num_paths += len(starts)
+
+    for enemy_type, template in DIVE_TEMPLATES.items():
+        for player_x in range(0, 224, 16):
+            dives = template.apply(np.array(starts), np.full(len(starts), player_x))
+            for dive, start in zip(dives, starts):
+                scalar_dive = np.array(engine.create_dive_pattern(enemy_type, start, (player_x, 0)))
+                if dive.shape != scalar_dive.shape or np.abs(np.trunc(dive) - scalar_dive).max() > 1:
+                    print(f"{enemy_type} dive template from {start} toward {player_x} is more than a pixel off")
+                    mismatches += 1
+                num_paths += 1
+
+    print(f"{num_paths} paths compared, {mismatches} differ")
+    return mismatches
+
+
+if __name__ == '__main__':
+    sys.exit(1 if check() else 0)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Checks that VectorEnv plays exactly like the play state: runs games with the same seeds both
+ways, in lockstep, with the input the batch pilot chooses in the play state given to both, and
+compares after every step the score, stage, lives, shots, hits, the player's x and the positions
+of the enemies and all missiles, until every game is over. Also checks that the rewards add up
+to the score. Prints the first step each game differs at and exits with 1 if any does
+
+    python check_vector_env.py --games 12 --steps 20000
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+
+os.environ.setdefault('GALAGA_HEADLESS', '1')
+
+from source import constants as c, main  # noqa: E402
+from source.batch import Pilot  # noqa: E402
+from source.states import new_persist  # noqa: E402
+from source.vector_env import VectorEnv  # noqa: E402
+
+FIELDS = ('score', 'stage', 'lives', 'player x', 'shots', 'hits', 'enemies', 'enemy missiles', 'missiles')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Check VectorEnv against the play state")
+    parser.add_argument('--games', type=int, default=12,
+                        help="games to play, with seeds from 0")
+    parser.add_argument('--steps', type=int, default=20000,
+                        help="most simulation steps to play")
+    return parser.parse_args()
+
+
+class Input:
+    """A Control input source giving the play state the input chosen for the step"""
+
+    def __init__(self):
+        self.mask = 0
+
+    def next_frame(self, state):
+        return self.mask, c.SIM_STEP
+
+
+def play_state(play) -> tuple:
+    """The compared state of a play state, positions sorted"""
+    player_x = play.player.rect.centerx if play.player and play.is_player_alive else None
+    return (play.score, play.stage_num, play.extra_lives, player_x, play.num_shots, play.num_hits,
+            sorted(enemy.rect.center for enemy in play.enemies),
+            sorted(missile.rect.center for missile in play.enemy_missiles),
+            sorted(missile.rect.center for missile in play.missiles))
+
+
+def env_state(env: VectorEnv, i: int) -> tuple:
+    """The compared state of a VectorEnv instance, like play_state"""
+    def positions(alive, x, y):
+        return sorted(zip(x[i][alive[i]].tolist(), y[i][alive[i]].tolist()))
+    player_x = int(env.player_x[i]) if env.is_player_alive[i] else None
+    return (int(env.score[i]), int(env.stage_num[i]), int(env.extra_lives[i]), player_x,
+            int(env.num_shots[i]), int(env.num_hits[i]),
+            positions(env.enemy_alive, env.enemy_x, env.enemy_y),
+            positions(env.enemy_missile_alive, env.enemy_missile_x, env.enemy_missile_y),
+            positions(env.missile_alive, env.missile_x, env.missile_y))
+
+
+def check(num_games: int, max_steps: int) -> int:
+    seeds = list(range(num_games))
+    env = VectorEnv()
+    env.reset(seeds)
+    inputs = [Input() for _ in seeds]
+    controls = [main.Control(main.STATE_DICT, c.PLAY_STATE, new_persist(seed), headless=True, input_source=source)
+                for seed, source in zip(seeds, inputs)]
+    pilot = Pilot()
+    differ = set()
+    rewards = np.zeros(num_games, dtype=np.int64)
+    for step in range(max_steps):
+        playing = [i for i, control in enumerate(controls) if control.state_name == c.PLAY_STATE and i not in differ]
+        if not playing:
+            break
+        actions = np.zeros(num_games, dtype=np.int64)
+        for i in playing:
+            actions[i] = inputs[i].mask = pilot.decide(controls[i].state)
+        step_rewards, done = env.step(actions)
+        rewards += step_rewards
+        for i in playing:
+            controls[i].step(None)
+            if controls[i].state_name != c.PLAY_STATE:
+                if not done[i]:
+                    print(f"seed {seeds[i]}: the play state ended at step {step}, the environment goes on")
+                    differ.add(i)
+                continue
+            if done[i]:
+                print(f"seed {seeds[i]}: the environment ended at step {step}, the play state goes on")
+                differ.add(i)
+                continue
+            expected, actual = play_state(controls[i].state), env_state(env, i)
+            if expected != actual:
+                print(f"seed {seeds[i]}: differs at step {step}")
+                for name, a, b in zip(FIELDS, expected, actual):
+                    if a != b:
+                        print(f"  {name}: play {a}, environment {b}")
+                differ.add(i)
+    for i in np.flatnonzero(rewards != env.score).tolist():
+        print(f"seed {seeds[i]}: rewards add up to {rewards[i]}, the score is {env.score[i]}")
+        differ.add(i)
+
+    print(f"{num_games} games, {step + 1} steps, stages reached {env.stage_num.tolist()}, {len(differ)} differ")
+    return len(differ)
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    sys.exit(1 if check(args.games, args.steps) else 0)
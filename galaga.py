@@ -1,10 +1,49 @@
 #!/usr/bin/env python3
 
+import argparse
+import os
 import sys
-import pygame
-from source import main
+from source import constants as c
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Galaga clone")
+    parser.add_argument('--headless', action='store_true',
+                        help="run without a window, audio or frame cap")
+    parser.add_argument('--frames', type=int, default=None,
+                        help="stop after this many frames")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="seed for the random number generator, to reproduce a game")
+    parser.add_argument('--record', metavar='FILE', default=None,
+                        help="record the input of every game to a replay file")
+    parser.add_argument('--replay', metavar='FILE', default=None,
+                        help="play back a recorded game (as fast as possible with --headless)")
+    parser.add_argument('--renderer', choices=(c.SOFTWARE_RENDERER, c.TEXTURE_RENDERER), default=c.SOFTWARE_RENDERER,
+                        help="scale the game in software, or upload it to a texture SDL scales (default: software)")
+    parser.add_argument('--scale', type=int, default=c.DISPLAY_SCALE,
+                        help=f"window size as a multiple of the game's {c.GAME_SIZE.width}x{c.GAME_SIZE.height} "
+                             f"pixels (default: {c.DISPLAY_SCALE})")
+    parser.add_argument('--fullscreen', action='store_true',
+                        help="fill the screen, scaled by the largest whole number that fits")
+    parser.add_argument('--vsync', action='store_true',
+                        help="wait for the vertical blank when showing a frame (sdl2 renderer only)")
+    return parser.parse_args()
+
 
 if __name__ == '__main__':
-    main.main()
+    args = parse_args()
+    if args.headless:
+        # Must be set before the game modules are imported, they set up pygame on import
+        os.environ[c.HEADLESS_ENV] = '1'
+
+    import pygame
+    from source import main, renderer, setup
+
+    game_renderer = None
+    if not setup.HEADLESS:
+        game_renderer = renderer.create_renderer(args.renderer, scale=args.scale, fullscreen=args.fullscreen,
+                                                 vsync=args.vsync)
+    main.main(max_frames=args.frames, seed=args.seed, record_path=args.record, replay_path=args.replay,
+              renderer=game_renderer)
     pygame.quit()
     sys.exit()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Batch runner for difficulty tuning: plays many headless games with a scripted pilot
+across all cores and prints aggregated results for each difficulty
+
+    python simulate.py --games 200
+    python simulate.py --games 100 --sweep attack_reduction_per_stage=50,100,150 --sweep min_fire_cooldown=300,500
+"""
+
+import argparse
+import time
+
+from source import constants as c
+from source import batch
+
+
+def parse_sweep(text: str):
+    name, _, values = text.partition('=')
+    if name not in c.Difficulty._fields or not values:
+        raise argparse.ArgumentTypeError(f"expected NAME=V1,V2,... with NAME one of {', '.join(c.Difficulty._fields)}")
+    return name, [int(value) for value in values.split(',')]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Simulate Galaga games for difficulty tuning")
+    parser.add_argument('--games', type=int, default=100,
+                        help="games to play with each difficulty")
+    parser.add_argument('--seed', type=int, default=0,
+                        help="seed of the first game, the others count up from it")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="number of processes (default: one per CPU)")
+    parser.add_argument('--max-steps', type=int, default=batch.MAX_GAME_STEPS,
+                        help="end a game after this many simulation steps")
+    parser.add_argument('--sweep', type=parse_sweep, action='append', default=[], metavar='NAME=V1,V2,...',
+                        help="try these values of a difficulty parameter, can be repeated")
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    difficulties = batch.difficulty_sweep(dict(args.sweep))
+    start = time.perf_counter()
+    summaries = batch.simulate(difficulties, args.games, args.seed, args.workers, args.max_steps)
+    for difficulty in difficulties:
+        batch.print_summary(difficulty, summaries[difficulty])
+    print(f"Played {args.games * len(difficulties)} games in {time.perf_counter() - start:.1f} s")
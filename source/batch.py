@@ -0,0 +1,203 @@
+"""
+Batch simulation of headless games, for tuning the difficulty
+
+Every game is played by a scripted pilot in its own process from a multiprocessing
+pool, starting straight in the play state with its own seed. The results of all
+games are aggregated per difficulty: the stage reached, the score distribution, the
+hit ratio, the game time spent on each stage and percentiles of the time it took to
+compute a simulation step.
+
+The workers switch the game to headless mode before they import anything that sets
+up pygame, the process running the pool is left as it is.
+"""
+import itertools
+import multiprocessing
+import os
+import time
+from collections import Counter, defaultdict, namedtuple
+
+from . import constants as c, replay
+
+# Stop a game after an hour of game time, in case the pilot never dies
+MAX_GAME_STEPS = 3600 * 1000 // c.SIM_STEP
+
+# How close (pixels) things have to get before the pilot gets out of the way
+DODGE_HEIGHT = 90
+DODGE_WIDTH = 16
+ATTACKER_WIDTH = 24
+AIM_TOLERANCE = 3
+
+# Results of one game
+# stage_times: game time in millis. spent on each completed stage, by stage number
+# step_times: Counter of the time each simulation step took, in microseconds
+GameResult = namedtuple("GameResult", "seed difficulty stage score shots hits game_time stage_times step_times")
+
+
+class Pilot:
+    """
+    Plays the game as a Control input source: keeps firing, lines up under the nearest
+    enemy and moves away from missiles and diving enemies coming down on the fighter
+    """
+
+    def __init__(self):
+        self.think_time = 0.0  # seconds spent deciding, to leave out of the step times
+
+    def next_frame(self, state):
+        start = time.perf_counter()
+        mask = self.decide(state)
+        self.think_time += time.perf_counter() - start
+        return mask, c.SIM_STEP
+
+    def decide(self, state) -> int:
+        player = getattr(state, 'player', None)
+        if player is None or not state.is_player_alive:
+            return 0
+        x, y = player.x, player.y
+
+        # Get out of the way of the closest danger first
+        threats = [(missile.x, y - missile.y) for missile in state.enemy_missiles
+                   if 0 <= y - missile.y < DODGE_HEIGHT and abs(missile.x - x) < DODGE_WIDTH]
+        threats += [(enemy.x, y - enemy.y) for enemy in state.enemies
+                    if enemy.is_attacking and 0 <= y - enemy.y < DODGE_HEIGHT and abs(enemy.x - x) < ATTACKER_WIDTH]
+        if threats:
+            threat_x = min(threats, key=lambda threat: threat[1])[0]
+            move_left = threat_x >= x
+            if move_left and player.rect.left <= DODGE_WIDTH:
+                move_left = False
+            elif not move_left and player.rect.right >= c.GAME_SIZE.width - DODGE_WIDTH:
+                move_left = True
+            return replay.INPUT_FIRE | (replay.INPUT_LEFT if move_left else replay.INPUT_RIGHT)
+
+        # Line up under the closest enemy
+        targets = [enemy.x for enemy in state.enemies if enemy.y < y]
+        if targets:
+            target_x = min(targets, key=lambda target: abs(target - x))
+            if target_x < x - AIM_TOLERANCE:
+                return replay.INPUT_FIRE | replay.INPUT_LEFT
+            if target_x > x + AIM_TOLERANCE:
+                return replay.INPUT_FIRE | replay.INPUT_RIGHT
+        return replay.INPUT_FIRE
+
+
+def init_worker():
+    """
+    Set up a pool process for playing games: headless, before source.setup is imported by run_game
+    """
+    os.environ[c.HEADLESS_ENV] = '1'
+    # Otherwise SDL turns SIGINT and SIGTERM into quit events nobody polls, and workers can't be stopped
+    os.environ['SDL_NO_SIGNAL_HANDLERS'] = '1'
+
+
+def run_game(job) -> GameResult:
+    """
+    Play one game with the pilot, job is (seed, difficulty, max steps)
+    """
+    seed, difficulty, max_steps = job
+    # imported here so the module can be imported without setting up the game's display and audio
+    from . import main
+    from .states import new_persist
+
+    pilot = Pilot()
+    control = main.Control(main.STATE_DICT, c.PLAY_STATE, new_persist(seed, difficulty), headless=True,
+                           max_frames=max_steps, input_source=pilot)
+    play = control.state
+    step_times = Counter()
+    stage_times = {}
+    stage_num = stage_start = 0
+    while control.running and control.state is play:
+        think_time = pilot.think_time
+        start = time.perf_counter()
+        control.step(None)
+        elapsed = time.perf_counter() - start - (pilot.think_time - think_time)
+        step_times[int(elapsed * 1000000)] += 1
+        if play.stage_num != stage_num:
+            if stage_num:
+                stage_times[stage_num] = control.current_time - stage_start
+            stage_num, stage_start = play.stage_num, control.current_time
+
+    return GameResult(seed=seed, difficulty=difficulty, stage=play.stage_num, score=play.score,
+                      shots=play.num_shots, hits=play.num_hits, game_time=control.current_time,
+                      stage_times=stage_times, step_times=step_times)
+
+
+def percentile(counts: Counter, fraction: float):
+    """
+    The value below which the given fraction of the counted values lie
+    """
+    total = sum(counts.values())
+    if not total:
+        return 0
+    rank = fraction * (total - 1)
+    seen = 0
+    for value in sorted(counts):
+        seen += counts[value]
+        if seen > rank:
+            return value
+    return max(counts)
+
+
+def summarize(results) -> dict:
+    """
+    Aggregate the results of the games played with one difficulty
+    """
+    stages = Counter(result.stage for result in results)
+    scores = Counter(result.score for result in results)
+    shots = sum(result.shots for result in results)
+    hits = sum(result.hits for result in results)
+    stage_times = defaultdict(list)
+    step_times = Counter()
+    for result in results:
+        for stage_num, stage_time in result.stage_times.items():
+            stage_times[stage_num].append(stage_time)
+        step_times.update(result.step_times)
+    return {
+        'games': len(results),
+        'stage': {'mean': sum(result.stage for result in results) / len(results),
+                  'counts': dict(sorted(stages.items()))},
+        'score': {'mean': sum(result.score for result in results) / len(results),
+                  'min': min(scores), 'p25': percentile(scores, 0.25), 'median': percentile(scores, 0.5),
+                  'p75': percentile(scores, 0.75), 'max': max(scores)},
+        'hit_ratio': hits / shots if shots else 0,
+        'stage_time': {stage_num: sum(times) / len(times) for stage_num, times in sorted(stage_times.items())},
+        'step_time_us': {'p50': percentile(step_times, 0.5), 'p90': percentile(step_times, 0.9),
+                         'p99': percentile(step_times, 0.99), 'max': max(step_times) if step_times else 0},
+    }
+
+
+def difficulty_sweep(sweep: dict, base=c.DEFAULT_DIFFICULTY) -> list:
+    """
+    Every combination of the given values, sweep maps Difficulty field names to lists of values
+    """
+    names = list(sweep)
+    return [base._replace(**dict(zip(names, values))) for values in itertools.product(*sweep.values())]
+
+
+def simulate(difficulties, num_games: int, first_seed: int = 0, workers: int = None,
+             max_steps: int = MAX_GAME_STEPS) -> dict:
+    """
+    Play num_games games with each difficulty across a process pool, the games with
+    different difficulties use the same seeds. Returns the summary for each difficulty
+    """
+    jobs = [(first_seed + i, difficulty, max_steps) for difficulty in difficulties for i in range(num_games)]
+    workers = workers or os.cpu_count()
+    results = defaultdict(list)
+    with multiprocessing.Pool(workers, initializer=init_worker) as pool:
+        for result in pool.imap_unordered(run_game, jobs, chunksize=max(1, len(jobs) // (8 * workers))):
+            results[result.difficulty].append(result)
+        pool.close()
+        pool.join()
+    return {difficulty: summarize(results[difficulty]) for difficulty in difficulties}
+
+
+def print_summary(difficulty, summary: dict, base=c.DEFAULT_DIFFICULTY):
+    changed = [f"{name}={value}" for name, value in difficulty._asdict().items() if value != getattr(base, name)]
+    print("Difficulty:", ", ".join(changed) if changed else "default")
+    stage, score, step_time = summary['stage'], summary['score'], summary['step_time_us']
+    print(f"  games: {summary['games']}, stage reached: mean {stage['mean']:.2f}, counts {stage['counts']}")
+    print(f"  score: mean {score['mean']:.0f}, min {score['min']}, p25 {score['p25']}, median {score['median']}, "
+          f"p75 {score['p75']}, max {score['max']}")
+    print(f"  hit ratio: {summary['hit_ratio'] * 100:.1f}%")
+    print("  time per stage:", ", ".join(f"{stage_num}: {stage_time / 1000:.1f} s"
+                                         for stage_num, stage_time in summary['stage_time'].items()))
+    print(f"  step time: p50 {step_time['p50']} us, p90 {step_time['p90']} us, p99 {step_time['p99']} us, "
+          f"max {step_time['max']} us")
@@ -2,7 +2,25 @@
 from collections import namedtuple
 
 # persistent data shared between states
-Persist = namedtuple("Persist", "stars scores current_score one_up_score high_score num_shots num_hits stage_num")
+# rng is the session's random.Random, seed is what it gets re-seeded with when the next game starts
+Persist = namedtuple("Persist", "stars scores current_score one_up_score high_score num_shots num_hits stage_num "
+                                "rng seed difficulty")
+
+# How the enemies' attack waves and firing speed up with the stage number, see Formation.set_difficulty
+# attack frequency = max(min_attack_frequency, base_attack_frequency - stage * attack_reduction_per_stage)
+# fire cooldown = max(min_fire_cooldown, zako/goei_fire_cooldown - min(stage * fire_reduction_per_stage,
+#                                                                     max_fire_reduction))
+Difficulty = namedtuple("Difficulty", "base_attack_frequency attack_reduction_per_stage min_attack_frequency "
+                                      "zako_fire_cooldown goei_fire_cooldown fire_reduction_per_stage "
+                                      "max_fire_reduction min_fire_cooldown")
+DEFAULT_DIFFICULTY = Difficulty(base_attack_frequency=3000,
+                                attack_reduction_per_stage=100,
+                                min_attack_frequency=1000,
+                                zako_fire_cooldown=2000,
+                                goei_fire_cooldown=1500,
+                                fire_reduction_per_stage=50,
+                                max_fire_reduction=500,
+                                min_fire_cooldown=500)
 
 # Point tuple
 Point = namedtuple("Point", "x y")
@@ -43,6 +61,11 @@ HIT_MISS_RATIO = 'Hit-miss ratio {: >10.1%}'  # text is yellow
 # Resources and other file paths
 RESOURCE_DIR = "resources"
 SCORE_FILE = "scores.txt"
+DEMO_REPLAY_FILE = RESOURCE_DIR + "/demo.rpl"  # recorded game shown by the demo state, optional
+STAGE_FILE = RESOURCE_DIR + "/stages.json"  # stage layouts and enemy paths, see source/stage_data.py
+SCORE_DB_FILE = "galaga_scores.db"  # full game history (SQLite)
+LEGACY_SCORE_DB_FILE = "galaga_scores.json"  # imported into SCORE_DB_FILE on first run
+PATH_CACHE_FILE = RESOURCE_DIR + "/paths.npz"  # enemy paths computed by earlier sessions, made again when missing
 
 # Game space
 GAME_SIZE = Area(224, 288)
@@ -53,12 +76,23 @@ DISPLAY_SCALE = 2  # Scale factor for window size (2x = 448x576)
 SCREEN_WIDTH = GAME_SIZE.width * DISPLAY_SCALE
 SCREEN_HEIGHT = GAME_SIZE.height * DISPLAY_SCALE
 DEFAULT_SCREEN_SIZE = (SCREEN_WIDTH, SCREEN_HEIGHT)
+SOFTWARE_RENDERER = 'software'  # renderer backends, see renderer.py
+TEXTURE_RENDERER = 'sdl2'
 STAGE_TOP_Y = 30  # Y-coord. for the top of the stage
 STAGE_BOTTOM_Y = GAME_SIZE.height - 20  # Y-coord. for the bottom of the stage
 BADGE_Y = GAME_SIZE.height - 19  # Y-coord for the top of the stage badges
 
 # Timing and frequencies:
-FPS = 30  # Frames per second
+FPS = 30  # Simulation steps per second
+SIM_STEP = 1000 // FPS  # milliseconds of game time per simulation step
+RENDER_FPS = 60  # Cap on displayed frames per second, independent of the simulation rate
+MAX_FRAME_TIME = 250  # longer frames are clamped so a stall does not cause a long catch-up
+
+# Headless mode: set this environment variable to "1" before importing the game to run
+# without a window, audio or frame cap
+HEADLESS_ENV = 'GALAGA_HEADLESS'
+# Where the path cache is kept instead of PATH_CACHE_FILE, empty to keep the paths in memory only
+PATH_CACHE_ENV = 'GALAGA_PATH_CACHE'
 ENEMY_ANIMATION_FREQ = 800  # milliseconds
 TEXT_FLASH_FREQ = 300  # "
 
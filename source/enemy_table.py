@@ -0,0 +1,408 @@
+"""
+The state of enemies as NumPy arrays, one row (slot) per enemy
+
+Formation keeps the enemies of a stage in an EnemyTable and updates all of them at once:
+placing the ones resting in the formation, moving the ones on an entrance or attack path
+and finding the ones that may fire. The enemy sprites read and write their rows and are
+kept in step for drawing and collisions. An enemy that isn't in a formation has a table
+with one row of its own.
+"""
+import numpy as np
+
+from . import constants as c
+from .patterns import DIVE_TEMPLATES
+
+# What an enemy is doing, flags of the state column. An escort can start attacking while it's
+# still entering, then it dives once it's in
+IN_FORMATION = 0
+ENTERING = 1
+ATTACKING = 2
+
+# The paths of an enemy
+ENTRANCE_PATH, ATTACK_PATH = range(2)
+
+# The type column, index of the enemy_type
+ENEMY_TYPES = ("zako", "goei", "boss_galaga")
+
+PATH_SPEED = 2.0 / c.SIM_STEP  # Pixels per millisecond (2 per simulation step)
+PATH_SAMPLE_SPACING = 2.0  # most pixels between the samples of a track
+
+# Tables with up to this many slots are updated one enemy at a time: for a stage's worth of
+# enemies that is cheaper than the fixed cost of every NumPy call
+SCALAR_LIMIT = 64
+
+
+def compile_tracks(starts, points):
+    """
+    Paths as tracks: from the start position through the points of the path, resampled at equal
+    distances along the way so the position at any distance is found without searching. Compiles
+    paths of the same number of points at once, starts (n, 2) and points (n, m, 2), each the same
+    as on its own. Returns the samples (n, most samples, 2, the shorter tracks end with copies of
+    their last point), the number of spaces between the samples, their spacing and the length of
+    every track
+    """
+    vertices = np.concatenate((np.reshape(starts, (-1, 1, 2)), points), axis=1).astype(np.float64)
+    segments = np.diff(vertices, axis=1)
+    segment_length = np.hypot(segments[:, :, 0], segments[:, :, 1])
+    arc_length = np.cumsum(segment_length, axis=1)  # where every segment ends
+    length = arc_length[:, -1]
+    num_spaces = np.maximum(1, np.ceil(length / PATH_SAMPLE_SPACING)).astype(np.int64)
+    spacing = np.where(length > 0, length / num_spaces, PATH_SAMPLE_SPACING)
+    distance = np.minimum(np.arange(num_spaces.max() + 1) * spacing[:, None], length[:, None])
+
+    # every sample is on the first segment that ends at or after it
+    segment = np.empty(distance.shape, dtype=np.int64)
+    for row, (row_arc_length, row_distance) in enumerate(zip(arc_length, distance)):
+        segment[row] = np.searchsorted(row_arc_length, row_distance)
+    np.minimum(segment, segments.shape[1] - 1, out=segment)
+    segment += np.arange(len(vertices))[:, None] * segments.shape[1]  # index into all segments
+    length_of_segment = segment_length.ravel()[segment]
+    along = distance - (arc_length.ravel()[segment] - length_of_segment)
+    fraction = np.divide(along, length_of_segment, out=np.zeros_like(along), where=length_of_segment > 0)
+    samples = vertices[:, :-1].reshape(-1, 2)[segment] + fraction[:, :, None] * segments.reshape(-1, 2)[segment]
+    return samples, num_spaces, spacing, length
+
+
+def compile_track(start, points):
+    """compile_tracks for one path, returns its samples, their spacing and the length of the track"""
+    samples, num_spaces, spacing, length = compile_tracks(start, np.reshape(points, (1, -1, 2)))
+    return samples[0, :num_spaces[0] + 1], float(spacing[0]), float(length[0])
+
+
+def track_positions(samples, first_sample, num_spaces, spacing, distance) -> np.ndarray:
+    """
+    The positions at distances along tracks, in whole pixels. first_sample is where each track starts
+    in samples, the distances are at most the lengths of the tracks
+    """
+    sample = distance / spacing
+    index = np.minimum(sample.astype(np.int64), num_spaces - 1)
+    fraction = (sample - index)[:, None]
+    index += first_sample
+    before = samples[index]
+    return np.rint(before + fraction * (samples[index + 1] - before)).astype(np.int64)
+
+
+def split_tracks(samples, num_spaces, spacing, length) -> list:
+    """The tracks of compile_tracks one at a time, as (samples, the samples as a flat list, spacing, length)"""
+    return [(track[:spaces + 1], track[:spaces + 1].ravel().tolist(), track_spacing, track_length)
+            for track, spaces, track_spacing, track_length in zip(samples, num_spaces.tolist(), spacing.tolist(),
+                                                                   length.tolist())]
+
+
+# The tracks made by cached_tracks, by where they start and the points of their paths
+track_cache = {}
+
+
+def cached_tracks(starts, points) -> list:
+    """split_tracks of compile_tracks, the tracks made before taken from track_cache"""
+    keys = [start.tobytes() + path.tobytes() for start, path in zip(starts, points)]
+    missing = [n for n, key in enumerate(keys) if key not in track_cache]
+    if missing:
+        for n, track in zip(missing, split_tracks(*compile_tracks(starts[missing], points[missing]))):
+            track_cache[keys[n]] = track
+    return [track_cache[key] for key in keys]
+
+
+class EnemyTable:
+    """
+    Enemies by slot: position, state, formation slot, type, hits left, firing timers and paths.
+    Only slots marked alive (spawned and not killed) are updated.
+
+    The points of the paths are in one array, every slot has room for an entrance and an attack
+    path of up to path_width points, or the attack path is the dive of the enemy's type, which
+    is kept as where it starts and its target. When an enemy starts following a path it's
+    compiled to a track from where the enemy is (compile_tracks), on the next follow_paths
+    together with the others that started, with room for track_width samples per slot. The
+    enemy's position is looked up from the time spent on the track, so it moves the same distance
+    in the same time at any frame rate, and is only rounded to whole pixels
+    """
+
+    # The columns that go with an enemy when it moves to another table
+    COLUMNS = ('position', 'state', 'row', 'col', 'hits', 'can_fire', 'last_fire_time', 'fire_cooldown')
+
+    def __init__(self, capacity: int, path_width: int = 1):
+        self.capacity = capacity
+        self.sprites = [None] * capacity
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.position = np.zeros((capacity, 2), dtype=np.int64)  # x, y
+        self.state = np.zeros(capacity, dtype=np.int8)
+        self.type = np.zeros(capacity, dtype=np.int8)
+        self.row = np.full(capacity, -1, dtype=np.int64)  # formation slot, -1 for none
+        self.col = np.full(capacity, -1, dtype=np.int64)
+        self.hits = np.ones(capacity, dtype=np.int64)
+        self.can_fire = np.zeros(capacity, dtype=bool)
+        self.last_fire_time = np.zeros(capacity, dtype=np.int64)
+        self.fire_cooldown = np.zeros(capacity, dtype=np.int64)
+
+        # Paths
+        self.path_width = path_width
+        self.points = np.zeros((capacity * 2 * path_width, 2), dtype=np.int64)
+        self.path_length = np.zeros((capacity, 2), dtype=np.int64)
+        self.following = np.zeros(capacity, dtype=bool)
+        self.current_path = np.zeros(capacity, dtype=np.int8)  # ENTRANCE_PATH or ATTACK_PATH
+        self.path_time = np.zeros(capacity)  # milliseconds spent on the track
+        self.dive = np.zeros(capacity, dtype=bool)  # the attack path is the dive of the enemy type
+        self.dive_start = np.zeros((capacity, 2), dtype=np.int64)
+        self.dive_target = np.zeros(capacity, dtype=np.int64)  # x
+        self.compiled = np.zeros(capacity, dtype=bool)  # the track is of the path being followed
+
+        # The track of the path being followed
+        self.track_width = 2
+        self.track = np.zeros((capacity * self.track_width, 2))
+        self.track_spaces = np.ones(capacity, dtype=np.int64)  # samples - 1
+        self.track_spacing = np.ones(capacity)
+        self.track_length = np.zeros(capacity)
+        self.tracks = [None] * capacity  # the track of each slot as (x, y of every sample in a list, spacing, length)
+
+    def _copy_row(self, slot: int, table: 'EnemyTable', table_slot: int):
+        for name in self.COLUMNS:
+            getattr(table, name)[table_slot] = getattr(self, name)[slot]
+
+    def attach(self, slot: int, enemy):
+        """
+        Move an enemy from the table it's in to a slot of this one, not spawned yet
+        """
+        enemy.table._copy_row(enemy.slot, self, slot)
+        self.type[slot] = ENEMY_TYPES.index(enemy.enemy_type)
+        self.alive[slot] = False
+        self.path_length[slot] = 0, 0
+        self.following[slot] = False
+        self.sprites[slot] = enemy
+        enemy.table = self
+        enemy.slot = slot
+
+    def detach(self, slot: int):
+        """
+        Move the enemy in a slot back to its own table, keeping its state readable after it's killed
+        """
+        enemy = self.sprites[slot]
+        self._copy_row(slot, enemy.own_table, 0)
+        self.alive[slot] = False
+        self.following[slot] = False
+        self.sprites[slot] = None
+        enemy.table = enemy.own_table
+        enemy.slot = 0
+
+    def clear(self):
+        self.alive[:] = False
+        self.following[:] = False
+        self.sprites = [None] * self.capacity
+
+    def _path_start(self, slot: int, which: int) -> int:
+        return (slot * 2 + which) * self.path_width
+
+    def _widen_paths(self, width: int):
+        """Make room for paths of width points"""
+        points = np.zeros((self.capacity * 2, width, 2), dtype=self.points.dtype)
+        points[:, :self.path_width] = self.points.reshape(self.capacity * 2, self.path_width, 2)
+        self.points = points.reshape(-1, 2)
+        self.path_width = width
+
+    def _widen_tracks(self, width: int):
+        """Make room for tracks of width samples, the tracks being followed go on where they were"""
+        track = np.zeros((self.capacity, width, 2))
+        track[:, :self.track_width] = self.track.reshape(self.capacity, self.track_width, 2)
+        self.track = track.reshape(-1, 2)
+        self.track_width = width
+
+    def _follow(self, slot: int, which: int):
+        """
+        Follow one of the slot's paths from the start, or nothing when it's empty. Its track is made
+        from where the enemy is by the next follow_paths
+        """
+        self.current_path[slot] = which
+        self.path_time[slot] = 0.0
+        self.following[slot] = self.path_length[slot, which] > 0
+        self.compiled[slot] = False
+        self.tracks[slot] = None
+
+    def _compile_tracks(self, slots):
+        """
+        Make the tracks of the paths the slots started following, the ones with as many points together.
+        Entrance tracks are kept in track_cache, the same path from the same start has the same track
+        """
+        if not len(slots):
+            return
+        groups = {}
+        for slot in slots.tolist():
+            which = self.current_path[slot]
+            if which == ATTACK_PATH and self.dive[slot]:
+                key = ATTACK_PATH, -1 - self.type[slot]
+            else:
+                key = which, self.path_length[slot, which]
+            groups.setdefault(key, []).append(slot)
+        for (which, length), group in groups.items():
+            group = np.array(group)
+            starts = self.position[group]
+            if length < 0:
+                points = DIVE_TEMPLATES[ENEMY_TYPES[-1 - length]].apply(self.dive_start[group], self.dive_target[group])
+            else:
+                first = (group * 2 + which) * self.path_width
+                points = self.points[first[:, None] + np.arange(length)]
+            if which == ENTRANCE_PATH:
+                tracks = cached_tracks(starts, points)
+            else:
+                tracks = split_tracks(*compile_tracks(starts, points))
+            for slot, track in zip(group.tolist(), tracks):
+                self._set_track(slot, track)
+        self.compiled[slots] = True
+
+    def _set_track(self, slot: int, track: tuple):
+        """Put a track of split_tracks in the slot's row of the track arrays and in tracks"""
+        samples, sample_list, spacing, track_length = track
+        if len(samples) > self.track_width:
+            self._widen_tracks(max(len(samples), 2 * self.track_width))
+        first = slot * self.track_width
+        self.track[first:first + len(samples)] = samples
+        self.track_spaces[slot] = len(samples) - 1
+        self.track_spacing[slot] = spacing
+        self.track_length[slot] = track_length
+        self.tracks[slot] = sample_list, spacing, track_length
+
+    def set_path(self, slot: int, which: int, path):
+        """
+        Set the entrance or attack path, a sequence of (x, y) points, and start following it from
+        the beginning. An enemy given an attack path while entering starts over with its entrance
+        and then attacks
+        """
+        length = len(path)
+        if length > self.path_width:
+            self._widen_paths(max(length, 2 * self.path_width))
+        if length:
+            start = self._path_start(slot, which)
+            self.points[start:start + length] = path
+        self.path_length[slot, which] = length
+        if which == ATTACK_PATH:
+            self.dive[slot] = False
+        self._start_path(slot, which)
+
+    def set_dive(self, slot: int, target_x: int):
+        """
+        Make the dive of the enemy's type, from where it is toward target_x, its attack path and
+        start following it like set_path. Nothing is computed until its track is made
+        """
+        self.dive[slot] = True
+        self.dive_start[slot] = self.position[slot]
+        self.dive_target[slot] = target_x
+        self.path_length[slot, ATTACK_PATH] = DIVE_TEMPLATES[ENEMY_TYPES[self.type[slot]]].steps
+        self._start_path(slot, ATTACK_PATH)
+
+    def _start_path(self, slot: int, which: int):
+        if which == ATTACK_PATH and self.state[slot] & ENTERING and self.path_length[slot, ENTRANCE_PATH]:
+            which = ENTRANCE_PATH
+        self._follow(slot, which)
+
+    def place_in_formation(self, col_x, row_y):
+        """Put the enemies resting in the formation at their grid positions, given per column and row"""
+        resting = self.alive & (self.state == IN_FORMATION)
+        self.position[resting, 0] = col_x[self.col[resting]]
+        self.position[resting, 1] = row_y[self.row[resting]]
+
+    def _finish_path(self, slot: int):
+        """
+        The enemy reached the end of its path: the entering join the formation, attackers go back.
+        An escort that was still entering starts its attack with the time left over
+        """
+        end = slot * self.track_width + self.track_spaces[slot]
+        self.position[slot] = np.rint(self.track[end])
+        if self.current_path[slot] == ENTRANCE_PATH:
+            self.state[slot] &= ~ENTERING
+            if self.state[slot] & ATTACKING:
+                time_left = self.path_time[slot] - self.track_length[slot] / PATH_SPEED
+                self._follow(slot, ATTACK_PATH)
+                self.path_time[slot] = time_left
+                return
+        else:
+            self.state[slot] &= ~ATTACKING
+        self.following[slot] = False
+
+    def follow_paths(self, delta_time: int, slots=None):
+        """Move the entering and attacking enemies (of slots, all by default) along their tracks by the time passed"""
+        if slots is None:
+            slots = self.following.nonzero()[0]
+        else:
+            slots = np.asarray(slots, dtype=np.int64)
+            slots = slots[self.following[slots]]
+        if not len(slots):
+            return
+        self._compile_tracks(slots[~self.compiled[slots]])
+        self.path_time[slots] += delta_time
+        ended = self.path_time[slots] * PATH_SPEED >= self.track_length[slots]
+        if ended.any():
+            for slot in slots[ended].tolist():
+                self._finish_path(slot)
+            slots = slots[self.following[slots]]
+            self._compile_tracks(slots[~self.compiled[slots]])
+        distance = np.minimum(self.path_time[slots] * PATH_SPEED, self.track_length[slots])
+        self.position[slots] = track_positions(self.track, slots * self.track_width, self.track_spaces[slots],
+                                               self.track_spacing[slots], distance)
+
+    def update(self, delta_time: int, col_x, row_y):
+        """
+        place_in_formation, follow_paths and sync_sprites. Tables of up to SCALAR_LIMIT slots are
+        gone through one enemy at a time, with the same arithmetic so they end up at the same pixels
+        """
+        if self.capacity > SCALAR_LIMIT:
+            self.place_in_formation(col_x, row_y)
+            self.follow_paths(delta_time)
+            self.sync_sprites()
+            return
+        alive, state, following = self.alive.tolist(), self.state.tolist(), self.following.tolist()
+        tracks, sprites = self.tracks, self.sprites
+        uncompiled = [slot for slot in range(self.capacity) if following[slot] and tracks[slot] is None]
+        if uncompiled:
+            self._compile_tracks(np.array(uncompiled))
+        col, row, col_x, row_y = self.col.tolist(), self.row.tolist(), col_x.tolist(), row_y.tolist()
+        xs, ys, path_time = self.position[:, 0].tolist(), self.position[:, 1].tolist(), self.path_time.tolist()
+        for slot in range(self.capacity):
+            if following[slot]:
+                time = path_time[slot] = path_time[slot] + delta_time
+                samples, spacing, track_length = tracks[slot]
+                distance = time * PATH_SPEED
+                if distance >= track_length:
+                    self.path_time[slot] = time
+                    self._finish_path(slot)
+                    if not self.following[slot]:
+                        xs[slot], ys[slot] = self.position[slot].tolist()
+                        if alive[slot]:
+                            sprites[slot].rect.center = xs[slot], ys[slot]
+                        continue
+                    if tracks[slot] is None:
+                        self._compile_tracks(np.array([slot]))
+                    samples, spacing, track_length = tracks[slot]
+                    time = path_time[slot] = float(self.path_time[slot])
+                    distance = min(time * PATH_SPEED, track_length)
+                # track_positions with Python numbers
+                sample = distance / spacing
+                index = int(sample)
+                if index > len(samples) // 2 - 2:
+                    index = len(samples) // 2 - 2
+                fraction = sample - index
+                before_x, before_y, after_x, after_y = samples[2 * index:2 * index + 4]
+                xs[slot] = round(before_x + fraction * (after_x - before_x))
+                ys[slot] = round(before_y + fraction * (after_y - before_y))
+                if alive[slot]:
+                    sprites[slot].rect.center = xs[slot], ys[slot]
+            elif alive[slot]:
+                if state[slot] == IN_FORMATION:
+                    xs[slot], ys[slot] = col_x[col[slot]], row_y[row[slot]]
+                sprites[slot].rect.center = xs[slot], ys[slot]
+        self.position[:, 0] = xs
+        self.position[:, 1] = ys
+        self.path_time[:] = path_time
+
+    def ready_to_fire(self, current_time: int, player_y: int) -> list:
+        """The attacking enemies whose guns are loaded and that are above the player, in slot order"""
+        attacking = (self.state & ATTACKING) != 0
+        if not attacking.any():
+            return []
+        ready = (self.alive & self.can_fire & attacking & (self.position[:, 1] < player_y - 50)
+                 & (current_time - self.last_fire_time >= self.fire_cooldown))
+        return [self.sprites[slot] for slot in ready.nonzero()[0].tolist()]
+
+    def sync_sprites(self):
+        """Move the sprites of the live enemies to their positions in the table"""
+        slots = self.alive.nonzero()[0]
+        sprites = self.sprites
+        for slot, position in zip(slots.tolist(), self.position[slots].tolist()):
+            sprites[slot].rect.center = position
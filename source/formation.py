@@ -1,9 +1,12 @@
 import pygame
 import math
+import numpy as np
 from . import constants as c
-from .sprites import Zako, Goei, BossGalaga
+from .enemy_table import EnemyTable
+from .sprites import enemy_pools
 from .patterns import PatternEngine
-from .stage_patterns import StagePatterns
+from .stage_data import stages
+from .path_cache import path_cache
 
 
 class Formation:
@@ -20,8 +23,20 @@ class Formation:
     # Formation position offsets
     BASE_X = c.GAME_SIZE.width // 2
     BASE_Y = 60
+
+    # Parts of get_position that don't change, per column and row
+    COL_BASE_X = BASE_X + (np.arange(COLS) - COLS // 2) * COL_SPACING
+    COL_SPREAD = (np.abs(np.arange(COLS) - COLS / 2.0) / (COLS / 2.0)  # spread factor, negative on the left
+                  * np.where(np.arange(COLS) >= COLS / 2.0, 1, -1))
+    ROW_BASE_Y = BASE_Y + np.arange(ROWS) * ROW_SPACING
     
-    def __init__(self):
+    def __init__(self, rng, difficulty=c.DEFAULT_DIFFICULTY):
+        # Random number generator of the game session
+        self.rng = rng
+
+        # How attacks and enemy fire speed up with the stages
+        self.difficulty = difficulty
+
         # 2D grid to track enemy positions [row][col]
         self.grid = [[None for _ in range(self.COLS)] for _ in range(self.ROWS)]
         
@@ -33,9 +48,12 @@ class Formation:
         
         # Group to hold all enemies
         self.enemies = pygame.sprite.Group()
+
+        # The state of the enemies, a slot per enemy of the stage in spawn order
+        self.table = EnemyTable(self.ROWS * self.COLS)
         
         # Pattern engine for entrance/attack patterns
-        self.pattern_engine = PatternEngine()
+        self.pattern_engine = PatternEngine(rng)
         
         # Track entrance progress
         self.entrance_delay_timer = 0
@@ -43,27 +61,20 @@ class Formation:
         
         # Attack timing
         self.attack_timer = 0
-        self.attack_frequency = 3000  # Milliseconds between attack waves
-        self.min_attack_frequency = 1000  # Minimum frequency at higher levels
+        self.attack_frequency = difficulty.base_attack_frequency  # Milliseconds between attack waves
+        self.min_attack_frequency = difficulty.min_attack_frequency  # Minimum frequency at higher levels
         
+    @staticmethod
+    def get_stage_groups(stage_num):
+        """The entrance groups of a stage, from its layout in the stage file"""
+        return stages.stage_groups(stage_num)
+    
     def create_stage_formation(self, stage_num):
         """Create enemy formation for a given stage with entrance patterns"""
         # Clear existing formation
         self.clear()
         
-        # Use specific patterns for stages 1 and 2, then cycle
-        if stage_num == 1:
-            groups = StagePatterns.get_stage_1_groups()
-        elif stage_num == 2:
-            groups = StagePatterns.get_stage_2_groups()
-        else:
-            # Stages repeat patterns with increased difficulty
-            # Stage 3 is challenging stage, so stage 4 uses stage 1 pattern, etc.
-            effective_stage = ((stage_num - 4) % 10) + 1
-            if effective_stage == 1 or (stage_num - 1) % 10 == 0:
-                groups = StagePatterns.get_stage_1_groups()
-            else:
-                groups = StagePatterns.get_stage_2_groups()
+        groups = self.get_stage_groups(stage_num)
         
         # Create spawn list from groups
         spawn_list = []
@@ -72,20 +83,21 @@ class Formation:
             group_delay = group['delay']
             
             for idx, enemy_data in enumerate(group['enemies']):
-                # Create enemy based on type
+                # Create enemy based on type, reusing enemies of the earlier stages
                 if enemy_data['type'] == 'zako':
                     variant = 'yellow' if stage_num > 5 else 'blue'
-                    enemy = Zako(0, 0, variant)
+                    enemy = enemy_pools['zako'].acquire(0, 0, variant)
                 elif enemy_data['type'] == 'goei':
                     variant = 'red' if (enemy_data['row'] + enemy_data['col']) % 2 == 0 else 'white'
-                    enemy = Goei(0, 0, variant)
+                    enemy = enemy_pools['goei'].acquire(0, 0, variant)
                 elif enemy_data['type'] == 'boss_galaga':
-                    enemy = BossGalaga(0, 0)
+                    enemy = enemy_pools['boss_galaga'].acquire(0, 0)
                 
+                self.table.attach(len(spawn_list), enemy)
                 enemy.formation_pos = (enemy_data['row'], enemy_data['col'])
                 
-                # Create entrance path
-                path = StagePatterns.create_entrance_path(
+                # Entrance path, computed once for all stages
+                path = path_cache.entrance_path(
                     group['pattern'], 
                     idx, 
                     (enemy_data['row'], enemy_data['col'])
@@ -119,6 +131,11 @@ class Formation:
         x += self.spread * spread_factor * (1 if col >= center_col else -1)
         
         return int(x), int(y)
+
+    def get_positions(self):
+        """get_position for every column and row, the x of each column and y of each row"""
+        col_x = self.COL_BASE_X + self.x_offset + self.spread * self.COL_SPREAD
+        return col_x.astype(np.int64), self.ROW_BASE_Y + self.y_offset
     
     def update(self, delta_time, player_pos=None):
         """Update formation movement and enemy positions"""
@@ -133,6 +150,7 @@ class Formation:
                 
                 # Set entrance path and add to formation
                 enemy.set_entrance_path(spawn_data['path'])
+                self.table.alive[enemy.slot] = True
                 self.grid[spawn_data['row']][spawn_data['col']] = enemy
                 self.enemies.add(enemy)
         
@@ -158,14 +176,12 @@ class Formation:
         # Calculate horizontal movement
         self.x_offset = int(c.FORMATION_MAX_X * math.sin(cycle_progress * 2 * 3.14159))
         
-        # Update enemy positions based on formation
-        for row in range(self.ROWS):
-            for col in range(self.COLS):
-                enemy = self.grid[row][col]
-                if enemy and not enemy.is_attacking and not enemy.is_entering:
-                    x, y = self.get_position(row, col)
-                    enemy.x = x
-                    enemy.y = y
+        # Update enemy positions: resting in the formation or following their paths
+        self.table.update(delta_time, *self.get_positions())
+
+    def enemies_ready_to_fire(self, current_time, player_pos):
+        """The enemies that fire at the player now, in the order of the enemies group"""
+        return self.table.ready_to_fire(current_time, player_pos[1])
     
     def get_enemy_at(self, row, col):
         """Get enemy at specific grid position"""
@@ -208,7 +224,12 @@ class Formation:
                 if self.grid[row][col]:
                     self.grid[row][col].kill()
                     self.grid[row][col] = None
+        # the enemies that didn't enter yet go back to their pools too
+        for spawn_data in self.enemies_to_spawn:
+            spawn_data['enemy'].kill()
+        self.enemies_to_spawn = []
         self.enemies.empty()
+        self.table.clear()
     
     def trigger_attack_wave(self, player_pos=None):
         """Trigger a wave of enemy attacks"""
@@ -227,51 +248,55 @@ class Formation:
         boss_galagas = [e for e in available_enemies if e.enemy_type == "boss_galaga"]
         
         # Sometimes send a Boss Galaga with escorts
-        if boss_galagas and pygame.time.get_ticks() % 3 == 0:  # 1 in 3 chance
+        if boss_galagas and self.rng.randrange(3) == 0:  # 1 in 3 chance
             boss = boss_galagas[0]
             escorts = self.get_escort_candidates(boss)
             
-            # Create attack paths
+            # Dive at the player
             if not player_pos:
                 player_pos = (c.GAME_SIZE.width // 2, c.STAGE_BOTTOM_Y - 16)  # Default position
-            boss_path = self.pattern_engine.create_dive_pattern("boss_galaga", (boss.x, boss.y), player_pos)
-            boss.start_attack(boss_path)
+            boss.start_dive(player_pos[0])
             
             # Send escorts with the boss
             boss.escort_count = len(escorts)
             for i, escort in enumerate(escorts):
-                escort_path = self.pattern_engine.create_dive_pattern("goei", (escort.x, escort.y), player_pos)
-                escort.start_attack(escort_path)
+                escort.start_dive(player_pos[0])
                 escort.is_escort = True
         else:
             # Regular attack wave - select 1-3 random enemies
-            import random
-            num_attackers = min(random.randint(1, 3), len(available_enemies))
-            attackers = random.sample(available_enemies, num_attackers)
+            num_attackers = min(self.rng.randint(1, 3), len(available_enemies))
+            attackers = self.rng.sample(available_enemies, num_attackers)
             
             for enemy in attackers:
                 if not player_pos:
                     player_pos = (c.GAME_SIZE.width // 2, c.STAGE_BOTTOM_Y - 16)
-                attack_path = self.pattern_engine.create_dive_pattern(
-                    enemy.enemy_type, 
-                    (enemy.x, enemy.y), 
-                    player_pos
-                )
-                enemy.start_attack(attack_path)
+                enemy.start_dive(player_pos[0])
     
     def set_difficulty(self, stage_num):
         """Adjust attack frequency and enemy fire rates based on stage"""
         # Increase attack frequency as stages progress
-        base_frequency = 3000
-        reduction_per_stage = 100
-        self.attack_frequency = max(
-            self.min_attack_frequency,
-            base_frequency - (stage_num * reduction_per_stage)
-        )
+        self.attack_frequency = calc_attack_frequency(self.difficulty, stage_num)
         
-        # Also adjust enemy fire rates
-        fire_rate_reduction = min(50 * stage_num, 500)  # Cap at 500ms reduction
-        for enemy in self.enemies:
+        # Also adjust enemy fire rates, including the enemies still waiting to enter
+        enemies = list(self.enemies) + [spawn_data['enemy'] for spawn_data in self.enemies_to_spawn]
+        for enemy in enemies:
             if enemy.can_fire:
-                base_cooldown = 2000 if enemy.enemy_type == "zako" else 1500
-                enemy.fire_cooldown = max(500, base_cooldown - fire_rate_reduction)
\ No newline at end of file
+                enemy.fire_cooldown = calc_fire_cooldown(self.difficulty, stage_num, enemy.enemy_type)
+
+
+def calc_attack_frequency(difficulty, stage_num):
+    """Milliseconds between attack waves on a stage"""
+    return max(
+        difficulty.min_attack_frequency,
+        difficulty.base_attack_frequency - (stage_num * difficulty.attack_reduction_per_stage)
+    )
+
+
+def calc_fire_cooldown(difficulty, stage_num, enemy_type):
+    """Milliseconds between the shots of an enemy on a stage"""
+    fire_rate_reduction = min(difficulty.fire_reduction_per_stage * stage_num, difficulty.max_fire_reduction)
+    if enemy_type == "zako":
+        base_cooldown = difficulty.zako_fire_cooldown
+    else:
+        base_cooldown = difficulty.goei_fire_cooldown
+    return max(difficulty.min_fire_cooldown, base_cooldown - fire_rate_reduction)
\ No newline at end of file
@@ -4,16 +4,22 @@ import pygame
 
 from . import constants as c
 from .constants import Point
-from .tools import draw_text, grab_sheet
+from .setup import add_frame, get_frame
+from .tools import draw_text
 
 GuiTuple = namedtuple("GuiTuple", "life stage_1 stage_5 stage_10 stage_20 stage_30 stage_50")
 
 BLINK_1UP = 450  # milliseconds
 
+# the parts of the screen the HUD covers when in play state
+TOP_BAND = pygame.Rect(0, 0, c.GAME_SIZE.width, c.STAGE_TOP_Y)
+BOTTOM_BAND = pygame.Rect(0, c.STAGE_BOTTOM_Y, c.GAME_SIZE.width, c.GAME_SIZE.height - c.STAGE_BOTTOM_Y)
+
 # sprite resources for HUD
-ICONS = GuiTuple(grab_sheet(96, 0, 16, 16), grab_sheet(208, 48, 7, 16), grab_sheet(192, 48, 7, 16),
-                 grab_sheet(176, 48, 14, 16), grab_sheet(160, 48, 15, 16), grab_sheet(144, 48, 16, 16),
-                 grab_sheet(128, 48, 16, 16))
+ICONS = GuiTuple(get_frame(add_frame(96, 0, 16, 16)), get_frame(add_frame(208, 48, 7, 16)),
+                 get_frame(add_frame(192, 48, 7, 16)), get_frame(add_frame(176, 48, 14, 16)),
+                 get_frame(add_frame(160, 48, 15, 16)), get_frame(add_frame(144, 48, 16, 16)),
+                 get_frame(add_frame(128, 48, 16, 16)))
 
 
 def draw_lives(screen, num_extra_lives):
@@ -80,9 +86,8 @@ def draw_stage_badges(screen, stage_badges, stage_badge_animation_step):
 def display(screen: pygame.Surface, one_up_score: int, high_score: int, offset_y: int = 0, num_extra_lives=0,
             stage_badges=None, stage_badge_animation_step=None, show_1up=True):
     # clear the top and bottom for the hud when in play state
-    screen.fill(pygame.Color('black'), (0, 0, c.GAME_SIZE.width, c.STAGE_TOP_Y))
-    screen.fill(pygame.Color('black'), (0, c.STAGE_BOTTOM_Y, c.GAME_SIZE.width,
-                                        c.GAME_SIZE.height - c.STAGE_BOTTOM_Y))
+    screen.fill(pygame.Color('black'), TOP_BAND)
+    screen.fill(pygame.Color('black'), BOTTOM_BAND)
 
     # 1UP score
     if show_1up:
@@ -100,3 +105,28 @@ def display(screen: pygame.Surface, one_up_score: int, high_score: int, offset_y
 
     if stage_badges is not None:
         draw_stage_badges(screen, stage_badges, stage_badge_animation_step)
+
+
+class HudLayer:
+    """
+    The HUD of the play state, drawn to its own surface which is only redrawn when what it shows
+    changes, and otherwise copied to the screen as is
+    """
+
+    def __init__(self):
+        self.surface = pygame.Surface(c.GAME_SIZE)
+        self.shown = None  # what the surface shows
+
+    def display(self, screen: pygame.Surface, one_up_score: int, high_score: int, num_extra_lives=0,
+                stage_badges=None, stage_badge_animation_step=None, show_1up=True):
+        """
+        Draw the HUD to the screen, redrawing its surface first if what it shows changed
+        """
+        shown = one_up_score, high_score, num_extra_lives, stage_badges, stage_badge_animation_step, show_1up
+        if shown != self.shown:
+            self.shown = shown
+            display(self.surface, one_up_score, high_score, num_extra_lives=num_extra_lives,
+                    stage_badges=stage_badges, stage_badge_animation_step=stage_badge_animation_step,
+                    show_1up=show_1up)
+        screen.blit(self.surface, TOP_BAND, TOP_BAND)
+        screen.blit(self.surface, BOTTOM_BAND, BOTTOM_BAND)
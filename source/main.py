@@ -1,11 +1,16 @@
 # main.py
 # Author: Izak Halseide
 
+import os
+import time
+
 import pygame
 from . import constants as c
-from .states import GameOver, Demo, Title, ScoreEntry, State
+from .states import GameOver, Demo, Title, ScoreEntry, State, new_persist
 from .play import Play
-from . import setup
+from . import setup, replay, renderer as renderers
+from .score_database import score_db
+from .path_cache import path_cache
 
 
 class Control(object):
@@ -13,25 +18,71 @@ class Control(object):
     Main class for running the game states and window
     """
 
-    def __init__(self, state_dict: dict, initial_state_name: str, persist=None):
+    def __init__(self, state_dict: dict, initial_state_name: str, persist=None, headless=setup.HEADLESS,
+                 max_frames=None, input_source=None, record_path=None, start_time=0, renderer=None):
         # Init
         self.state_dict = state_dict
         self.state_name = initial_state_name
 
         self.clock = pygame.time.Clock()
-        self.fps: int = c.FPS
+        self.fps: int = c.RENDER_FPS
         self.paused = False
         self.running = True
-        self.screen: pygame.Surface = pygame.display.get_surface()
+
+        # Headless runs step the states as fast as possible and never draw
+        self.headless = headless
+        self.max_frames = max_frames
+        self.frame_count = 0  # number of simulation steps so far
+        self.current_time = start_time  # game time in millis., advances by c.SIM_STEP per simulation step
+        self.accumulator = 0  # real time not yet simulated, in millis.
+
+        # Input: the keyboard, or an input source with a next_frame(state) -> (input bitmask, delta time)
+        # method such as a replay.ReplayReader
+        self.input_source = input_source
+        self.start_pressed = False  # a start key went down since the last step
+
+        # Every game played gets recorded to a replay file when record_path is given
+        self.record_path = record_path
+        self.recorder = None
+        self.num_recorded = 0
+
+        # Shows the game surface on the screen, there is none when headless
+        if renderer is None and not headless:
+            renderer = renderers.SoftwareRenderer()
+        self.renderer: renderers.Renderer = renderer
+
         state_class: State.__class__ = self.state_dict[self.state_name]
         self.state: State = state_class(persist=persist)
+        self.state.start_time = self.current_time
+        self.start_recording()
 
     def flip_state(self):
+        self.stop_recording()
         persist = self.state.cleanup()
         self.state_name = self.state.next_state_name
         state_class = self.state_dict[self.state_name]
         self.state = state_class(persist)
-        self.state.state_start_time = pygame.time.get_ticks()
+        self.state.start_time = self.current_time
+        self.start_recording()
+
+    def start_recording(self):
+        """
+        Start recording the input if a game has just started
+        """
+        if self.record_path is None or self.state_name != c.PLAY_STATE:
+            return
+        path = self.record_path
+        if self.num_recorded:
+            # number the files of the following games
+            root, ext = os.path.splitext(path)
+            path = f"{root}-{self.num_recorded + 1}{ext}"
+        self.recorder = replay.ReplayWriter(path, self.state.seed, self.current_time)
+        self.num_recorded += 1
+
+    def stop_recording(self):
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
 
     def poll_events(self):
         for event in pygame.event.get():
@@ -40,55 +91,119 @@ class Control(object):
                 self.running = False
                 self.state.cleanup()
                 return
-            self.state.get_event(event)
+            if self.input_source is None:
+                if event_type == pygame.KEYDOWN and event.key in setup.START_KEYS:
+                    self.start_pressed = True
+                self.state.get_event(event)
         pressed_keys = pygame.key.get_pressed()
         return pressed_keys
 
+    def step(self, pressed_keys):
+        """
+        Advance the game by exactly one simulation step
+        """
+        delta_time = c.SIM_STEP
+        if self.input_source is not None:
+            frame = self.input_source.next_frame(self.state)
+            if frame is None:
+                # Out of input
+                self.running = False
+                return
+            mask, delta_time = frame
+            pressed_keys = replay.InputKeys(mask)
+            if mask & replay.INPUT_START:
+                self.state.get_event(replay.START_EVENT)
+        elif self.recorder is not None:
+            mask = replay.keys_to_mask(pressed_keys, self.start_pressed)
+        self.start_pressed = False
+        if self.recorder is not None:
+            self.recorder.record(mask, delta_time)
+
+        self.current_time += delta_time
+        self.state.current_time = self.current_time  # update the state's time for it
+        self.state.update(delta_time, pressed_keys)
+
+        if self.state.is_done:
+            self.flip_state()
+        elif self.state.is_quit:
+            self.running = False
+
+        self.frame_count += 1
+        if self.max_frames is not None and self.frame_count >= self.max_frames:
+            self.running = False
+
     def main_loop(self):
-        frame_count = 0
         while self.running:
-            # TODO: fix huge delta times when the window gets unfocused or something (if possible?)
-            delta_time = self.clock.tick(self.fps)
-            
-            # Safety check for runaway delta times
-            if delta_time > 1000:  # More than 1 second
-                delta_time = 33  # Force to ~30fps equivalent
-                print(f"WARNING: Large delta time detected: {delta_time}ms, clamping to 33ms")
+            if self.headless:
+                # No frame cap, simulate one step per loop
+                frame_time = c.SIM_STEP
+            else:
+                frame_time = self.clock.tick(self.fps)
+
+                # Don't try to catch up on time lost while the window was dragged, unfocused, etc.
+                if frame_time > c.MAX_FRAME_TIME:
+                    frame_time = c.MAX_FRAME_TIME
+            self.accumulator += frame_time
 
             # Poll events and get the pressed keys from pygame
             pressed_keys = self.poll_events()
             if not self.running:
                 break
 
-            self.state.current_time = pygame.time.get_ticks()  # update the state's time for it
-            self.state.update(delta_time, pressed_keys)
+            # Run as many fixed steps as fit into the real time that has passed
+            while self.accumulator >= c.SIM_STEP and self.running:
+                self.accumulator -= c.SIM_STEP
+                self.step(pressed_keys)
 
-            if self.state.is_done:
-                self.flip_state()
-            elif self.state.is_quit:
-                self.running = False
+            if self.headless:
+                continue
 
-            # Render to game surface at original resolution
-            self.state.display(setup.GAME_SURFACE)
-            
-            # Scale the game surface to the screen
-            pygame.transform.scale(setup.GAME_SURFACE, c.DEFAULT_SCREEN_SIZE, self.screen)
-            pygame.display.flip()
+            self.render()
             
             # Pump events to keep macOS happy
             pygame.event.pump()
 
+        self.stop_recording()
+
+    def render(self):
+        # Render to game surface at original resolution, part way between the last two steps
+        self.state.render_alpha = self.accumulator / c.SIM_STEP
+        self.state.display(setup.GAME_SURFACE)
+        # Scale the game surface to the screen
+        self.renderer.present(setup.GAME_SURFACE)
+
+
+STATE_DICT = {c.TITLE_STATE: Title,
+              c.PLAY_STATE: Play,
+              c.SCORE_ENTRY_STATE: ScoreEntry,
+              c.GAME_OVER_STATE: GameOver,
+              c.DEMO_STATE: Demo}
+
 
-def main():
+def main(max_frames=None, seed=None, record_path=None, replay_path=None, renderer=None):
     # This function begins the main game loop inside the CONTROL class
     initial_state = c.TITLE_STATE
-    state_dict = {c.TITLE_STATE: Title,
-                  c.PLAY_STATE: Play,
-                  c.SCORE_ENTRY_STATE: ScoreEntry,
-                  c.GAME_OVER_STATE: GameOver,
-                  c.DEMO_STATE: Demo}
+    state_dict = STATE_DICT
     # persist = c.Persist(stars=Stars(), scores=[], current_score=16000, one_up_score=0, high_score=100000, \
     # num_shots=132, num_hits=257)
-    persist = None
-    the_galaga = Control(state_dict=state_dict, initial_state_name=initial_state, persist=persist)
+    input_source = None
+    start_time = 0
+    if replay_path is not None:
+        # Play a recorded game back from its start
+        input_source = replay.ReplayReader.load(replay_path)
+        seed = input_source.seed
+        start_time = input_source.start_time
+        initial_state = c.PLAY_STATE
+    persist = new_persist(seed)
+    # Compute the enemy paths of all stages now, or read them from the cache file
+    path_cache.warm()
+    the_galaga = Control(state_dict=state_dict, initial_state_name=initial_state, persist=persist,
+                         max_frames=max_frames, input_source=input_source, record_path=record_path,
+                         start_time=start_time, renderer=renderer)
+    start = time.perf_counter()
     the_galaga.main_loop()
+    score_db.close()
+    if the_galaga.headless:
+        elapsed = time.perf_counter() - start
+        print(f"Simulated {the_galaga.frame_count} frames ({the_galaga.current_time / 1000:.1f} s of game time) "
+              f"in {elapsed:.2f} s, {the_galaga.frame_count / max(elapsed, 1e-9):.0f} frames/s")
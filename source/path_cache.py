@@ -0,0 +1,150 @@
+"""
+Entrance and challenging stage paths, computed once
+
+The path of an enemy only depends on its pattern, its index in its group and, for entrances, its
+formation slot. PathCache keeps every path it computed as a read-only array of int16 (x, y) points
+that all enemies with the same inputs share, and saves them to PATH_CACHE_FILE (or the file named
+by the PATH_CACHE_ENV environment variable) so a new session doesn't compute them either. Nothing is
+read or written until paths are asked for, the game warms the cache when it starts. The file is an
+.npz with:
+
+    tag     hash of the stage file and the code compiling it, the file is ignored when it doesn't match
+    keys    repr of the key of every path
+    ends    index after the last point of every path in points
+    points  the points of all the paths, one after the other
+"""
+import ast
+import hashlib
+import os
+
+import numpy as np
+
+from . import constants as c, stage_data
+from .stage_data import stages
+
+CACHE_VERSION = 1
+
+ENTRANCE, CHALLENGING = 'entrance', 'challenging'
+
+
+def source_tag() -> str:
+    """Hash of the stage file, the module compiling its patterns and the constants they use"""
+    digest = hashlib.sha256(b'%d' % CACHE_VERSION)
+    for filename in (stages.filename, stage_data.__file__, c.__file__):
+        with open(filename, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def compact(path) -> np.ndarray:
+    """A path as a read-only array of int16 (x, y) points"""
+    points = np.array(path, dtype=np.int16).reshape(-1, 2)
+    points.flags.writeable = False
+    return points
+
+
+class PathCache:
+    """
+    Paths by key, computed on first use. The cache file is read on first use too and written by save
+    when paths were added
+    """
+
+    def __init__(self, filename=c.PATH_CACHE_FILE):
+        self.filename = filename
+        self.tag = None
+        self.paths = {}
+        self.is_changed = False
+
+    def load(self):
+        """Take the paths of the cache file if it was made by the current code"""
+        self.tag = source_tag()
+        if self.filename is None or not os.path.exists(self.filename):
+            return
+        try:
+            with np.load(self.filename) as data:
+                if str(data['tag']) != self.tag:
+                    return
+                keys = [ast.literal_eval(key) for key in data['keys'].tolist()]
+                ends = data['ends'].tolist()
+                points = data['points'].astype(np.int16)
+        except (OSError, KeyError, ValueError, SyntaxError) as e:
+            print(f"ERROR loading the path cache {self.filename}, computing the paths again: {e}")
+            return
+        points.flags.writeable = False
+        start = 0
+        for key, end in zip(keys, ends):
+            self.paths[key] = points[start:end]
+            start = end
+
+    def save(self):
+        """Write all paths to the cache file if there are new ones, replacing it in one step"""
+        if self.filename is None or not self.is_changed:
+            return
+        directory = os.path.dirname(self.filename)
+        keys = list(self.paths)
+        paths = [self.paths[key] for key in keys]
+        temp_filename = f"{self.filename}.{os.getpid()}.tmp"
+        try:
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(temp_filename, 'wb') as f:
+                np.savez(f, tag=np.array(self.tag), keys=np.array([repr(key) for key in keys]),
+                         ends=np.cumsum([len(path) for path in paths], dtype=np.int64),
+                         points=np.concatenate(paths) if paths else np.zeros((0, 2), dtype=np.int16))
+            os.replace(temp_filename, self.filename)
+        except OSError as e:
+            print(f"ERROR saving the path cache {self.filename}: {e}")
+            return
+        self.is_changed = False
+
+    def _get(self, key, compute) -> np.ndarray:
+        if self.tag is None:
+            self.load()
+        path = self.paths.get(key)
+        if path is None:
+            path = self.paths[key] = compact(compute())
+            self.is_changed = True
+        return path
+
+    def entrance_path(self, pattern_name, enemy_index, formation_pos) -> np.ndarray:
+        """The entrance path of an enemy as a shared int16 array"""
+        row, col = formation_pos
+        return self._get((ENTRANCE, pattern_name, enemy_index, row, col),
+                         lambda: stages.entrance_paths(pattern_name, [enemy_index], [formation_pos])[0])
+
+    def challenging_path(self, pattern_name, enemy_index) -> np.ndarray:
+        """The challenging stage path of an enemy as a shared int16 array"""
+        return self._get((CHALLENGING, pattern_name, enemy_index),
+                         lambda: stages.challenging_paths(pattern_name, [enemy_index])[0])
+
+    def _add_group(self, keys, make_paths):
+        """Add the paths of a group made at once by its pattern, unless all of them are there"""
+        if self.tag is None:
+            self.load()
+        if all(key in self.paths for key in keys):
+            return
+        for key, path in zip(keys, make_paths()):
+            if key not in self.paths:
+                self.paths[key] = compact(path)
+                self.is_changed = True
+
+    def warm(self):
+        """Compute the paths of all layouts and of the challenging stage a group at a time, and save them"""
+        for name in stages.layouts:
+            for group in stages.layout_groups(name):
+                pattern = group['pattern']
+                slots = [(enemy_data['row'], enemy_data['col']) for enemy_data in group['enemies']]
+                self._add_group([(ENTRANCE, pattern, idx, row, col) for idx, (row, col) in enumerate(slots)],
+                                lambda: stages.entrance_paths(pattern, range(len(slots)), slots))
+        for wave in stages.challenging_waves():
+            by_pattern = {}
+            for enemy_data in wave['enemies']:
+                by_pattern.setdefault(enemy_data['pattern'], []).append(enemy_data['index'])
+            for pattern, indices in by_pattern.items():
+                self._add_group([(CHALLENGING, pattern, idx) for idx in indices],
+                                lambda: stages.challenging_paths(pattern, indices))
+        self.save()
+
+
+# Global instance, main warms it before the game starts
+path_cache = PathCache(os.environ.get(c.PATH_CACHE_ENV, c.PATH_CACHE_FILE) or None)
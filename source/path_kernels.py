@@ -0,0 +1,329 @@
+"""
+The entrance and challenging stage paths as they were written in Python before the stage file, and
+the path generators of PatternEngine, as NumPy kernels that make the paths of a whole group at once
+
+Each kernel computes x and y for all enemies of a group (a column of indices, rows and columns or
+start positions) and all values of t (a row) with the same arithmetic as the scalar loop, so the
+points come out the same after being cut to whole pixels. The results are int64 arrays of shape
+(enemies, steps, 2). check_paths.py compares them with the patterns of resources/stages.json and
+the scalar generators of PatternEngine.
+"""
+import math
+
+import numpy as np
+
+from . import constants as c
+from .patterns import PatternEngine
+
+WIDTH = c.GAME_SIZE.width
+HEIGHT = c.GAME_SIZE.height
+
+
+def path_t(steps: int) -> np.ndarray:
+    """t of every step, i / (steps - 1) like the scalar loops (np.linspace rounds differently)"""
+    return np.arange(steps) / (steps - 1)
+
+
+def points(x, y, num_enemies: int, steps: int) -> np.ndarray:
+    """Paths from the x and y of every enemy and step, cut to whole pixels toward 0 like int()"""
+    path = np.empty((num_enemies, steps, 2), dtype=np.int64)
+    path[:, :, 0] = x
+    path[:, :, 1] = y
+    return path
+
+
+# Entrances of StagePatterns, kernel(t, index, row, col) -> x, y
+
+def _boss_escort_left(t, index, row, col):
+    angle = -math.pi/2 + t * math.pi * 1.5
+    return WIDTH * 0.7 + np.cos(angle) * 80, 100 + np.sin(angle) * 80
+
+
+def _boss_escort_right(t, index, row, col):
+    angle = -math.pi/2 - t * math.pi * 1.5
+    return WIDTH * 0.3 + np.cos(angle) * 80, 100 + np.sin(angle) * 80
+
+
+def _bee_squadron_left(t, index, row, col):
+    start_x = -20 - (index % 4) * 10
+    start_y = -20 - (index // 4) * 15
+    move_t = t / 0.6
+    bank_t = (t - 0.6) / 0.4
+    x = np.where(t < 0.6, start_x + move_t * (WIDTH * 0.4 - start_x),
+                 WIDTH * 0.4 + bank_t * (WIDTH * 0.8 - WIDTH * 0.4))
+    y = np.where(t < 0.6, start_y + move_t * (HEIGHT * 0.6 - start_y), HEIGHT * 0.6 + bank_t * (HEIGHT * 0.2))
+    return x, y
+
+
+def _bee_squadron_right(t, index, row, col):
+    start_x = WIDTH + 20 + (index % 4) * 10
+    start_y = -20 - (index // 4) * 15
+    move_t = t / 0.6
+    bank_t = (t - 0.6) / 0.4
+    x = np.where(t < 0.6, start_x + move_t * (WIDTH * 0.6 - start_x),
+                 WIDTH * 0.6 - bank_t * (WIDTH * 0.6 - WIDTH * 0.2))
+    y = np.where(t < 0.6, start_y + move_t * (HEIGHT * 0.6 - start_y), HEIGHT * 0.6 + bank_t * (HEIGHT * 0.2))
+    return x, y
+
+
+def _butterfly_loop(t, index, row, col):
+    start_x = WIDTH * 0.2
+    start_y = HEIGHT - 50 - index * 20
+    radius = 60
+    up_t = t / 0.3
+    angle = -math.pi/2 + (t - 0.3) / 0.4 * math.pi
+    final_t = (t - 0.7) / 0.3
+    x = np.select([t < 0.3, t < 0.7], [np.broadcast_to(start_x, t.shape), start_x + radius - np.cos(angle) * radius],
+                  start_x + radius * 2 - final_t * radius)
+    y = np.select([t < 0.3, t < 0.7], [start_y - up_t * (start_y - HEIGHT * 0.3), HEIGHT * 0.3 + np.sin(angle) * radius],
+                  HEIGHT * 0.3 - final_t * 50)
+    return x, y
+
+
+def _final_bosses(t, index, row, col):
+    start_x = WIDTH // 2 + (index // 2) * 60 - 30 + ((index % 2) * 30 - 15)
+    start_y = -30
+    return start_x, start_y + t * (HEIGHT * 0.4 - start_y)
+
+
+def _bee_bottom_left(t, index, row, col):
+    start_x = -20 - (index % 4) * 15
+    start_y = HEIGHT + 20 + (index // 4) * 15
+    up_t = t / 0.5
+    angle = math.pi + (t - 0.5) / 0.5 * math.pi
+    x = np.where(t < 0.5, start_x + up_t * 30, 30 + np.cos(angle) * 40)
+    y = np.where(t < 0.5, start_y - up_t * (start_y - 40), 40 + np.sin(angle) * 40)
+    return x, y
+
+
+def _bee_bottom_right(t, index, row, col):
+    start_x = WIDTH + 20 + (index % 4) * 15
+    start_y = HEIGHT + 20 + (index // 4) * 15
+    up_t = t / 0.5
+    angle = -((t - 0.5) / 0.5) * math.pi
+    x = np.where(t < 0.5, start_x - up_t * 30, WIDTH - 30 + np.cos(angle) * 40)
+    y = np.where(t < 0.5, start_y - up_t * (start_y - 40), 40 + np.sin(angle) * 40)
+    return x, y
+
+
+def _butterfly_top_left(t, index, row, col):
+    start_x = -20 - (index % 4) * 10
+    start_y = -20 - (index // 4) * 10
+    down_t = t / 0.4
+    angle = (t - 0.4) / 0.6 * math.pi * 1.5
+    x = np.where(t < 0.4, start_x + down_t * (WIDTH * 0.5 - start_x), WIDTH * 0.5 - np.cos(angle) * 50)
+    y = np.where(t < 0.4, start_y + down_t * (HEIGHT * 0.5 - start_y), HEIGHT * 0.5 - np.sin(angle) * 50)
+    return x, y
+
+
+def _butterfly_top_right(t, index, row, col):
+    start_x = WIDTH + 20 + (index % 4) * 10
+    start_y = -20 - (index // 4) * 10
+    down_t = t / 0.4
+    angle = -((t - 0.4) / 0.6) * math.pi * 1.5
+    x = np.where(t < 0.4, start_x + down_t * (WIDTH * 0.5 - start_x), WIDTH * 0.5 + np.cos(angle) * 50)
+    y = np.where(t < 0.4, start_y + down_t * (HEIGHT * 0.5 - start_y), HEIGHT * 0.5 - np.sin(angle) * 50)
+    return x, y
+
+
+def _bosses_single_file(t, index, row, col):
+    start_x = WIDTH // 2
+    start_y = -30 - index * 20
+    split_t = (t - 0.4) / 0.6
+    x = np.where(t < 0.4, start_x, np.where(index // 2 == 0, start_x - split_t * 60, start_x + split_t * 60))
+    y = np.where(t < 0.4, start_y + t / 0.4 * (HEIGHT * 0.5 - start_y), HEIGHT * 0.5 - split_t * 80)
+    return x, y
+
+
+def _default(t, index, row, col):
+    start_x = WIDTH // 2 + (col - 5) * 20
+    start_y = -30
+    target_x = WIDTH // 2 + (col - 5) * 18
+    target_y = 60 + row * 20
+    return start_x + t * (target_x - start_x), start_y + t * (target_y - start_y)
+
+
+# Kernels and steps by pattern name, others get the default path
+ENTRANCE_KERNELS = {
+    'boss_escort_left': (_boss_escort_left, 90),
+    'boss_escort_right': (_boss_escort_right, 90),
+    'bee_squadron_left': (_bee_squadron_left, 80),
+    'bee_squadron_right': (_bee_squadron_right, 80),
+    'butterfly_loop': (_butterfly_loop, 100),
+    'final_bosses': (_final_bosses, 60),
+    'bee_bottom_left': (_bee_bottom_left, 90),
+    'bee_bottom_right': (_bee_bottom_right, 90),
+    'butterfly_top_left': (_butterfly_top_left, 80),
+    'butterfly_top_right': (_butterfly_top_right, 80),
+    'bosses_single_file': (_bosses_single_file, 90),
+}
+DEFAULT_ENTRANCE = (_default, 60)
+
+
+def entrance_paths(pattern_name, indices, formation_positions) -> np.ndarray:
+    """StagePatterns.create_entrance_path for the enemies of a group, by index and formation (row, col)"""
+    kernel, steps = ENTRANCE_KERNELS.get(pattern_name, DEFAULT_ENTRANCE)
+    index = np.asarray(indices, dtype=np.int64).reshape(-1, 1)
+    row, col = np.asarray(formation_positions, dtype=np.int64).reshape(-1, 2).T[:, :, None]
+    x, y = kernel(path_t(steps), index, row, col)
+    return points(x, y, len(index), steps)
+
+
+# Challenging stage, kernel(t, index) -> x, y
+
+def _left_weave(t, index):
+    start_delay = index * 10
+    down_t = t / 0.3
+    cross_t = (t - 0.3) / 0.2
+    up_t = (t - 0.5) / 0.3
+    exit_t = (t - 0.8) / 0.2
+    segments = [t < 0.3, t < 0.5, t < 0.8]
+    x = np.select(segments, [-20 + down_t * 40, 20 + cross_t * (WIDTH - 40), np.full(t.shape, WIDTH - 20)],
+                  WIDTH - 20 + exit_t * 40)
+    y = np.select(segments, [-20 - start_delay + down_t * (HEIGHT + 40), np.full(t.shape, HEIGHT - 20),
+                             HEIGHT - 20 - up_t * (HEIGHT + 40)], -20 - exit_t * 20)
+    return x, y
+
+
+def _right_weave(t, index):
+    start_delay = index * 10
+    down_t = t / 0.3
+    cross_t = (t - 0.3) / 0.2
+    up_t = (t - 0.5) / 0.3
+    exit_t = (t - 0.8) / 0.2
+    segments = [t < 0.3, t < 0.5, t < 0.8]
+    x = np.select(segments, [WIDTH + 20 - down_t * 40, WIDTH - 20 - cross_t * (WIDTH - 40), np.full(t.shape, 20)],
+                  20 - exit_t * 40)
+    y = np.select(segments, [-20 - start_delay + down_t * (HEIGHT + 40), np.full(t.shape, HEIGHT - 20),
+                             HEIGHT - 20 - up_t * (HEIGHT + 40)], -20 - exit_t * 20)
+    return x, y
+
+
+def _center_loop(t, index, center_x, direction):
+    start_offset = index * 15
+    radius = 60
+    angle = -math.pi/2 + direction * ((t - 0.1) / 0.6 * math.pi * 2)
+    exit_t = (t - 0.7) / 0.3
+    segments = [t < 0.1, t < 0.7]
+    x = np.select(segments, [np.full(t.shape, WIDTH // 2), center_x + np.cos(angle) * radius],
+                  center_x + direction * (exit_t * 20))
+    y = np.select(segments, [-20 - start_offset + t / 0.1 * 40, HEIGHT * 0.3 + np.sin(angle) * radius],
+                  HEIGHT * 0.3 - radius - exit_t * 100)
+    return x, y
+
+
+def _center_loop_left(t, index):
+    return _center_loop(t, index, WIDTH * 0.3, 1)
+
+
+def _center_loop_right(t, index):
+    return _center_loop(t, index, WIDTH * 0.7, -1)
+
+
+def _boss_escort_column(t, index, direction):
+    start_x = WIDTH * (0.3 if direction > 0 else 0.7)
+    start_y = -30 - (index % 4) * 25
+    down_t = t / 0.6
+    x = np.where(t < 0.6, start_x + direction * (down_t * (WIDTH * 0.1)), start_x + direction * (WIDTH * 0.1))
+    y = np.where(t < 0.6, start_y + down_t * (HEIGHT + 60), HEIGHT + 30 + (t - 0.6) / 0.4 * 50)
+    return x, y
+
+
+CHALLENGING_KERNELS = {
+    'left_weave': (_left_weave, 180),
+    'right_weave': (_right_weave, 180),
+    'center_loop_left': (_center_loop_left, 150),
+    'center_loop_right': (_center_loop_right, 150),
+    'boss_escort_left': (lambda t, index: _boss_escort_column(t, index, 1), 120),
+    'boss_escort_right': (lambda t, index: _boss_escort_column(t, index, -1), 120),
+}
+
+
+def challenging_paths(pattern_name, indices) -> np.ndarray:
+    """ChallengingStage.create_challenging_path for the enemies of a group, empty paths for unknown patterns"""
+    index = np.asarray(indices, dtype=np.int64).reshape(-1, 1)
+    if pattern_name not in CHALLENGING_KERNELS:
+        return np.zeros((len(index), 0, 2), dtype=np.int64)
+    kernel, steps = CHALLENGING_KERNELS[pattern_name]
+    x, y = kernel(path_t(steps), index)
+    return points(x, y, len(index), steps)
+
+
+# PatternEngine entrances, kernel(t, index, row, col) -> x, y
+
+def _sweep(t, row, start_x, control_x):
+    start_y = 50 + row * 20
+    control_y = HEIGHT * 0.7
+    x = (1-t)**2 * start_x + 2*(1-t)*t * control_x + t**2 * (WIDTH // 2)
+    y = (1-t)**2 * start_y + 2*(1-t)*t * control_y + t**2 * start_y
+    return x, y
+
+
+def _left_sweep(t, index, row, col):
+    return _sweep(t, row, -20, WIDTH * 0.3)
+
+
+def _right_sweep(t, index, row, col):
+    return _sweep(t, row, WIDTH + 20, WIDTH * 0.7)
+
+
+def _top_cascade(t, index, row, col):
+    start_x = WIDTH // 2 + (col - 5) * 20
+    x = start_x + np.sin(t * math.pi * 2) * 30 * (1 - t)
+    y = -20 + t * (100 + row * 20)
+    return x, y
+
+
+# By PatternEngine pattern type, others cascade from the top
+SWEEP_KERNELS = {
+    PatternEngine.PATTERN_LEFT_SWEEP: (_left_sweep, 60),
+    PatternEngine.PATTERN_RIGHT_SWEEP: (_right_sweep, 60),
+}
+DEFAULT_SWEEP = (_top_cascade, 80)
+
+
+def pattern_entrance_paths(pattern_type, indices, formation_positions) -> np.ndarray:
+    """PatternEngine.create_entrance_path for the enemies of a group"""
+    kernel, steps = SWEEP_KERNELS.get(pattern_type, DEFAULT_SWEEP)
+    index = np.asarray(indices, dtype=np.int64).reshape(-1, 1)
+    row, col = np.asarray(formation_positions, dtype=np.int64).reshape(-1, 2).T[:, :, None]
+    x, y = kernel(path_t(steps), index, row, col)
+    return points(x, y, len(index), steps)
+
+
+# Dives of PatternEngine, kernel(t, start_x, start_y, player_x) -> x, y
+
+def _zako_dive(t, start_x, start_y, player_x):
+    dive_t = t / 0.4
+    angle = (t - 0.4) / 0.6 * math.pi
+    x = np.where(t < 0.4, start_x + (player_x - start_x) * dive_t * 0.5, player_x + np.cos(angle) * 40)
+    y = np.where(t < 0.4, start_y + dive_t * (HEIGHT - start_y - 50), HEIGHT - 50 - np.sin(angle) * 40 * 2)
+    return x, y
+
+
+def _goei_dive(t, start_x, start_y, player_x):
+    angle = t * math.pi * 4
+    return start_x + np.sin(angle) * 50, start_y + t * (HEIGHT - start_y) + np.sin(angle * 2) * 20
+
+
+def _boss_dive(t, start_x, start_y, player_x):
+    angle = t * math.pi * 1.5
+    center_x = (start_x + player_x) / 2
+    return center_x + np.cos(angle + math.pi/2) * 60, start_y + t * (HEIGHT * 0.7 - start_y)
+
+
+DIVE_KERNELS = {
+    'zako': (_zako_dive, 120),
+    'goei': (_goei_dive, 150),
+    'boss_galaga': (_boss_dive, 100),
+}
+
+
+def dive_paths(enemy_type, start_positions, player_x) -> np.ndarray:
+    """PatternEngine.create_dive_pattern for enemies of one type starting at start_positions (x, y)"""
+    start_x, start_y = np.asarray(start_positions, dtype=np.int64).reshape(-1, 2).T[:, :, None]
+    if enemy_type not in DIVE_KERNELS:
+        return np.zeros((len(start_x), 0, 2), dtype=np.int64)
+    kernel, steps = DIVE_KERNELS[enemy_type]
+    x, y = kernel(path_t(steps), start_x, start_y, player_x)
+    return points(x, y, len(start_x), steps)
@@ -1,8 +1,74 @@
 import pygame
 import math
+import numpy as np
 from . import constants as c
 
 
+class DiveTemplate:
+    """
+    A dive in local coordinates, made once per enemy type. Every dive of the type is the template
+    moved to where the enemy starts and stretched toward its target:
+
+        x = base x + start_weight x * start x + target_weight * target x
+        y = base y + start_weight y * start y
+    """
+
+    def __init__(self, base, start_weight, target_weight):
+        self.base = base  # (steps, 2)
+        self.start_weight = start_weight  # (steps, 2)
+        self.target_weight = target_weight  # (steps,)
+        self.steps = len(base)
+
+    def apply(self, starts, target_x) -> np.ndarray:
+        """The dives from starts (n, 2) toward target_x (n), (n, steps, 2) points with sub-pixel precision"""
+        points = self.base + self.start_weight * starts[:, None, :]
+        points[:, :, 0] += self.target_weight * target_x[:, None]
+        return points
+
+
+def _dive_template(steps, base_x, start_weight_x, target_weight, base_y, start_weight_y) -> DiveTemplate:
+    base = np.empty((steps, 2))
+    base[:, 0] = base_x
+    base[:, 1] = base_y
+    start_weight = np.empty((steps, 2))
+    start_weight[:, 0] = start_weight_x
+    start_weight[:, 1] = start_weight_y
+    return DiveTemplate(base, start_weight, np.broadcast_to(target_weight, steps).copy())
+
+
+def _create_dive_templates() -> dict:
+    """The dives of PatternEngine._create_*_dive as templates, by enemy type"""
+    templates = {}
+
+    # Zako: down toward the player, then loop back up around it
+    t = np.arange(120) / 119
+    dive = t < 0.4
+    dive_t = t / 0.4
+    angle = (t - 0.4) / 0.6 * math.pi
+    templates["zako"] = _dive_template(
+        120,
+        np.where(dive, 0.0, np.cos(angle) * 40), np.where(dive, 1 - dive_t * 0.5, 0.0),
+        np.where(dive, dive_t * 0.5, 1.0),
+        np.where(dive, dive_t * (c.GAME_SIZE.height - 50), c.GAME_SIZE.height - 50 - np.sin(angle) * 80),
+        np.where(dive, 1 - dive_t, 0.0))
+
+    # Goei: figure-8 down to the bottom
+    t = np.arange(150) / 149
+    angle = t * math.pi * 4
+    templates["goei"] = _dive_template(150, np.sin(angle) * 50, 1.0, 0.0,
+                                       t * c.GAME_SIZE.height + np.sin(angle * 2) * 20, 1 - t)
+
+    # Boss Galaga: wide loop between its start and the player
+    t = np.arange(100) / 99
+    angle = t * math.pi * 1.5
+    templates["boss_galaga"] = _dive_template(100, np.cos(angle + math.pi/2) * 60, 0.5, 0.5,
+                                              t * (c.GAME_SIZE.height * 0.7), 1 - t)
+    return templates
+
+
+DIVE_TEMPLATES = _create_dive_templates()
+
+
 class PatternEngine:
     """Manages enemy entrance and attack patterns"""
     
@@ -11,8 +77,9 @@ class PatternEngine:
     PATTERN_RIGHT_SWEEP = 1
     PATTERN_TOP_CASCADE = 2
     
-    def __init__(self):
+    def __init__(self, rng):
         self.active_patterns = []
+        self.rng = rng  # Random number generator of the game session
         
     def get_entrance_pattern(self, stage_num):
         """Determine which entrance pattern to use based on stage number"""
@@ -109,7 +176,10 @@ class PatternEngine:
         return path
     
     def create_dive_pattern(self, enemy_type, start_pos, player_pos):
-        """Create a diving attack pattern"""
+        """
+        Create a diving attack pattern. Enemies dive along DIVE_TEMPLATES, this is the
+        reference they are checked against
+        """
         path = []
         start_x, start_y = start_pos
         player_x, player_y = player_pos
@@ -1,5 +1,4 @@
 import pygame
-from pygame.math import Vector2
 from . import constants as c, tools, setup, hud, scoring, sprites
 from .setup import play_sound, stop_sounds
 from .stars import StarField
@@ -8,6 +7,7 @@ from .states import State, draw_mid_text
 from .formation import Formation
 from .challenging_stage import ChallengingStage
 from .score_database import score_db
+from .path_cache import path_cache
 
 # Play state timings
 STAGE_DURATION = 1600
@@ -17,6 +17,9 @@ START_NOISE_WAIT = 0
 START_DURATION = START_NOISE_WAIT + INTRO_MUSIC_DURATION
 STAGE_BADGE_DURATION = 200
 FIRE_COOLDOWN = 200
+PLAYER_MISSILE_SPEED = 0.350  # pixels per millis.
+ENEMY_MISSILE_SPEED = 0.15
+PLAYER_MISSILE_VELOCITY = 0, -PLAYER_MISSILE_SPEED
 GAME_OVER_DURATION = 3000
 
 # game area boundary
@@ -25,13 +28,19 @@ STAGE_BOUNDS = pygame.Rect(0, c.STAGE_TOP_Y, c.GAME_SIZE.width, c.STAGE_BOTTOM_Y
 
 class Play(State):
 
-    def __init__(self, persist):
+    def __init__(self, persist, is_demo=False):
         # do the things all states must do...
         State.__init__(self, persist)
+        self.is_demo = is_demo  # played back by the demo state, kept out of the scores
 
         # Setup stars
         self.persist.stars.moving = False
 
+        # Every game re-seeds the session's random number generator, so a game can be replayed from its seed
+        self.seed = self.persist.seed
+        self.rng = self.persist.rng
+        self.rng.seed(self.seed)
+
         # Score
         self.score = 0
         self.one_up_score = self.persist.one_up_score
@@ -62,7 +71,7 @@ class Play(State):
         self.explosions = pygame.sprite.Group()
 
         # enemies and level
-        self.formation = Formation()
+        self.formation = Formation(self.rng, self.persist.difficulty)
         self.enemies = self.formation.enemies  # Reference to formation's enemy group
 
         # timers:
@@ -83,6 +92,7 @@ class Play(State):
         self.is_ready = False
         self.should_reform_enemies = False
         self.should_show_game_over = False
+        self.is_game_over = False  # out of lives, the game goes in the history when the state ends
         self.should_advance_stage = False
         
         # Challenging stage tracking
@@ -92,11 +102,24 @@ class Play(State):
         self.challenging_stage_waves = []
         self.challenging_stage_timer = 0
 
+        # HUD, redrawn only when it changes
+        self.hud = hud.HudLayer()
+
+    def release_sprites(self):
+        """
+        Kill the sprites of the game, which puts them back in the sprite pools for the next game
+        """
+        for group in self.missiles, self.enemy_missiles, self.explosions, sprites.ScoreText.text_sprites:
+            for sprite in group.sprites():
+                sprite.kill()
+        self.formation.clear()
+
     def cleanup(self):
-        # Check if score qualifies for high score list
-        if score_db.is_high_score(self.score):
-            # Will need to transition to score entry state
-            pass
+        self.release_sprites()
+        # A game left by closing the window isn't finished and isn't recorded
+        if self.is_game_over:
+            score_db.record_game(self.score, self.stage_num, self.num_shots, self.num_hits, seed=self.seed)
+        score_db.flush()
         return c.Persist(stars=self.persist.stars,
                          scores=self.persist.scores,
                          current_score=self.score,
@@ -104,7 +127,10 @@ class Play(State):
                          high_score=self.high_score,
                          num_shots=self.num_shots,
                          num_hits=self.num_hits,
-                         stage_num=self.stage_num)
+                         stage_num=self.stage_num,
+                         rng=self.rng,
+                         seed=self.rng.getrandbits(32),
+                         difficulty=self.persist.difficulty)
 
     def get_event(self, event):
         if event.type == pygame.KEYDOWN:
@@ -123,7 +149,9 @@ class Play(State):
 
             elif keypress == pygame.K_r:
                 # TODO: (DEBUG) reset the state when [R] is pressed
-                self.__init__(self.persist)
+                # (the sprites of this game go back to the pools first, __init__ makes new groups)
+                self.release_sprites()
+                self.__init__(self.persist, self.is_demo)
 
             elif keypress == pygame.K_k:
                 # TODO: (DEBUG) kill the player when [K] is pressed
@@ -132,10 +160,9 @@ class Play(State):
     def fighter_shoots(self):
         play_sound('fighter_fire')
         # v is multiplied by speed in the missile class
-        v = Vector2(0, -0.350)
         x = self.player.rect.centerx
         y = self.player.rect.top + 10
-        m = sprites.Missile(x, y, v, is_enemy=False)
+        m = sprites.missile_pool.acquire(x, y, PLAYER_MISSILE_VELOCITY, False)
         self.missiles.add(m)
         self.num_shots += 1
 
@@ -145,7 +172,7 @@ class Play(State):
         theme_sound = setup.get_sfx("theme")
         if theme_sound:
             theme_sound.play()
-        else:
+        elif not setup.HEADLESS:
             print("WARNING: theme.ogg not found or failed to load")
         self.has_started_intro_music = True
 
@@ -164,7 +191,17 @@ class Play(State):
             self.stage_badge_animation_timer = 0
             play_sound('stage_award')
 
+    def save_positions(self):
+        """Remember where the moving sprites are before they move, for interpolated drawing"""
+        if self.player:
+            self.player.save_position()
+        for sprite_group in (self.enemies, self.missiles, self.enemy_missiles):
+            for sprite in sprite_group:
+                sprite.save_position()
+
     def update(self, delta_time, keys):
+        self.save_positions()
+
         # More important things to update
         self.update_timers(delta_time)
         self.update_player(delta_time, keys)
@@ -189,19 +226,19 @@ class Play(State):
         if self.player and self.is_player_alive:
             player_pos = (self.player.x, self.player.y)
         
-        # Update formation movement
+        # Update formation movement, which moves all enemies
         self.formation.update(delta_time, player_pos)
         
-        # Update individual enemies and check for firing
+        # Animate the enemies and check for firing
         if self.enemies:
-            self.enemies.update(delta_time, self.animation_flag)
+            if self.animation_flag:
+                self.enemies.update(delta_time, self.animation_flag)
             
             # Check if any enemies should fire (only if ready, not reforming)
             if player_pos and self.is_ready and not self.should_reform_enemies:
-                for enemy in self.enemies:
-                    if enemy.should_fire(self.current_time, player_pos):
-                        self.spawn_enemy_missile(enemy, player_pos)
-                        enemy.fire(self.current_time)
+                for enemy in self.formation.enemies_ready_to_fire(self.current_time, player_pos):
+                    self.spawn_enemy_missile(enemy, player_pos)
+                    enemy.fire(self.current_time)
         
         # Check if all enemies destroyed - advance to next stage
         if self.is_ready and self.formation.is_empty() and not self.should_show_game_over:
@@ -210,7 +247,7 @@ class Play(State):
                 self.advance_to_next_stage()
 
     def add_explosion(self, x, y, is_player_type=False):
-        self.explosions.add(sprites.Explosion(x, y, is_player_type=is_player_type))
+        self.explosions.add(sprites.explosion_pool.acquire(x, y, is_player_type))
 
     def update_missiles(self, delta_time):
         # Update player missiles
@@ -245,11 +282,12 @@ class Play(State):
                     points = enemy.get_points()
                     if points >= 800:
                         # Show score for high value targets
-                        sprites.ScoreText(enemy.x, enemy.y, points)
+                        sprites.score_text_pool.acquire(enemy.x, enemy.y, points)
                     self.score += points
                     self.high_score = max(self.score, self.high_score)
                     # Update score database
-                    score_db.update_session_high(self.score)
+                    if not self.is_demo:
+                        score_db.update_session_high(self.score)
                     break
             
             # Remove missiles that go off screen
@@ -280,12 +318,11 @@ class Play(State):
         
         if distance > 0:
             # Normalize direction and set velocity
-            missile_speed = 0.15
-            vx = (dx / distance) * missile_speed
-            vy = (dy / distance) * missile_speed
+            vx = (dx / distance) * ENEMY_MISSILE_SPEED
+            vy = (dy / distance) * ENEMY_MISSILE_SPEED
             
             # Create missile
-            missile = sprites.Missile(enemy.x, enemy.y, Vector2(vx, vy), is_enemy=True)
+            missile = sprites.missile_pool.acquire(enemy.x, enemy.y, (vx, vy), True)
             self.enemy_missiles.add(missile)
             
             # Play sound
@@ -382,6 +419,10 @@ class Play(State):
 
     def next_stage(self):
         self.stage_num += 1
+        sprites.clear_flip_cache()
+        # Stage transitions are a quiet moment to persist the session high score and new paths
+        score_db.flush()
+        path_cache.save()
         
         # Check if this is a challenging stage
         self.is_challenging_stage = ChallengingStage.is_challenging_stage(self.stage_num)
@@ -412,8 +453,8 @@ class Play(State):
         self.blocking_timer = 0  # Will be incremented by update_timers
         play_sound("stage_award")
         # Clear any remaining missiles
-        self.missiles.empty()
-        self.enemy_missiles.empty()
+        for missile in self.missiles.sprites() + self.enemy_missiles.sprites():
+            missile.kill()
         # After delay, start next stage
         self.should_advance_stage = True
 
@@ -431,6 +472,7 @@ class Play(State):
 
     def show_game_over(self):
         self.should_show_game_over = True
+        self.is_game_over = True
 
     def done_showing_game_over(self):
         self.should_show_game_over = False
@@ -438,33 +480,26 @@ class Play(State):
         self.next_state_name = c.GAME_OVER_STATE
 
     def display(self, screen: pygame.Surface):
+        alpha = self.render_alpha
         # clear screen
         screen.fill(c.BLACK)
         # stars
-        self.persist.stars.display(screen)
-        # draw enemies
-        for enemy in self.enemies:
-            enemy.display(screen)
-        # draw player
-        if self.is_player_alive:
-            self.player.display(screen)
-        # draw bullets
-        for m in self.missiles:
-            m.display(screen)
-        # draw enemy missiles
-        for m in self.enemy_missiles:
-            m.display(screen)
-        # draw explosions
-        for x in self.explosions:
-            x.display(screen)
-        # display text sprites
-        for ts in sprites.ScoreText.text_sprites:
-            ts.display(screen)
+        self.persist.stars.display(screen, alpha)
+        # draw the sprites one layer at a time: enemies, player, bullets, enemy missiles, explosions, text sprites
+        layers = ((self.enemies, alpha),
+                  ((self.player,) if self.is_player_alive else (), alpha),
+                  (self.missiles, alpha),
+                  (self.enemy_missiles, alpha),
+                  (self.explosions, 1.0),
+                  (sprites.ScoreText.text_sprites, 1.0))
+        for layer_sprites, layer_alpha in layers:
+            screen.blits(sprites.draw_list(layer_sprites, layer_alpha), doreturn=False)
         # draw HUD
         self.show_state(screen)
-        hud.display(screen, one_up_score=self.score, high_score=self.high_score,
-                    offset_y=0, num_extra_lives=self.extra_lives, stage_badges=self.stage_badges,
-                    stage_badge_animation_step=self.stage_badge_animation_step, show_1up=self.show_1up_text)
+        self.hud.display(screen, one_up_score=self.score, high_score=self.high_score,
+                         num_extra_lives=self.extra_lives, stage_badges=self.stage_badges,
+                         stage_badge_animation_step=self.stage_badge_animation_step,
+                         show_1up=self.show_1up_text)
 
     def show_state(self, screen):
         if self.is_starting:
@@ -0,0 +1,110 @@
+"""
+Renderer backends: they show the game surface, drawn at the original resolution, scaled up on the screen
+
+SoftwareRenderer scales the game surface onto the display surface with pygame.transform.scale and
+works with any video driver, including SDL's dummy driver. TextureRenderer uploads the game surface to
+a texture once per frame and lets SDL scale it with pygame._sdl2's Renderer, with vsync if wanted.
+Both scale by a whole number and center the picture, so pixels stay square and sharp in fullscreen.
+"""
+import pygame
+
+from . import constants as c
+
+
+def fit_rect(screen_size, scale: int = None) -> pygame.Rect:
+    """
+    Where the scaled game goes on a screen: centered, scaled by scale or by the largest whole number
+    that fits when scale is None
+    """
+    screen_width, screen_height = screen_size
+    if scale is None:
+        scale = max(1, min(screen_width // c.GAME_SIZE.width, screen_height // c.GAME_SIZE.height))
+    rect = pygame.Rect(0, 0, c.GAME_SIZE.width * scale, c.GAME_SIZE.height * scale)
+    rect.center = screen_width // 2, screen_height // 2
+    return rect
+
+
+class Renderer:
+    """
+    Base class for renderer backends
+    """
+
+    def __init__(self, scale=c.DISPLAY_SCALE, fullscreen=False):
+        self.scale = scale
+        self.fullscreen = fullscreen
+
+    def present(self, surface: pygame.Surface):
+        """
+        Show the game surface
+        """
+        raise NotImplementedError()
+
+
+class SoftwareRenderer(Renderer):
+    """
+    Scales the game surface onto the display surface in software. Vsync isn't available for a plain
+    display surface
+    """
+
+    def __init__(self, scale=c.DISPLAY_SCALE, fullscreen=False):
+        super(SoftwareRenderer, self).__init__(scale, fullscreen)
+        if fullscreen:
+            self.screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+            self.rect = fit_rect(self.screen.get_size())
+            self.scale = self.rect.width // c.GAME_SIZE.width
+        else:
+            self.screen = pygame.display.set_mode((c.GAME_SIZE.width * scale, c.GAME_SIZE.height * scale))
+            self.rect = self.screen.get_rect()
+        pygame.display.set_caption(c.TITLE)
+        # the part of the screen the game is scaled to
+        self.view = self.screen.subsurface(self.rect)
+
+    def present(self, surface: pygame.Surface):
+        pygame.transform.scale(surface, self.rect.size, self.view)
+        pygame.display.flip()
+
+
+class TextureRenderer(Renderer):
+    """
+    Uploads the game surface to a streaming texture and has SDL scale it to the window, which can use
+    the GPU. It draws to the window of pygame.display, so the game has one window and still has a
+    display surface to convert images to. A window with a software display surface can't get an SDL
+    renderer, so the display is opened again with SCALED, which gives it one, and the game takes it over
+    """
+
+    def __init__(self, scale=c.DISPLAY_SCALE, fullscreen=False, vsync=False):
+        super(TextureRenderer, self).__init__(scale, fullscreen)
+        from pygame._sdl2 import video
+
+        # the window of setup has a software display surface
+        pygame.display.quit()
+        pygame.display.init()
+        flags = pygame.SCALED | (pygame.FULLSCREEN if fullscreen else 0)
+        pygame.display.set_mode((c.GAME_SIZE.width * scale, c.GAME_SIZE.height * scale), flags, vsync=int(vsync))
+        pygame.display.set_caption(c.TITLE)
+        self.window = video.Window.from_display_module()
+        self.renderer = video.Renderer.from_window(self.window)
+        # draw in window pixels, fit_rect does the scaling
+        self.renderer.logical_size = (0, 0)
+        self.renderer.draw_color = pygame.Color('black')
+        self.texture = video.Texture(self.renderer, c.GAME_SIZE, streaming=True)
+        self.rect = fit_rect(self.window.size, None if fullscreen else scale)
+        self.scale = self.rect.width // c.GAME_SIZE.width
+
+    def present(self, surface: pygame.Surface):
+        self.texture.update(surface)
+        self.renderer.clear()
+        self.texture.draw(dstrect=self.rect)
+        self.renderer.present()
+
+
+def create_renderer(name=c.SOFTWARE_RENDERER, scale=c.DISPLAY_SCALE, fullscreen=False, vsync=False) -> Renderer:
+    """
+    Create a renderer backend by name, falling back to software rendering if SDL's renderer isn't available
+    """
+    if name == c.TEXTURE_RENDERER:
+        try:
+            return TextureRenderer(scale, fullscreen, vsync)
+        except (ImportError, pygame.error, RuntimeError) as e:  # pygame._sdl2 raises RuntimeErrors
+            print(f"ERROR creating the {c.TEXTURE_RENDERER} renderer, using software rendering: {e}")
+    return SoftwareRenderer(scale, fullscreen)
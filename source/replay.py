@@ -0,0 +1,258 @@
+"""
+Recording and playback of the input that drives a game
+
+A replay holds, for every simulation step of one game, which of the game's inputs
+(left, right, fire, start) were held as a bitmask, and how long the step was.
+Together with the game's seed this is enough to play the game again exactly.
+
+File layout, all integers are unsigned LEB128 varints unless noted:
+    header:   b'GRPL', version byte, seed, game time when the game started
+    runs:     number of steps, input bitmask byte, step time as a zig-zag delta to the previous run's
+    index:    number of keyframes, then (step, byte offset) pairs, each a delta to the previous keyframe
+    trailer:  index offset and number of steps as little-endian uint32, b'GIDX'
+
+A keyframe starts every KEYFRAME_INTERVAL steps. A run always starts there and its
+step time is stored as a delta to 0, so decoding can begin at any keyframe.
+"""
+import bisect
+import os
+import struct
+
+import pygame
+
+from . import constants as c
+
+# Input bits
+INPUT_LEFT = 1
+INPUT_RIGHT = 2
+INPUT_FIRE = 4
+INPUT_START = 8
+
+MAGIC = b'GRPL'
+INDEX_MAGIC = b'GIDX'
+VERSION = 1
+KEYFRAME_INTERVAL = 256  # steps
+TRAILER = struct.Struct('<II4s')
+
+# What a recorded start press is played back as
+START_EVENT = pygame.event.Event(pygame.KEYDOWN, key=pygame.K_RETURN)
+
+
+def keys_to_mask(pressed_keys, start_pressed=False) -> int:
+    """
+    Pack the pressed keys the game uses into an input bitmask
+    """
+    mask = INPUT_START if start_pressed else 0
+    if pressed_keys[pygame.K_LEFT]:
+        mask |= INPUT_LEFT
+    if pressed_keys[pygame.K_RIGHT]:
+        mask |= INPUT_RIGHT
+    if pressed_keys[pygame.K_SPACE]:
+        mask |= INPUT_FIRE
+    return mask
+
+
+class InputKeys:
+    """
+    Stands in for pygame.key.get_pressed(), answering from an input bitmask
+    """
+
+    __slots__ = ('mask',)
+
+    KEY_BITS = {pygame.K_LEFT: INPUT_LEFT, pygame.K_RIGHT: INPUT_RIGHT, pygame.K_SPACE: INPUT_FIRE}
+
+    def __init__(self, mask: int):
+        self.mask = mask
+
+    def __getitem__(self, key) -> bool:
+        return bool(self.mask & self.KEY_BITS.get(key, 0))
+
+
+def write_varint(buffer: bytearray, value: int):
+    while value > 0x7f:
+        buffer.append((value & 0x7f) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def read_varint(data: bytes, pos: int) -> tuple:
+    """
+    Return the varint at pos and the position after it
+    """
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def zigzag(n: int) -> int:
+    return n * 2 if n >= 0 else -n * 2 - 1
+
+
+def unzigzag(n: int) -> int:
+    return n // 2 if n % 2 == 0 else -(n + 1) // 2
+
+
+class ReplayWriter:
+    """
+    Collects the input of a game step by step and writes it out as a replay file on close()
+    """
+
+    def __init__(self, path: str, seed: int, start_time: int = 0):
+        self.path = path
+        self.buffer = bytearray(MAGIC)
+        self.buffer.append(VERSION)
+        write_varint(self.buffer, seed)
+        write_varint(self.buffer, start_time)
+
+        self.keyframes = []  # (step, byte offset)
+        self.step_count = 0
+
+        # The run of identical steps being collected
+        self.run_length = 0
+        self.run_mask = 0
+        self.run_delta = 0
+        self.last_delta = 0
+
+    def record(self, mask: int, delta_time: int):
+        if self.step_count % KEYFRAME_INTERVAL == 0:
+            self._end_run()
+            self.keyframes.append((self.step_count, len(self.buffer)))
+            self.last_delta = 0
+        elif mask != self.run_mask or delta_time != self.run_delta:
+            self._end_run()
+        if self.run_length == 0:
+            self.run_mask = mask
+            self.run_delta = delta_time
+        self.run_length += 1
+        self.step_count += 1
+
+    def _end_run(self):
+        if self.run_length == 0:
+            return
+        write_varint(self.buffer, self.run_length)
+        self.buffer.append(self.run_mask)
+        write_varint(self.buffer, zigzag(self.run_delta - self.last_delta))
+        self.last_delta = self.run_delta
+        self.run_length = 0
+
+    def close(self):
+        self._end_run()
+        index_offset = len(self.buffer)
+        write_varint(self.buffer, len(self.keyframes))
+        last_step = last_offset = 0
+        for step, offset in self.keyframes:
+            write_varint(self.buffer, step - last_step)
+            write_varint(self.buffer, offset - last_offset)
+            last_step, last_offset = step, offset
+        self.buffer += TRAILER.pack(index_offset, self.step_count, INDEX_MAGIC)
+        with open(self.path, 'wb') as f:
+            f.write(self.buffer)
+
+
+class ReplayReader:
+    """
+    Plays a replay back one step at a time, can be used as a Control's input source
+    """
+
+    def __init__(self, data: bytes):
+        if len(data) < len(MAGIC) + 1 + TRAILER.size or data[:len(MAGIC)] != MAGIC or data[len(MAGIC)] != VERSION:
+            raise ValueError("Not a replay file (or an unsupported version)")
+        pos = len(MAGIC) + 1
+        self.seed, pos = read_varint(data, pos)
+        self.start_time, pos = read_varint(data, pos)
+
+        index_offset, self.step_count, index_magic = TRAILER.unpack_from(data, len(data) - TRAILER.size)
+        if index_magic != INDEX_MAGIC:
+            raise ValueError("Replay file is truncated")
+
+        # Keyframe index
+        self.keyframe_steps = []
+        self.keyframe_offsets = []
+        num_keyframes, index_pos = read_varint(data, index_offset)
+        step = offset = 0
+        for _ in range(num_keyframes):
+            step_delta, index_pos = read_varint(data, index_pos)
+            offset_delta, index_pos = read_varint(data, index_pos)
+            step += step_delta
+            offset += offset_delta
+            self.keyframe_steps.append(step)
+            self.keyframe_offsets.append(offset)
+
+        self.data = data
+        self.end = index_offset
+        self.seek(0)
+
+    @classmethod
+    def load(cls, path: str) -> 'ReplayReader':
+        with open(path, 'rb') as f:
+            return cls(f.read())
+
+    def __len__(self):
+        return self.step_count
+
+    def seek(self, step: int):
+        """
+        Continue playback from the given step
+        """
+        i = bisect.bisect_right(self.keyframe_steps, step) - 1
+        if i < 0:
+            self.pos = self.end
+            self.step = 0
+        else:
+            self.pos = self.keyframe_offsets[i]
+            self.step = self.keyframe_steps[i]
+        self.next_keyframe = i + 1
+        self.run_left = 0
+        self.run_mask = 0
+        self.run_delta = 0
+        # skip whole runs, then single steps
+        while self.step < step and self._next_run():
+            skip = min(self.run_left, step - self.step)
+            self.run_left -= skip
+            self.step += skip
+
+    def _next_run(self) -> bool:
+        if self.run_left:
+            return True
+        if self.pos >= self.end:
+            return False
+        if self.next_keyframe < len(self.keyframe_offsets) and self.pos == self.keyframe_offsets[self.next_keyframe]:
+            self.run_delta = 0
+            self.next_keyframe += 1
+        self.run_left, self.pos = read_varint(self.data, self.pos)
+        self.run_mask = self.data[self.pos]
+        delta, self.pos = read_varint(self.data, self.pos + 1)
+        self.run_delta += unzigzag(delta)
+        return True
+
+    def next_frame(self, state=None):
+        """
+        Return the (input bitmask, delta time) of the next step, or None at the end of the replay
+        """
+        if not self._next_run():
+            return None
+        self.run_left -= 1
+        self.step += 1
+        return self.run_mask, self.run_delta
+
+
+def has_demo() -> bool:
+    return os.path.exists(c.DEMO_REPLAY_FILE)
+
+
+def load_demo():
+    """
+    The replay shown in the demo state, if there is one
+    """
+    if not has_demo():
+        return None
+    try:
+        return ReplayReader.load(c.DEMO_REPLAY_FILE)
+    except (IOError, ValueError, IndexError, struct.error) as e:
+        print(f"Error loading demo replay: {e}")
+        return None
@@ -1,127 +1,276 @@
 """
 Persistent score database for Galaga
-Stores high scores across game sessions
+Stores every finished game across sessions in an append-only SQLite table
+
+Writes are deferred: mutations only queue rows and mark the database dirty, and a
+background flusher thread commits them when asked to (stage transitions, state
+cleanup and shutdown). Each flush is one SQLite transaction, so a power cut
+leaves either the old or the new history on disk, never a half-written one.
 """
+import atexit
 import json
 import os
-from datetime import datetime
+import sqlite3
+import threading
+from collections import Counter
+from datetime import datetime, date, timedelta
 from typing import List, Dict
-from . import constants as c
+from . import constants as c, scoring
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL DEFAULT '',
+    score INTEGER NOT NULL,
+    stage INTEGER NOT NULL DEFAULT 0,
+    shots INTEGER NOT NULL DEFAULT 0,
+    hits INTEGER NOT NULL DEFAULT 0,
+    date TEXT NOT NULL,
+    seed INTEGER
+);
+CREATE INDEX IF NOT EXISTS games_by_score ON games (score DESC);
+CREATE INDEX IF NOT EXISTS games_by_stage ON games (stage, score DESC);
+CREATE INDEX IF NOT EXISTS games_by_date ON games (date);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value
+);
+"""
+
+GAME_COLUMNS = ('name', 'score', 'stage', 'shots', 'hits', 'date', 'seed')
+SELECT_GAMES = "SELECT name, score, stage, shots, hits, date, seed FROM games"
+INSERT_GAME = "INSERT INTO games (name, score, stage, shots, hits, date, seed) VALUES (?, ?, ?, ?, ?, ?, ?)"
+# Names the last unnamed game with a score and stage
+NAME_GAME = ("UPDATE games SET name = ? WHERE id = "
+             "(SELECT id FROM games WHERE name = '' AND score = ? AND stage = ? ORDER BY id DESC LIMIT 1)")
+
+DEFAULT_SCORES = (
+    ('AAA', 30000, 5), ('BBB', 20000, 4), ('CCC', 10000, 3), ('DDD', 9000, 2), ('EEE', 8000, 2)
+)
+DEFAULT_DATE = '2024-01-01'
 
 
 class ScoreDatabase:
-    """Manages persistent high scores"""
+    """Manages the persistent game history and the high scores derived from it"""
     
-    def __init__(self, filename="galaga_scores.json"):
+    def __init__(self, filename=c.SCORE_DB_FILE):
         self.filename = filename
-        self.scores = []
         self.current_session_high = 0
+        
+        # Write-behind state: games and the session high waiting for the next flush
+        self._lock = threading.Lock()
+        self._pending_games = []
+        self._pending_names = []
+        self._dirty = False
+        self._flush_requested = threading.Event()
+        self._flusher = None
+        self._closed = False
+        
+        # The connection is shared with the flusher thread and has its own lock, so
+        # marking the database dirty never waits on a commit in progress
+        self._db_lock = threading.Lock()
+        self._db = sqlite3.connect(filename, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
         self.load_scores()
     
     def load_scores(self):
-        """Load scores from JSON file"""
-        if os.path.exists(self.filename):
+        """Open the history, importing the old score files the first time"""
+        with self._db_lock, self._db:
+            if self.filename != ':memory:':
+                self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(SCHEMA)
+            self._migrate()
+            if self._get_meta('imported_legacy') is None:
+                self._import_legacy_scores()
+                self._set_meta('imported_legacy', datetime.now().isoformat(timespec='seconds'))
+            self.current_session_high = self._get_meta('session_high') or 0
+    
+    def _migrate(self):
+        """Add the columns that databases from older versions are missing (must hold the db lock)"""
+        columns = {row['name'] for row in self._db.execute("PRAGMA table_info(games)")}
+        if 'seed' not in columns:
+            self._db.execute("ALTER TABLE games ADD COLUMN seed INTEGER")
+    
+    def _import_legacy_scores(self):
+        """Copy galaga_scores.json and scores.txt into the games table (must hold the db lock)"""
+        rows = []
+        if os.path.exists(c.LEGACY_SCORE_DB_FILE):
             try:
-                with open(self.filename, 'r') as f:
+                with open(c.LEGACY_SCORE_DB_FILE, 'r') as f:
                     data = json.load(f)
-                    self.scores = data.get('scores', [])
-                    self.current_session_high = data.get('session_high', 0)
-                    # Ensure we have the right number of scores
-                    self._ensure_default_scores()
-            except (json.JSONDecodeError, IOError):
-                # If file is corrupted, start fresh
-                self._create_default_scores()
-        else:
-            self._create_default_scores()
-    
-    def _create_default_scores(self):
-        """Create default high score list"""
-        self.scores = [
-            {'name': 'AAA', 'score': 30000, 'date': '2024-01-01', 'stage': 5},
-            {'name': 'BBB', 'score': 20000, 'date': '2024-01-01', 'stage': 4},
-            {'name': 'CCC', 'score': 10000, 'date': '2024-01-01', 'stage': 3},
-            {'name': 'DDD', 'score': 9000, 'date': '2024-01-01', 'stage': 2},
-            {'name': 'EEE', 'score': 8000, 'date': '2024-01-01', 'stage': 2}
-        ]
-        self.save_scores()
+                for s in data.get('scores', []):
+                    rows.append((s['name'], s['score'], s.get('stage', 0), 0, 0, s.get('date', DEFAULT_DATE), None))
+                self._set_meta('session_high', data.get('session_high', 0))
+            except (json.JSONDecodeError, IOError, KeyError) as e:
+                print(f"Error importing {c.LEGACY_SCORE_DB_FILE}: {e}")
+        if os.path.exists(c.SCORE_FILE):
+            # scores.txt is the older top list galaga_scores.json was started from, so its entries
+            # are usually in both files: skip one of the JSON's entries with the same name and score each
+            in_json = Counter((row[0], row[1]) for row in rows)
+            try:
+                for record in scoring.load_scores():
+                    if in_json[(record.name, record.score)]:
+                        in_json[(record.name, record.score)] -= 1
+                    else:
+                        rows.append((record.name, record.score, 0, 0, 0, DEFAULT_DATE, None))
+            except (IOError, ValueError) as e:
+                print(f"Error importing {c.SCORE_FILE}: {e}")
+        if not rows:
+            rows = [(name, score, stage, 0, 0, DEFAULT_DATE, None) for name, score, stage in DEFAULT_SCORES]
+        self._db.executemany(INSERT_GAME, rows)
     
-    def _ensure_default_scores(self):
-        """Ensure we have at least 5 scores"""
-        while len(self.scores) < c.NUM_TRACKED_SCORES:
-            self.scores.append({
-                'name': 'CPU',
-                'score': 1000 * (c.NUM_TRACKED_SCORES - len(self.scores)),
-                'date': '2024-01-01',
-                'stage': 1
-            })
+    def _get_meta(self, key):
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return None if row is None else row[0]
+    
+    def _set_meta(self, key, value):
+        self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
     
     def save_scores(self):
-        """Save scores to JSON file"""
+        """Mark the database as changed; it is written on the next flush"""
+        with self._lock:
+            self._dirty = True
+    
+    def flush(self):
+        """Ask the background flusher to write any queued changes"""
+        if self._closed or not self._dirty:
+            return
+        if self._flusher is None:
+            self._flusher = threading.Thread(target=self._flush_loop, name="score-flusher", daemon=True)
+            self._flusher.start()
+        self._flush_requested.set()
+    
+    def close(self):
+        """Stop the flusher, write any pending changes and close the database"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._flusher is not None:
+            self._flush_requested.set()
+            self._flusher.join()
+            self._flusher = None
+        self._write_if_dirty()
+        with self._db_lock:
+            self._db.close()
+    
+    def _flush_loop(self):
+        while not self._closed:
+            self._flush_requested.wait()
+            self._flush_requested.clear()
+            self._write_if_dirty()
+    
+    def _write_if_dirty(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+            games, self._pending_games = self._pending_games, []
+            names, self._pending_names = self._pending_names, []
+            session_high = self.current_session_high
         try:
-            # Sort scores by score descending
-            self.scores.sort(key=lambda x: x['score'], reverse=True)
-            # Keep only top scores
-            self.scores = self.scores[:c.NUM_TRACKED_SCORES]
-            
-            data = {
-                'scores': self.scores,
-                'session_high': self.current_session_high,
-                'last_updated': datetime.now().isoformat()
-            }
-            
-            with open(self.filename, 'w') as f:
-                json.dump(data, f, indent=2)
-        except IOError as e:
+            with self._db_lock, self._db:
+                self._db.executemany(INSERT_GAME, games)
+                self._db.executemany(NAME_GAME, names)
+                self._set_meta('session_high', session_high)
+        except sqlite3.Error as e:
             print(f"Error saving scores: {e}")
+            with self._lock:
+                self._pending_games[:0] = games
+                self._pending_names[:0] = names
+                self._dirty = True
+    
+    def record_game(self, score: int, stage: int, num_shots: int = 0, num_hits: int = 0, name: str = '',
+                    seed: int = None) -> Dict:
+        """
+        Queue a finished game for the history; it is appended on the next flush
+        The seed of the game's random number generator is kept so the game can be reproduced
+        """
+        game = (name.upper()[:3], score, stage, num_shots, num_hits, datetime.now().isoformat(timespec='seconds'),
+                seed)
+        with self._lock:
+            self._pending_games.append(game)
+            self._dirty = True
+        return dict(zip(GAME_COLUMNS, game))
+    
+    def _query_games(self, where='', params=(), limit=None, keep=lambda game: True) -> List[Dict]:
+        """
+        Run an indexed query, best score first, and merge in the queued games that
+        pass keep() (the same filter as the where clause) since they are not flushed yet
+        """
+        sql = SELECT_GAMES + where + " ORDER BY score DESC"
+        if limit is not None:
+            sql += " LIMIT {:d}".format(limit)
+        with self._db_lock:
+            games = [dict(row) for row in self._db.execute(sql, params)]
+        with self._lock:
+            pending = [dict(zip(GAME_COLUMNS, game)) for game in self._pending_games]
+        pending = [game for game in pending if keep(game)]
+        if pending:
+            games.extend(pending)
+            games.sort(key=lambda game: game['score'], reverse=True)
+            if limit is not None:
+                games = games[:limit]
+        return games
     
     def is_high_score(self, score: int) -> bool:
         """Check if score qualifies for high score list"""
-        if len(self.scores) < c.NUM_TRACKED_SCORES:
+        top = self.get_scores()
+        if len(top) < c.NUM_TRACKED_SCORES:
             return True
-        return score > self.scores[-1]['score']
+        return score > top[-1]['score']
     
     def add_score(self, name: str, score: int, stage: int) -> int:
         """
-        Add a new high score
+        Name a game that made the high score list, the last unnamed one with this score and stage
+        (record_game already has every finished game, without a name)
         Returns the position in the high score list (1-based), or 0 if not a high score
         """
-        if not self.is_high_score(score):
+        position = 1 + sum(1 for s in self.get_scores() if s['score'] > score)
+        if position > c.NUM_TRACKED_SCORES:
             return 0
         
-        # Create new score entry
-        new_score = {
-            'name': name.upper()[:3],  # Ensure 3 chars, uppercase
-            'score': score,
-            'date': datetime.now().strftime('%Y-%m-%d'),
-            'stage': stage
-        }
-        
-        # Add and sort
-        self.scores.append(new_score)
-        self.scores.sort(key=lambda x: x['score'], reverse=True)
-        self.scores = self.scores[:c.NUM_TRACKED_SCORES]
+        name = name.upper()[:3]
+        with self._lock:
+            # Still queued: name it there, otherwise once it is written
+            for i in range(len(self._pending_games) - 1, -1, -1):
+                game = self._pending_games[i]
+                if game[0] == '' and game[1] == score and game[2] == stage:
+                    self._pending_games[i] = (name,) + game[1:]
+                    break
+            else:
+                self._pending_names.append((name, score, stage))
+            self._dirty = True
         
-        # Find position
-        position = 0
-        for i, s in enumerate(self.scores):
-            if s == new_score:
-                position = i + 1
-                break
-        
-        # Save to disk
-        self.save_scores()
+        # A new entry is rare, so write it out right away
+        self.flush()
         
         return position
     
     def get_high_score(self) -> int:
         """Get the current high score"""
-        if self.scores:
-            return self.scores[0]['score']
+        top = self.get_top_scores(1)
+        if top:
+            return top[0]['score']
         return 0
     
+    def get_top_scores(self, limit: int) -> List[Dict]:
+        """Get the best games of all time"""
+        return self._query_games(limit=limit)
+    
     def get_scores(self) -> List[Dict]:
         """Get all high scores"""
-        return self.scores.copy()
+        return self.get_top_scores(c.NUM_TRACKED_SCORES)
+    
+    def get_scores_for_stage(self, stage: int, limit: int = c.NUM_TRACKED_SCORES) -> List[Dict]:
+        """Get the best games that ended on a given stage"""
+        return self._query_games(" WHERE stage = ?", (stage,), limit,
+                                 keep=lambda game: game['stage'] == stage)
+    
+    def get_scores_on_date(self, day: date, limit: int = None) -> List[Dict]:
+        """Get the games played on a given day, best first"""
+        start, end = day.isoformat(), (day + timedelta(days=1)).isoformat()
+        return self._query_games(" WHERE date >= ? AND date < ?", (start, end), limit,
+                                 keep=lambda game: start <= game['date'] < end)
     
     def update_session_high(self, score: int):
         """Update current session high score"""
@@ -135,5 +284,6 @@ class ScoreDatabase:
         self.save_scores()
 
 
-# Global instance
-score_db = ScoreDatabase()
\ No newline at end of file
+# Global instance, headless simulations keep their games out of the real history
+score_db = ScoreDatabase(':memory:' if os.environ.get(c.HEADLESS_ENV) == '1' else c.SCORE_DB_FILE)
+atexit.register(score_db.close)
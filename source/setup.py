@@ -15,28 +15,47 @@ START_KEYS = [pygame.K_SPACE, pygame.K_RETURN]
 # Setup pygame
 SCREEN = FONT = SOUNDS = GRAPHICS = GAME_SURFACE = None
 
+# Sprite frame atlas: each region of the sprite sheet that gets drawn is sliced once into its
+# own surface, and addressed by its index in FRAMES (the frame ID)
+FRAMES = []
+FRAME_IDS = {}  # (x, y, width, height) on the sheet -> frame ID
+FONT_FRAMES = {}  # character -> frame ID of its glyph
+
+# Run without a window, audio or frame cap (simulation runs and build machines)
+HEADLESS = os.environ.get(c.HEADLESS_ENV) == '1'
+
 
 def setup_game():
-    global SCREEN, FONT, SOUNDS, GRAPHICS, GAME_SURFACE
+    global SCREEN, FONT, SOUNDS, GRAPHICS, GAME_SURFACE, FONT_FRAMES
 
-    # Center the window
-    os.environ['SDL_VIDEO_CENTERED'] = '1'
+    if HEADLESS:
+        # SDL's dummy drivers need no display or sound device
+        os.environ['SDL_VIDEODRIVER'] = 'dummy'
+        os.environ['SDL_AUDIODRIVER'] = 'dummy'
+    else:
+        # Center the window
+        os.environ['SDL_VIDEO_CENTERED'] = '1'
 
     pygame.init()
-    
-    # Initialize mixer with specific parameters to avoid issues
-    pygame.mixer.init(frequency=22050, size=-16, channels=2, buffer=512)
-    
-    SCREEN = pygame.display.set_mode(c.DEFAULT_SCREEN_SIZE)
-    pygame.display.set_caption(c.TITLE)
+
+    if HEADLESS:
+        # Images still need a video mode to convert() to, but nothing is scaled or shown
+        SCREEN = pygame.display.set_mode(c.GAME_SIZE)
+    else:
+        # Initialize mixer with specific parameters to avoid issues
+        pygame.mixer.init(frequency=22050, size=-16, channels=2, buffer=512)
+
+        SCREEN = pygame.display.set_mode(c.DEFAULT_SCREEN_SIZE)
+        pygame.display.set_caption(c.TITLE)
     
     # Create a surface at the original game resolution for rendering
     GAME_SURFACE = pygame.Surface(c.GAME_SIZE)
 
     # Load these
     FONT = load_font()
-    SOUNDS = load_all_sfx(os.path.join(c.RESOURCE_DIR, "audio"), (".ogg",))
+    SOUNDS = {} if HEADLESS else load_all_sfx(os.path.join(c.RESOURCE_DIR, "audio"), (".ogg",))
     GRAPHICS = load_all_gfx(os.path.join(c.RESOURCE_DIR, "graphics"), ('.png', ".bmp"))
+    FONT_FRAMES = {char: add_frame(x, y, FONT_CHAR_SIZE, FONT_CHAR_SIZE) for char, (x, y) in FONT.items()}
 
 
 def load_all_gfx(directory, accept=('.png', '.bmp', '.gif'), color_key=pygame.Color('black')) -> dict:
@@ -117,6 +136,40 @@ def has_image(image_name: str) -> bool:
     return get_image(image_name) is not None
 
 
+def add_frame(x: int, y: int, width: int, height: int) -> int:
+    """
+    Get the frame ID of a region of the sprite sheet, slicing it into the atlas the first time
+    """
+    rect = (x, y, width, height)
+    frame_id = FRAME_IDS.get(rect)
+    if frame_id is None:
+        sheet = get_image('sheet')
+        region = sheet.subsurface(rect)
+        if sheet.get_alpha():
+            frame = region.convert_alpha()
+        else:
+            frame = region.convert()
+            frame.set_colorkey(sheet.get_colorkey())
+        frame_id = len(FRAMES)
+        FRAMES.append(frame)
+        FRAME_IDS[rect] = frame_id
+    return frame_id
+
+
+def get_frame(frame_id: int) -> pygame.Surface:
+    return FRAMES[frame_id]
+
+
+def get_glyph(character) -> pygame.Surface:
+    """
+    Get the font image of a character, or of the unknown symbol when the font doesn't have it
+    """
+    frame_id = FONT_FRAMES.get(character)
+    if frame_id is None:
+        frame_id = FONT_FRAMES[None]
+    return FRAMES[frame_id]
+
+
 def get_from_font(character) -> tuple:
     return FONT.get(character)
 
@@ -126,6 +179,8 @@ def has_char_in_font(character: str) -> bool:
 
 
 def play_sound(sound_name):
+    if HEADLESS:
+        return
     sound = SOUNDS.get(sound_name)
     if sound:
         try:
@@ -137,7 +192,8 @@ def play_sound(sound_name):
 
 
 def stop_sounds():
-    pygame.mixer.stop()
+    if pygame.mixer.get_init():
+        pygame.mixer.stop()
 
 
 # load all the resources
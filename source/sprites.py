@@ -1,8 +1,57 @@
 from .tools import time_millis
 import pygame
+from pygame.math import Vector2
 from . import constants as c, tools
-from .constants import Rectangle
-from .tools import grab_sheet
+from .setup import add_frame, get_frame
+from .enemy_table import EnemyTable, IN_FORMATION, ENTERING, ATTACKING, ENTRANCE_PATH, ATTACK_PATH, PATH_SPEED
+
+# Flipped copies of sprite images, keyed on (source image, flip horizontal, flip vertical)
+FLIP_CACHE_SIZE = 128
+_flip_cache = {}
+
+
+def get_flipped(image: pygame.Surface, flip_horizontal: bool, flip_vertical: bool) -> pygame.Surface:
+    """
+    Get the image flipped, reusing the flipped copy made last time when there is one
+    """
+    if not flip_horizontal and not flip_vertical:
+        return image
+    key = image, flip_horizontal, flip_vertical
+    flipped = _flip_cache.get(key)
+    if flipped is None:
+        if len(_flip_cache) >= FLIP_CACHE_SIZE:
+            # drop the oldest entry
+            del _flip_cache[next(iter(_flip_cache))]
+        flipped = pygame.transform.flip(image, flip_horizontal, flip_vertical)
+        _flip_cache[key] = flipped
+    return flipped
+
+
+def clear_flip_cache():
+    """
+    Forget all flipped images, done when the stage changes since the sprites showing change
+    """
+    _flip_cache.clear()
+
+
+def draw_list(sprites, alpha: float = 1.0) -> list:
+    """
+    The (image, position) pairs that draw the sprites like their display methods, for Surface.blits
+    """
+    draws = []
+    for sprite in sprites:
+        image = sprite.image
+        if image is None or not sprite.is_visible:
+            continue
+        if sprite.flip_horizontal or sprite.flip_vertical:
+            image = get_flipped(image, sprite.flip_horizontal, sprite.flip_vertical)
+        img_width, img_height = image.get_size()
+        last_x, last_y = sprite.last_x, sprite.last_y
+        x, y = sprite.rect.center
+        x = round(last_x + (x - last_x) * alpha) - img_width // 2 + sprite.image_offset_x
+        y = round(last_y + (y - last_y) * alpha) - img_height // 2 + sprite.image_offset_y
+        draws.append((image, (x, y)))
+    return draws
 
 
 class GalagaSprite(pygame.sprite.Sprite):
@@ -20,6 +69,10 @@ class GalagaSprite(pygame.sprite.Sprite):
         self.x = x
         self.y = y
 
+        # Position before the latest update, for interpolating the display between updates
+        self.last_x = x
+        self.last_y = y
+
         # Display and image variables
         self.image = None
         self.image_offset_x: int = 0
@@ -28,6 +81,10 @@ class GalagaSprite(pygame.sprite.Sprite):
         self.flip_horizontal: bool = False
         self.flip_vertical: bool = False
 
+        # The SpritePool the sprite came from, it goes back there when killed
+        self.pool = None
+        self.in_pool = False
+
     @property
     def x(self):
         return self.rect.centerx
@@ -44,24 +101,40 @@ class GalagaSprite(pygame.sprite.Sprite):
     def y(self, value: int):
         self.rect.centery = value
 
+    def save_position(self):
+        """
+        Remember the current position as the start of the next update's movement
+        """
+        self.last_x = self.rect.centerx
+        self.last_y = self.rect.centery
+
+    def reset(self, x, y):
+        """
+        Start over at a position, shown and not flipped, when the sprite is reused from a pool.
+        Subclasses reset the rest of their state and take the same arguments as their constructor
+        """
+        self.x = x
+        self.y = y
+        self.save_position()
+        self.is_visible = True
+        self.flip_horizontal = False
+        self.flip_vertical = False
+
+    def kill(self):
+        super(GalagaSprite, self).kill()
+        if self.pool is not None:
+            self.pool.release(self)
+
     def update(self, delta_time: int, flash_flag: bool):
         pass
 
-    def display(self, surface: pygame.Surface):
-        if self.image is not None and self.is_visible:
-            image = pygame.transform.flip(self.image, self.flip_horizontal, self.flip_vertical)
-            img_width, img_height = image.get_size()
-            # Center the image
-            x = self.x - img_width // 2 + self.image_offset_x
-            y = self.y - img_height // 2 + self.image_offset_y
-            surface.blit(image, (x, y))
-
 
 class Player(GalagaSprite):
+    FRAME = add_frame(6 * 16, 0 * 16, 16, 16)
 
     def __init__(self, x, y):
         super(Player, self).__init__(x, y, 14, 12)
-        self.image = grab_sheet(6 * 16, 0 * 16, 16, 16)
+        self.image = get_frame(self.FRAME)
         self.image_offset_x = 1
 
     def update(self, delta_time, keys):
@@ -73,124 +146,179 @@ class Player(GalagaSprite):
 
 
 class Enemy(GalagaSprite):
-    """Base class for all enemy types in Galaga"""
+    """
+    Base class for all enemy types in Galaga.
+    The enemy's state is a row of an EnemyTable: the formation's while it's in one, where all
+    enemies move together, otherwise a table of its own
+    """
+
+    FIRE_COOLDOWN = 1500  # Milliseconds between shots
     
     def __init__(self, x, y, width, height):
+        self.own_table = EnemyTable(1)
+        self.table = self.own_table
+        self.slot = 0
         super(Enemy, self).__init__(x, y, width, height)
         self.enemy_type = "base"
         self.points_in_formation = 0
         self.points_while_attacking = 0
-        self.is_attacking = False
+        self.path_speed = PATH_SPEED
+        self.can_fire = True
+        self.reset_enemy()
+
+    def reset_enemy(self):
+        """Set what changes during an enemy's life to how it starts"""
+        self.table.state[self.slot] = IN_FORMATION
         self.formation_pos = None  # (row, col) in formation
         self.current_frame = 0
         self.animation_timer = 0
-        
-        # Pattern following
-        self.is_entering = False
-        self.entrance_path = []
-        self.path_index = 0
-        self.attack_path = []
-        self.path_speed = 2.0  # Pixels per frame
+        self.table.path_length[self.slot] = 0, 0
+        self.table.following[self.slot] = False
         
         # Firing mechanics
-        self.can_fire = True
         self.last_fire_time = 0
-        self.fire_cooldown = 1500  # Milliseconds between shots
+        self.fire_cooldown = self.FIRE_COOLDOWN
+
+    def reset(self, x, y):
+        if self.table is not self.own_table:
+            self.table.detach(self.slot)
+        super(Enemy, self).reset(x, y)
+        self.reset_enemy()
+
+    def kill(self):
+        if self.table is not self.own_table:
+            self.table.detach(self.slot)
+        super(Enemy, self).kill()
+
+    # The position is the table's, the rectangle follows it
+
+    @property
+    def x(self):
+        return self.rect.centerx
+
+    @x.setter
+    def x(self, value: int):
+        self.rect.centerx = value
+        self.table.position[self.slot, 0] = value
+
+    @property
+    def y(self):
+        return self.rect.centery
+
+    @y.setter
+    def y(self, value: int):
+        self.rect.centery = value
+        self.table.position[self.slot, 1] = value
+
+    @property
+    def is_entering(self) -> bool:
+        return bool(self.table.state[self.slot] & ENTERING)
+
+    @is_entering.setter
+    def is_entering(self, value: bool):
+        if value:
+            self.table.state[self.slot] |= ENTERING
+        else:
+            self.table.state[self.slot] &= ~ENTERING
+
+    @property
+    def is_attacking(self) -> bool:
+        return bool(self.table.state[self.slot] & ATTACKING)
+
+    @is_attacking.setter
+    def is_attacking(self, value: bool):
+        if value:
+            self.table.state[self.slot] |= ATTACKING
+        else:
+            self.table.state[self.slot] &= ~ATTACKING
+
+    @property
+    def formation_pos(self):
+        row = self.table.row[self.slot]
+        if row < 0:
+            return None
+        return int(row), int(self.table.col[self.slot])
+
+    @formation_pos.setter
+    def formation_pos(self, value):
+        self.table.row[self.slot], self.table.col[self.slot] = (-1, -1) if value is None else value
+
+    @property
+    def hits_remaining(self) -> int:
+        return int(self.table.hits[self.slot])
+
+    @hits_remaining.setter
+    def hits_remaining(self, value: int):
+        self.table.hits[self.slot] = value
+
+    @property
+    def can_fire(self) -> bool:
+        return bool(self.table.can_fire[self.slot])
+
+    @can_fire.setter
+    def can_fire(self, value: bool):
+        self.table.can_fire[self.slot] = value
+
+    @property
+    def last_fire_time(self) -> int:
+        return int(self.table.last_fire_time[self.slot])
+
+    @last_fire_time.setter
+    def last_fire_time(self, value: int):
+        self.table.last_fire_time[self.slot] = value
+
+    @property
+    def fire_cooldown(self) -> int:
+        return int(self.table.fire_cooldown[self.slot])
+
+    @fire_cooldown.setter
+    def fire_cooldown(self, value: int):
+        self.table.fire_cooldown[self.slot] = value
         
     def get_points(self):
         """Return points based on current state"""
         return self.points_while_attacking if self.is_attacking else self.points_in_formation
         
     def update(self, delta_time: int, animation_flag: bool):
-        """Update enemy state and animation"""
-        # Handle pattern following
-        if self.is_entering and self.entrance_path:
-            self._follow_entrance_path()
-        elif self.is_attacking and self.attack_path:
-            self._follow_attack_path()
-            
-        # Update animation
+        """Update the animation, the table moves the enemy"""
         if animation_flag:
             self.current_frame = (self.current_frame + 1) % len(self.frames)
             self._update_image()
     
-    def _follow_entrance_path(self):
-        """Follow the entrance path"""
-        if self.path_index < len(self.entrance_path):
-            target_x, target_y = self.entrance_path[self.path_index]
-            
-            # Move toward target position
-            dx = target_x - self.x
-            dy = target_y - self.y
-            distance = (dx**2 + dy**2)**0.5
-            
-            if distance < self.path_speed:
-                # Reached this point, move to next
-                self.x = target_x
-                self.y = target_y
-                self.path_index += 1
-            else:
-                # Move toward target
-                self.x += int(dx / distance * self.path_speed)
-                self.y += int(dy / distance * self.path_speed)
-        else:
-            # Finished entrance, join formation
-            self.is_entering = False
-            self.path_index = 0
-    
-    def _follow_attack_path(self):
-        """Follow the attack path"""
-        if self.path_index < len(self.attack_path):
-            target_x, target_y = self.attack_path[self.path_index]
-            
-            # Move toward target position
-            dx = target_x - self.x
-            dy = target_y - self.y
-            distance = (dx**2 + dy**2)**0.5
-            
-            if distance < self.path_speed:
-                # Reached this point, move to next
-                self.x = target_x
-                self.y = target_y
-                self.path_index += 1
-            else:
-                # Move toward target
-                self.x += int(dx / distance * self.path_speed)
-                self.y += int(dy / distance * self.path_speed)
-        else:
-            # Finished attack, return to formation
-            self.is_attacking = False
-            self.path_index = 0
-    
     def set_entrance_path(self, path):
         """Set the entrance path for this enemy"""
-        self.entrance_path = path
-        self.is_entering = True
-        self.path_index = 0
-        if path:
+        if len(path):
             # Start at first position
-            self.x, self.y = path[0]
+            x, y = path[0]
+            self.x, self.y = int(x), int(y)
+            self.save_position()
+        self.table.set_path(self.slot, ENTRANCE_PATH, path)
+        self.is_entering = True
     
     def start_attack(self, path):
         """Start an attack with the given path"""
-        self.attack_path = path
+        self.table.set_path(self.slot, ATTACK_PATH, path)
+        self.is_attacking = True
+
+    def start_dive(self, target_x):
+        """Start an attack with the dive of the enemy's type, from where it is toward target_x"""
+        self.table.set_dive(self.slot, target_x)
         self.is_attacking = True
-        self.path_index = 0
+    
+    def _follow_entrance_path(self, delta_time):
+        """Follow the entrance path, Formation moves all enemies at once with EnemyTable.follow_paths"""
+        if self.is_entering:
+            self.table.follow_paths(delta_time, [self.slot])
+    
+    def _follow_attack_path(self, delta_time):
+        """Follow the attack path, Formation moves all enemies at once with EnemyTable.follow_paths"""
+        if self.is_attacking and not self.is_entering:
+            self.table.follow_paths(delta_time, [self.slot])
     
     def should_fire(self, current_time, player_pos):
-        """Check if enemy should fire at player"""
-        if not self.can_fire or not self.is_attacking:
-            return False
-            
-        # Check cooldown
-        if current_time - self.last_fire_time < self.fire_cooldown:
-            return False
-            
-        # Only fire when diving toward player
-        if self.y < player_pos[1] - 50:  # Enemy is above player
-            return True
-            
-        return False
+        """Check if enemy should fire at player, Play asks for all of them at once with EnemyTable.ready_to_fire"""
+        return (self.can_fire and self.is_attacking and self.y < player_pos[1] - 50
+                and current_time - self.last_fire_time >= self.fire_cooldown)
     
     def fire(self, current_time):
         """Fire a missile (to be implemented by Play state)"""
@@ -199,32 +327,38 @@ class Enemy(GalagaSprite):
     def _update_image(self):
         """Update the sprite image based on current frame"""
         if hasattr(self, 'frames') and self.frames:
-            x, y, w, h = self.frames[self.current_frame]
-            self.image = grab_sheet(x, y, w, h)
+            self.image = get_frame(self.frames[self.current_frame])
 
 
 class Zako(Enemy):
     """Bee-like enemy - most common type"""
     
-    # Sprite sheet coordinates for Zako frames
+    # Frame IDs of the Zako frames on the sprite sheet
     BLUE_FRAMES = [
-        (80, 80, 16, 16),   # Frame 1
-        (96, 80, 16, 16)    # Frame 2
+        add_frame(80, 80, 16, 16),   # Frame 1
+        add_frame(96, 80, 16, 16)    # Frame 2
     ]
     
     YELLOW_FRAMES = [
-        (112, 80, 16, 16),  # Frame 1
-        (128, 80, 16, 16)   # Frame 2
+        add_frame(112, 80, 16, 16),  # Frame 1
+        add_frame(128, 80, 16, 16)   # Frame 2
     ]
     
+    FIRE_COOLDOWN = 2000  # Zakos fire less frequently
+    
     def __init__(self, x, y, variant='blue'):
         super(Zako, self).__init__(x, y, 16, 16)
         self.enemy_type = "zako"
-        self.variant = variant
         self.points_in_formation = 50
         self.points_while_attacking = 100
-        self.fire_cooldown = 2000  # Zakos fire less frequently
-        
+        self.set_variant(variant)
+
+    def reset(self, x, y, variant='blue'):
+        super(Zako, self).reset(x, y)
+        self.set_variant(variant)
+
+    def set_variant(self, variant):
+        self.variant = variant
         # Set frames based on variant
         self.frames = self.BLUE_FRAMES if variant == 'blue' else self.YELLOW_FRAMES
         self._update_image()
@@ -233,26 +367,34 @@ class Zako(Enemy):
 class Goei(Enemy):
     """Butterfly-like enemy - escorts for Boss Galaga"""
     
-    # Sprite sheet coordinates for Goei frames
+    # Frame IDs of the Goei frames on the sprite sheet
     RED_FRAMES = [
-        (80, 96, 16, 16),   # Frame 1
-        (96, 96, 16, 16)    # Frame 2
+        add_frame(80, 96, 16, 16),   # Frame 1
+        add_frame(96, 96, 16, 16)    # Frame 2
     ]
     
     WHITE_FRAMES = [
-        (144, 80, 16, 16),  # Frame 1
-        (160, 80, 16, 16)   # Frame 2
+        add_frame(144, 80, 16, 16),  # Frame 1
+        add_frame(160, 80, 16, 16)   # Frame 2
     ]
     
+    FIRE_COOLDOWN = 1500  # Goei fire more frequently than Zako
+    
     def __init__(self, x, y, variant='red'):
         super(Goei, self).__init__(x, y, 16, 16)
         self.enemy_type = "goei"
-        self.variant = variant
         self.points_in_formation = 80
         self.points_while_attacking = 160
+        self.set_variant(variant)
         self.is_escort = False  # True when escorting Boss Galaga
-        self.fire_cooldown = 1500  # Goei fire more frequently than Zako
-        
+
+    def reset(self, x, y, variant='red'):
+        super(Goei, self).reset(x, y)
+        self.set_variant(variant)
+        self.is_escort = False
+
+    def set_variant(self, variant):
+        self.variant = variant
         # Set frames based on variant
         self.frames = self.RED_FRAMES if variant == 'red' else self.WHITE_FRAMES
         self._update_image()
@@ -261,15 +403,15 @@ class Goei(Enemy):
 class BossGalaga(Enemy):
     """Large enemy that can capture player's ship"""
     
-    # Sprite sheet coordinates for Boss Galaga frames
+    # Frame IDs of the Boss Galaga frames on the sprite sheet
     GREEN_FRAMES = [
-        (112, 96, 16, 16),  # Frame 1
-        (128, 96, 16, 16)   # Frame 2
+        add_frame(112, 96, 16, 16),  # Frame 1
+        add_frame(128, 96, 16, 16)   # Frame 2
     ]
     
     PURPLE_FRAMES = [
-        (144, 96, 16, 16),  # Frame 1 (after being hit once)
-        (160, 96, 16, 16)   # Frame 2
+        add_frame(144, 96, 16, 16),  # Frame 1 (after being hit once)
+        add_frame(160, 96, 16, 16)   # Frame 2
     ]
     
     def __init__(self, x, y):
@@ -277,11 +419,18 @@ class BossGalaga(Enemy):
         self.enemy_type = "boss_galaga"
         self.points_in_formation = 150
         self.points_while_attacking = 400  # Base points, modified by escorts
+        self.can_fire = False  # Boss Galagas don't fire missiles, they use tractor beam
+        self.reset_boss()
+
+    def reset(self, x, y):
+        super(BossGalaga, self).reset(x, y)
+        self.reset_boss()
+
+    def reset_boss(self):
         self.hits_remaining = 2
         self.has_captured_fighter = False
         self.captured_fighter = None
         self.escort_count = 0
-        self.can_fire = False  # Boss Galagas don't fire missiles, they use tractor beam
         
         # Start with green frames
         self.frames = self.GREEN_FRAMES
@@ -313,70 +462,78 @@ class BossGalaga(Enemy):
 class Missile(GalagaSprite):
     ENEMY_MISSILE = 246, 51, 3, 8
     PLAYER_MISSILE = 246, 67, 3, 8
+    ENEMY_MISSILE_FRAME = add_frame(*ENEMY_MISSILE)
+    PLAYER_MISSILE_FRAME = add_frame(*PLAYER_MISSILE)
 
     def __init__(self, x, y, vel, is_enemy):
         super(Missile, self).__init__(x, y, 2, 10)
-        self.vel = vel
-        self.is_enemy = is_enemy
+        self.vel = Vector2(vel)
+        self.set_kind(is_enemy)
 
+    def reset(self, x, y, vel, is_enemy):
+        super(Missile, self).reset(x, y)
+        self.vel.update(vel)
+        self.set_kind(is_enemy)
+
+    def set_kind(self, is_enemy):
+        self.is_enemy = is_enemy
         if self.is_enemy:
-            img_slice = self.ENEMY_MISSILE
+            self.image = get_frame(self.ENEMY_MISSILE_FRAME)
         else:
-            img_slice = self.PLAYER_MISSILE
-        ix, iy, w, h = img_slice
-        self.image = grab_sheet(ix, iy, w, h)
+            self.image = get_frame(self.PLAYER_MISSILE_FRAME)
 
     def update(self, delta_time: int, flash_flag: bool):
-        vel = self.vel * delta_time
-        self.x += round(vel.x)
-        self.y += round(vel.y)
+        self.x += round(self.vel.x * delta_time)
+        self.y += round(self.vel.y * delta_time)
 
 
 class Explosion(GalagaSprite):
     PLAYER_FRAME_DURATION = 140
     OTHER_FRAME_DURATION = 120
 
-    PLAYER_FRAMES = [Rectangle(64, 112, 32, 32), Rectangle(96, 112, 32, 32), Rectangle(128, 112, 32, 32),
-                     Rectangle(160, 112, 32, 32)]
+    PLAYER_FRAMES = [add_frame(64, 112, 32, 32), add_frame(96, 112, 32, 32), add_frame(128, 112, 32, 32),
+                     add_frame(160, 112, 32, 32)]
 
-    OTHER_FRAMES = [Rectangle(224, 80, 16, 16), Rectangle(240, 80, 16, 16), Rectangle(224, 96, 16, 16),
-                    Rectangle(0, 112, 32, 32), Rectangle(32, 112, 32, 32)]
+    OTHER_FRAMES = [add_frame(224, 80, 16, 16), add_frame(240, 80, 16, 16), add_frame(224, 96, 16, 16),
+                    add_frame(0, 112, 32, 32), add_frame(32, 112, 32, 32)]
 
     def __init__(self, x: int, y: int, is_player_type=False):
         super(Explosion, self).__init__(x, y, 16, 16)
+        self.start(is_player_type)
+
+    def reset(self, x: int, y: int, is_player_type=False):
+        super(Explosion, self).reset(x, y)
+        self.start(is_player_type)
+
+    def start(self, is_player_type):
         self.is_player_type = is_player_type
 
         self.frame_timer = 0
 
         if self.is_player_type:
-            self.image = grab_sheet(64, 112, 32, 32)
-            self.frames = iter(self.PLAYER_FRAMES)
+            self.frames = self.PLAYER_FRAMES
             self.frame_duration = self.PLAYER_FRAME_DURATION
         else:
-            self.image = grab_sheet
-            self.frames = iter(self.OTHER_FRAMES)
+            self.frames = self.OTHER_FRAMES
             self.frame_duration = self.OTHER_FRAME_DURATION
 
+        self.frame_index = -1
         self.frame = None
         self.next_frame()
 
     def next_frame(self):
-        self.frame = next(self.frames)
-        x, y, w, h = self.frame
-        self.image = grab_sheet(x, y, w, h)
+        self.frame_index += 1
+        self.frame = self.frames[self.frame_index]
+        self.image = get_frame(self.frame)
         self.frame_timer = 0
 
     def update(self, delta_time: int, flash_flag: bool):
         self.frame_timer += delta_time
         if self.frame_timer >= self.frame_duration:
-            try:
-                self.next_frame()
-            except StopIteration:
+            if self.frame_index + 1 >= len(self.frames):
                 self.kill()
                 return
-
-    def display(self, surface: pygame.Surface):
-        super(Explosion, self).display(surface)
+            self.next_frame()
 
 
 def create_score_surface(number):
@@ -404,7 +561,7 @@ def create_score_surface(number):
     for i, character in enumerate(str_num):
         value = int(character)
         sheet_x = value * sheet_char_width
-        number_sprite = grab_sheet(sheet_x, sheet_y, 4, 8)
+        number_sprite = get_frame(add_frame(sheet_x, sheet_y, 4, 8))
         surface.blit(number_sprite, (i * char_width, 0))
 
     # replace white with color
@@ -415,6 +572,27 @@ def create_score_surface(number):
     return surface
 
 
+# Point values shown by score popups, made when the game starts so a kill does no pixel work
+SCORE_POPUP_VALUES = 800, 1000, 1600
+_score_surfaces = {}
+
+
+def get_score_surface(number) -> pygame.Surface:
+    """
+    Get the score popup image of a number, it is only made the first time
+    """
+    number = int(number)
+    surface = _score_surfaces.get(number)
+    if surface is None:
+        surface = create_score_surface(number)
+        _score_surfaces[number] = surface
+    return surface
+
+
+for _value in SCORE_POPUP_VALUES:
+    get_score_surface(_value)
+
+
 class ScoreText(GalagaSprite):
     # The class keeps track of the text sprites
     text_sprites = pygame.sprite.Group()
@@ -422,7 +600,14 @@ class ScoreText(GalagaSprite):
     def __init__(self, x, y, number, lifetime=950):
         super(ScoreText, self).__init__(x, y, 1, 1, self.text_sprites)  # BB size doesn't matter here
         self.number = number
-        self.image = create_score_surface(self.number)
+        self.image = get_score_surface(self.number)
+        self.lifetime = lifetime
+
+    def reset(self, x, y, number, lifetime=950):
+        super(ScoreText, self).reset(x, y)
+        self.add(self.text_sprites)
+        self.number = number
+        self.image = get_score_surface(self.number)
         self.lifetime = lifetime
 
     def update(self, delta_time: int, flash_flag: bool):
@@ -431,3 +616,68 @@ class ScoreText(GalagaSprite):
             self.kill()
             return
         self.lifetime -= delta_time
+
+
+class SpritePool:
+    """
+    A free list of reusable sprites of one class, so sprites that come and go all the time don't have
+    to be made and garbage collected. acquire takes a free sprite and resets it with the constructor's
+    arguments, or makes a new one when none are free; the sprite goes back to the pool when it is killed.
+    The pool keeps up to capacity free sprites, and starts out with that many
+    """
+
+    def __init__(self, sprite_class, capacity: int, *default_args):
+        self.sprite_class = sprite_class
+        self.capacity = capacity
+        self.free = []
+        self.num_in_use = 0
+        self.high_water_mark = 0  # most sprites in use at the same time
+        self.num_made = 0  # sprites made, up front or because none were free
+        for _ in range(capacity):
+            sprite = self._make(*default_args)
+            pygame.sprite.Sprite.kill(sprite)  # out of the groups the constructor put it in
+            sprite.in_pool = True
+            self.free.append(sprite)
+
+    def _make(self, *args):
+        sprite = self.sprite_class(*args)
+        sprite.pool = self
+        self.num_made += 1
+        return sprite
+
+    def acquire(self, *args):
+        if self.free:
+            sprite = self.free.pop()
+            sprite.reset(*args)
+            sprite.in_pool = False
+        else:
+            sprite = self._make(*args)
+        self.num_in_use += 1
+        if self.num_in_use > self.high_water_mark:
+            self.high_water_mark = self.num_in_use
+        return sprite
+
+    def release(self, sprite):
+        if sprite.in_pool:
+            # killed more than once
+            return
+        sprite.in_pool = True
+        self.num_in_use -= 1
+        if len(self.free) < self.capacity:
+            self.free.append(sprite)
+
+
+# Pools of the sprites made during play, big enough for the busiest moments
+MISSILE_POOL_SIZE = 32
+EXPLOSION_POOL_SIZE = 16
+SCORE_TEXT_POOL_SIZE = 8
+ZAKO_POOL_SIZE = 24
+GOEI_POOL_SIZE = 20
+BOSS_GALAGA_POOL_SIZE = 8
+
+missile_pool = SpritePool(Missile, MISSILE_POOL_SIZE, 0, 0, (0, 0), False)
+explosion_pool = SpritePool(Explosion, EXPLOSION_POOL_SIZE, 0, 0)
+score_text_pool = SpritePool(ScoreText, SCORE_TEXT_POOL_SIZE, 0, 0, SCORE_POPUP_VALUES[0])
+enemy_pools = {"zako": SpritePool(Zako, ZAKO_POOL_SIZE, 0, 0),
+               "goei": SpritePool(Goei, GOEI_POOL_SIZE, 0, 0),
+               "boss_galaga": SpritePool(BossGalaga, BOSS_GALAGA_POOL_SIZE, 0, 0)}
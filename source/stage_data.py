@@ -0,0 +1,231 @@
+"""
+Stage layouts and entrance paths, read from STAGE_FILE
+
+The file is JSON with:
+
+    layouts            entrance groups by name: pattern, delay (ms) and enemies as [type, row, col]
+    stage_layouts      the layout of stage n is stage_layouts[n % len(stage_layouts)]
+    challenging_waves  delay and enemies as [type, pattern], an enemy's index is its place in the wave
+    entrances          entrance patterns by name, 'default' is for groups with unknown patterns
+    challenging        challenging stage patterns by name
+
+A pattern has its number of steps and segments, each covering t = step / (steps - 1) up to its
+'until' (the last one up to 1), with u going from 0 to 1 over the segment:
+
+    {"line": {"from": P, "to": P}}      from + u * (to - from)
+    {"line": {"from": P, "by": P}}      from + u * by
+    {"arc": {"center": P, "radius": r or [rx, ry], "from": a, "sweep": a}}   angles in multiples of pi
+    {"bezier": {"from": P, "control": P, "to": P}}                          quadratic
+
+Without a 'from', lines and beziers start at the 'to' of the segment before, or the 'start' of the
+pattern. The coordinates of a point P are numbers or sums of terms like "0.2w + 60" or
+"-20 - 10 i%4", a term being a number and one of w, h (the game size), i (the index in the group),
+i%N, i//N, row and col (the formation slot). Terms are added in the order they are written, so a
+pattern gives the same pixels as the Python expression written the same way.
+
+Patterns are compiled when the file is loaded and make the paths of all enemies of a group at
+once, as int64 arrays of shape (enemies, steps, 2). path_cache keeps what they make.
+"""
+import json
+import math
+import re
+
+import numpy as np
+
+from . import constants as c
+
+SIZE = {'w': c.GAME_SIZE.width, 'h': c.GAME_SIZE.height}
+
+TERM = re.compile(r'\s*([+-]?)\s*(\d+(?:\.\d*)?)?\s*(w|h|row|col|i(?:%\d+|//\d+)?)?\s*')
+
+
+def parse_value(value) -> tuple:
+    """A coordinate of the stage file as (coefficient, variable) terms, variable None for numbers"""
+    if isinstance(value, (int, float)):
+        return ((value, None),)
+    terms = []
+    pos = 0
+    while pos < len(value):
+        match = TERM.match(value, pos)
+        sign, number, variable = match.groups()
+        if (number is None and variable is None) or (terms and not sign):
+            raise ValueError(f"can't read {value!r} at {pos}")
+        coefficient = (float(number) if '.' in number else int(number)) if number else 1
+        terms.append((-coefficient if sign == '-' else coefficient, variable))
+        pos = match.end()
+    if not terms:
+        raise ValueError("empty value")
+    return tuple(terms)
+
+
+def parse_point(point) -> tuple:
+    x, y = point
+    return parse_value(x), parse_value(y)
+
+
+def evaluate(terms, env):
+    """The value of parsed terms for the enemies of a group, added up in order"""
+    value = 0
+    for coefficient, variable in terms:
+        if variable is None:
+            value = value + coefficient
+        elif '%' in variable:
+            value = value + coefficient * (env['i'] % int(variable[2:]))
+        elif '//' in variable:
+            value = value + coefficient * (env['i'] // int(variable[3:]))
+        else:
+            value = value + coefficient * env[variable]
+    return value
+
+
+def evaluate_point(point, env):
+    return evaluate(point[0], env), evaluate(point[1], env)
+
+
+# Segments by kind, make(spec, start) -> sample(u, env) -> x, y and the point the next segment starts at
+
+def _line(spec, start):
+    begin = parse_point(spec['from']) if 'from' in spec else start
+    if begin is None:
+        raise ValueError("line without a start")
+    if 'by' in spec:
+        by = parse_point(spec['by'])
+
+        def sample(u, env):
+            (x, y), (dx, dy) = evaluate_point(begin, env), evaluate_point(by, env)
+            return x + u * dx, y + u * dy
+        return sample, None
+    end = parse_point(spec['to'])
+
+    def sample(u, env):
+        (x, y), (end_x, end_y) = evaluate_point(begin, env), evaluate_point(end, env)
+        return x + u * (end_x - x), y + u * (end_y - y)
+    return sample, end
+
+
+def _arc(spec, start):
+    center = parse_point(spec['center'])
+    radius_x, radius_y = spec['radius'] if isinstance(spec['radius'], list) else (spec['radius'],) * 2
+    first_angle = math.pi * spec['from']
+    sweep = spec['sweep']
+
+    def sample(u, env):
+        x, y = evaluate_point(center, env)
+        angle = first_angle + u * math.pi * sweep
+        return x + np.cos(angle) * radius_x, y + np.sin(angle) * radius_y
+    return sample, None
+
+
+def _bezier(spec, start):
+    begin = parse_point(spec['from']) if 'from' in spec else start
+    if begin is None:
+        raise ValueError("bezier without a start")
+    control, end = parse_point(spec['control']), parse_point(spec['to'])
+
+    def sample(u, env):
+        (x, y), (control_x, control_y), (end_x, end_y) = (evaluate_point(point, env) for point in (begin, control, end))
+        return ((1-u)**2 * x + 2*(1-u)*u * control_x + u**2 * end_x,
+                (1-u)**2 * y + 2*(1-u)*u * control_y + u**2 * end_y)
+    return sample, end
+
+
+SEGMENTS = {
+    'line': _line,
+    'arc': _arc,
+    'bezier': _bezier,
+}
+
+
+class PathPattern:
+    """A pattern of the stage file, compiled to the segment samplers of its steps"""
+
+    def __init__(self, spec):
+        self.steps = int(spec['steps'])
+        self.t = np.arange(self.steps) / (self.steps - 1)
+        self.segments = []  # (until, start of the segment in t, length in t, sample)
+        point = parse_point(spec['start']) if 'start' in spec else None
+        begin = 0
+        for n, segment in enumerate(spec['segments']):
+            until = 1 if n == len(spec['segments']) - 1 else segment['until']
+            kinds = [kind for kind in segment if kind in SEGMENTS]
+            if len(kinds) != 1:
+                raise ValueError(f"segment {n} needs one of {', '.join(SEGMENTS)}")
+            sample, point = SEGMENTS[kinds[0]](segment[kinds[0]], point)
+            # the length as the decimal it is written as, like a literal in the path code
+            self.segments.append((until, begin, round(until - begin, 9), sample))
+            begin = until
+
+    def paths(self, env, num_enemies: int) -> np.ndarray:
+        """The paths of the enemies with the index, row and col (columns) of env"""
+        conditions, xs, ys = [], [], []
+        for until, begin, length, sample in self.segments:
+            x, y = sample((self.t - begin) / length, env)
+            conditions.append(self.t < until)
+            xs.append(x)
+            ys.append(y)
+        path = np.empty((num_enemies, self.steps, 2), dtype=np.int64)
+        # like int(), toward 0
+        path[:, :, 0] = np.select(conditions[:-1], xs[:-1], xs[-1]) if len(xs) > 1 else xs[0]
+        path[:, :, 1] = np.select(conditions[:-1], ys[:-1], ys[-1]) if len(ys) > 1 else ys[0]
+        return path
+
+
+def _compile_patterns(specs) -> dict:
+    patterns = {}
+    for name, spec in specs.items():
+        try:
+            patterns[name] = PathPattern(spec)
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"pattern {name}: {e!r}") from e
+    return patterns
+
+
+class StageData:
+    """The layouts, stage order, challenging waves and compiled patterns of a stage file"""
+
+    def __init__(self, filename=c.STAGE_FILE):
+        self.filename = filename
+        with open(filename) as f:
+            data = json.load(f)
+        self.layouts = data['layouts']
+        self.stage_layouts = data['stage_layouts']
+        self.waves = data['challenging_waves']
+        self.entrances = _compile_patterns(data['entrances'])
+        self.challenging = _compile_patterns(data['challenging'])
+        for name in self.stage_layouts:
+            if name not in self.layouts:
+                raise ValueError(f"{filename}: stage_layouts names unknown layout {name}")
+
+    def layout_groups(self, name) -> list:
+        """The entrance groups of a layout, as Formation.create_stage_formation takes them"""
+        return [{'enemies': [{'type': enemy_type, 'row': row, 'col': col} for enemy_type, row, col in group['enemies']],
+                 'pattern': group['pattern'],
+                 'delay': group['delay']}
+                for group in self.layouts[name]]
+
+    def stage_groups(self, stage_num: int) -> list:
+        return self.layout_groups(self.stage_layouts[stage_num % len(self.stage_layouts)])
+
+    def challenging_waves(self) -> list:
+        return [{'enemies': [{'type': enemy_type, 'index': idx, 'pattern': pattern}
+                             for idx, (enemy_type, pattern) in enumerate(wave['enemies'])],
+                 'delay': wave['delay']}
+                for wave in self.waves]
+
+    def entrance_paths(self, pattern_name, indices, formation_positions) -> np.ndarray:
+        """The entrance paths of the enemies of a group, by index and formation (row, col)"""
+        pattern = self.entrances.get(pattern_name, self.entrances['default'])
+        index = np.asarray(indices, dtype=np.int64).reshape(-1, 1)
+        row, col = np.asarray(formation_positions, dtype=np.int64).reshape(-1, 2).T[:, :, None]
+        return pattern.paths(dict(SIZE, i=index, row=row, col=col), len(index))
+
+    def challenging_paths(self, pattern_name, indices) -> np.ndarray:
+        """The challenging stage paths of the enemies of a group, empty paths for unknown patterns"""
+        index = np.asarray(indices, dtype=np.int64).reshape(-1, 1)
+        if pattern_name not in self.challenging:
+            return np.zeros((len(index), 0, 2), dtype=np.int64)
+        return self.challenging[pattern_name].paths(dict(SIZE, i=index), len(index))
+
+
+# Global instance
+stages = StageData()
@@ -2,6 +2,9 @@ import random
 from collections import namedtuple
 from dataclasses import dataclass
 
+import numpy as np
+import pygame
+
 from . import constants as c
 
 NUM_OF_RANDOM_STARS = 64
@@ -38,25 +41,62 @@ class Star:
     show: bool = True
 
 
-def random_star() -> Star:
-    x = random.randint(0, c.GAME_SIZE.width)
-    y = random.randint(0, c.GAME_SIZE.height)
-    layer = random.randint(0, len(LAYERS) - 1)
-    color = random.choice(LAYERS[layer].colors)
-    phase = random.randint(0, len(TWINKLING_PHASES) - 1)
+def random_star(rng: random.Random) -> Star:
+    x = rng.randint(0, c.GAME_SIZE.width)
+    y = rng.randint(0, c.GAME_SIZE.height)
+    layer = rng.randint(0, len(LAYERS) - 1)
+    color = rng.choice(LAYERS[layer].colors)
+    phase = rng.randint(0, len(TWINKLING_PHASES) - 1)
     return Star(x, y, color, layer, phase, speed=LAYERS[layer].speed)
 
 
 class StarField:
     """
-    Aesthetic stars for the background
+    Aesthetic stars for the background.
+    The stars are kept in NumPy arrays, one entry per star, and the twinkling timers in arrays with one
+    entry per phase, so updating them is one vectorized pass. The stars of each layer and twinkling
+    phase are written once through pygame.surfarray onto an image twice the height of the game, the
+    second half repeating the first, so the scrolling stars are drawn by blitting a window of it: a few
+    blits per frame however many stars there are
     """
 
-    def __init__(self):
+    def __init__(self, rng: random.Random):
         self._moving: int = 1
-        self.stars = [random_star() for _ in range(NUM_OF_RANDOM_STARS)]
-        self.twinkling_timers = [phase for phase in TWINKLING_PHASES]
+        stars = [random_star(rng) for _ in range(NUM_OF_RANDOM_STARS)]
         self.current_time = 0
+        self.last_delta_time = 0
+
+        # the stars
+        self.x = np.array([star.start_x for star in stars], dtype=np.int32)
+        self.y = np.array([int(star.start_y) % c.GAME_SIZE.height for star in stars], dtype=np.int32)
+        self.layer = np.array([star.layer_num for star in stars], dtype=np.int32)
+        self.phase = np.array([star.twinkle_phase for star in stars], dtype=np.int32)
+        self.colors = np.array([star.color for star in stars], dtype=np.uint8).reshape(-1, 3)
+        self.layer_speeds = np.array([layer.speed for layer in LAYERS])
+
+        # the twinkling timers: when each started showing or hiding its stars, and for how long
+        self.on_times = np.array([phase.on_time for phase in TWINKLING_PHASES])
+        self.off_times = np.array([phase.off_time for phase in TWINKLING_PHASES])
+        self.is_shown = np.array([phase.is_shown for phase in TWINKLING_PHASES])
+        self.twinkle_starts = np.array([-phase.current_time for phase in TWINKLING_PHASES])
+        self.twinkle_durations = np.where(self.is_shown, self.on_times, self.off_times)
+        self.next_twinkle_time = int((self.twinkle_starts + self.twinkle_durations).min())
+
+        # (layer number, twinkling phase) -> image of those stars
+        self.layer_images = {}
+        width, height = c.GAME_SIZE
+        on_screen = self.x < width
+        for layer_num, phase in sorted(set(zip(self.layer.tolist(), self.phase.tolist()))):
+            image = pygame.Surface((width, 2 * height)).convert()
+            selected = on_screen & (self.layer == layer_num) & (self.phase == phase)
+            x, y = self.x[selected], self.y[selected]
+            pixels = pygame.surfarray.pixels3d(image)
+            pixels[x, y] = self.colors[selected]
+            pixels[x, y + height] = self.colors[selected]
+            del pixels  # unlocks the image
+            # run-length encoding makes blitting the mostly empty images cheap
+            image.set_colorkey(c.BLACK, pygame.RLEACCEL)
+            self.layer_images[layer_num, phase] = image
 
     @property
     def moving(self) -> int:
@@ -73,19 +113,26 @@ class StarField:
 
     def update(self, delta_time: int):
         self.current_time += delta_time
-        # update each timer
-        for timer in self.twinkling_timers:
-            timer.current_time += delta_time
-            if timer.is_shown and timer.current_time >= timer.on_time:
-                timer.current_time = 0
-                timer.is_shown = False
-            elif not timer.is_shown and timer.current_time >= timer.off_time:
-                timer.current_time = 0
-                timer.is_shown = True
-
-    def display(self, screen):
-        for star in self.stars:
-            is_shown = self.twinkling_timers[star.twinkle_phase].is_shown
-            if is_shown:
-                y = round((star.start_y + (star.speed * self.current_time * self._moving)) % c.GAME_SIZE.height)
-                screen.set_at((star.start_x, y), star.color)
+        self.last_delta_time = delta_time
+        # the timers that ran out switch between shown and hidden and start over
+        if self.current_time >= self.next_twinkle_time:
+            switching = self.current_time - self.twinkle_starts >= self.twinkle_durations
+            self.twinkle_starts[switching] = self.current_time
+            self.is_shown ^= switching
+            self.twinkle_durations = np.where(self.is_shown, self.on_times, self.off_times)
+            self.next_twinkle_time = int((self.twinkle_starts + self.twinkle_durations).min())
+
+    def scroll_offsets(self, alpha=1.0):
+        """
+        How far each layer has scrolled, interpolated between the last two updates
+        """
+        time = self.current_time - self.last_delta_time * (1 - alpha)
+        return np.rint(self.layer_speeds * time * self._moving).astype(np.int32) % c.GAME_SIZE.height
+
+    def display(self, screen, alpha=1.0):
+        width, height = c.GAME_SIZE
+        offsets = self.scroll_offsets(alpha).tolist()
+        is_shown = self.is_shown.tolist()
+        for (layer_num, phase), image in self.layer_images.items():
+            if is_shown[phase]:
+                screen.blit(image, (0, 0), (0, height - offsets[layer_num], width, height))
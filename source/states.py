@@ -1,7 +1,9 @@
 # states.py
 
+import random
+
 import pygame
-from . import constants as c, tools, setup, hud, scoring, sprites
+from . import constants as c, tools, setup, hud, scoring, sprites, replay
 from .setup import play_sound, stop_sounds
 from .stars import StarField
 from .tools import calc_stage_badges, draw_text
@@ -24,11 +26,36 @@ COPY_Y = START_Y + 60
 MENU_SPEED = 3
 TITLE_FLASH_TIME = 150  # millis.
 TITLE_FLASH_NUM = 12
+DEMO_WAIT = 10000  # millis. the title waits after flashing before showing the demo
 
 # How many milliseconds to show the game over screen
 GAME_OVER_STATE_DURATION = 14500
 
 
+def new_persist(seed=None, difficulty=c.DEFAULT_DIFFICULTY) -> c.Persist:
+    """
+    Create the persistent data for a new session, with its random number generator seeded by seed
+    """
+    if seed is None:
+        seed = tools.new_seed()
+    rng = random.Random(seed)
+    # Load scores from database
+    db_scores = score_db.get_scores()
+    scores = [scoring.ScoreRecord(s['name'], s['score']) for s in db_scores]
+    high_score = score_db.get_high_score()
+    return c.Persist(stars=StarField(rng),
+                     scores=scores,
+                     current_score=0,
+                     one_up_score=0,
+                     high_score=high_score,
+                     num_shots=0,
+                     num_hits=0,
+                     stage_num=0,
+                     rng=rng,
+                     seed=seed,
+                     difficulty=difficulty)
+
+
 def draw_mid_text(screen, text, color, line=1):
     x, y = c.GAME_CENTER.x, c.GAME_CENTER.y + LINE_TEXT_HEIGHT * (line - 1)
     tools.draw_text(screen, text, (x, y), color, center_y=True, center_x=True)
@@ -44,8 +71,9 @@ class State:
         self.next_state_name = None  # Next state
         self.is_done = False  # Ready to switch to next state
         self.is_quit = False  # Wants to quit the program
-        self.current_time = 0  # Current time since the beginning of the pygame ticks
+        self.current_time = 0  # Current game time, in millis.
         self.start_time = 0  # When the state started
+        self.render_alpha = 1.0  # How far the display is between the previous and the current update (0 -> 1)
 
     def cleanup(self):
         return self.persist
@@ -65,18 +93,7 @@ class Title(State):
     def __init__(self, persist):
         # initialize the persistent data because it is the initial state
         if persist is None:
-            # Load scores from database
-            db_scores = score_db.get_scores()
-            scores = [scoring.ScoreRecord(s['name'], s['score']) for s in db_scores]
-            high_score = score_db.get_high_score()
-            persist = c.Persist(stars=StarField(),
-                                scores=scores,
-                                current_score=0,
-                                one_up_score=0,
-                                high_score=high_score,
-                                num_shots=0,
-                                num_hits=0,
-                                stage_num=0)
+            persist = new_persist()
         State.__init__(self, persist)
 
         # whether it is in a scrolling state
@@ -121,8 +138,11 @@ class Title(State):
                     self.timer = 0
                     self.flash_num += 1
                     self.is_title_white = not self.is_title_white
-            else:
-                pass  # TODO: make it flash later or invoke demo?
+            elif replay.has_demo():
+                self.timer += delta_time
+                if self.timer >= DEMO_WAIT:
+                    self.next_state_name = c.DEMO_STATE
+                    self.is_done = True
         elif self.offset_y > 0:
             self.offset_y -= MENU_SPEED
             if self.offset_y <= 0:
@@ -131,7 +151,7 @@ class Title(State):
     def display(self, screen):
         # draw background
         screen.fill(c.BLACK)
-        self.persist.stars.display(screen)
+        self.persist.stars.display(screen, self.render_alpha)
         # title normal
         if not self.is_flashing:
             surf = LIGHT_TITLE
@@ -153,7 +173,6 @@ class GameOver(State):
     def __init__(self, persist):
         super(GameOver, self).__init__(persist)
         play_sound("game_over")
-        self.start_time = pygame.time.get_ticks()
 
         self.persist.stars.moving = 1
 
@@ -177,7 +196,7 @@ class GameOver(State):
 
     def display(self, screen: pygame.Surface):
         screen.fill(c.BLACK)
-        self.persist.stars.display(screen)
+        self.persist.stars.display(screen, self.render_alpha)
 
         x, y = c.GAME_CENTER.x, 100
 
@@ -199,16 +218,52 @@ class GameOver(State):
 
 
 class Demo(State):
-    # TODO: implement
+    """
+    Attract mode, plays back the recorded demo game until it ends or a start key is pressed
+    """
 
-    def update(self, delta_time: int, keys):
-        pass
+    def __init__(self, persist):
+        super(Demo, self).__init__(persist)
+        self.next_state_name = c.TITLE_STATE
+        self.replay = replay.load_demo()
+        self.play = None
+        if self.replay is None:
+            self.is_done = True
+            return
+        # imported here since play imports this module
+        from .play import Play
+        self.play = Play(self.persist._replace(seed=self.replay.seed), is_demo=True)
+        self.play.current_time = self.replay.start_time
 
-    def display(self, surface: pygame.Surface):
-        pass
+    def cleanup(self):
+        stop_sounds()
+        if self.play is not None:
+            self.play.release_sprites()
+        return self.persist
 
     def get_event(self, event: pygame.event.Event):
-        pass
+        if event.type == pygame.KEYDOWN and event.key in setup.START_KEYS:
+            self.is_done = True
+
+    def update(self, delta_time: int, keys):
+        if self.is_done:
+            return
+        frame = self.replay.next_frame(self.play)
+        if frame is None or self.play.is_done:
+            self.is_done = True
+            return
+        mask, play_delta_time = frame
+        if mask & replay.INPUT_START:
+            self.play.get_event(replay.START_EVENT)
+        self.play.current_time += play_delta_time
+        self.play.update(play_delta_time, replay.InputKeys(mask))
+
+    def display(self, surface: pygame.Surface):
+        if self.play is None:
+            surface.fill(c.BLACK)
+            return
+        self.play.render_alpha = self.render_alpha
+        self.play.display(surface)
 
 
 class ScoreEntry(State):
@@ -2,6 +2,8 @@
 # Author: Izak Halseide
 
 import math
+from collections import OrderedDict
+import random
 import time
 import pygame
 from functools import wraps
@@ -9,6 +11,12 @@ from . import constants as c
 from . import setup
 from math import sin
 
+# Rendered text images, least recently used first, keyed on (text, color, background color)
+TEXT_CACHE_SIZE = 256
+_text_cache = OrderedDict()
+# Font glyphs by (color, background color), see _glyph_atlas
+_glyph_atlases = {}
+
 
 def linear_interpolation(start: float, stop: float, percent: float) -> float:
     """
@@ -34,31 +42,67 @@ def map_value(value, in_start, in_stop, out_start, out_stop):
     return out_start + (out_stop - out_start) * ((value - in_start) / (in_stop - in_start))
 
 
-def _font_render(text: str, color: pygame.Color, bg_color=None):
+def _glyph_atlas(color, bg_color) -> dict:
+    """
+    Get the font glyphs in a color, recolored the first time the color is used
+    :param color:
+    :param bg_color:
+    :return: dict of character -> glyph image
+    """
+    key = color, bg_color
+    atlas = _glyph_atlases.get(key)
+    if atlas is None:
+        # recolor all glyphs in one go on a strip, then cut it up
+        chars = list(setup.FONT_FRAMES)
+        size = setup.FONT_CHAR_SIZE
+        strip = pygame.Surface((len(chars) * size, size))
+        for i, char in enumerate(chars):
+            strip.blit(setup.get_glyph(char), (i * size, 0))
+        pixels = pygame.PixelArray(strip)
+        if bg_color:
+            pixels.replace(pygame.Color('black'), bg_color)
+        pixels.replace(pygame.Color('white'), color)
+        pixels.close()
+        if bg_color is None:
+            strip.set_colorkey(pygame.Color('black'))
+        atlas = {char: strip.subsurface((i * size, 0, size, size)).copy() for i, char in enumerate(chars)}
+        _glyph_atlases[key] = atlas
+    return atlas
+
+
+def _font_render(text: str, color, bg_color=None):
     """
-    Create a pygame image with the text rendered on it using the custom bitmap font
+    Create a pygame image with the text rendered on it using the custom bitmap font.
+    Recently rendered text is cached, so the image returned must not be changed
     :param text:
     :param color:
     :param bg_color:
     :return:
     """
+    color = tuple(color)
+    if bg_color is not None:
+        bg_color = tuple(bg_color)
+    key = text, color, bg_color
+    surf = _text_cache.get(key)
+    if surf is not None:
+        _text_cache.move_to_end(key)
+        return surf
+
+    glyphs = _glyph_atlas(color, bg_color)
     surf = pygame.Surface((len(text) * setup.FONT_CHAR_SIZE, setup.FONT_CHAR_SIZE))
     if bg_color is None:
         surf.set_colorkey(pygame.Color('black'))
     for i, char in enumerate(text):
-        # get font location for the char, default to unknown symbol
-        font_data = setup.get_from_font(char.lower())
-        if not font_data:
-            font_data = setup.get_from_font(None)
-        # grab the image at location
-        glyph = grab_sheet(font_data[0], font_data[1], setup.FONT_CHAR_SIZE, setup.FONT_CHAR_SIZE)
+        # get the glyph for the char, default to unknown symbol
+        glyph = glyphs.get(char.lower())
+        if glyph is None:
+            glyph = glyphs[None]
         surf.blit(glyph, (i * setup.FONT_CHAR_SIZE, 0), )
-    # replace colors
-    pixels = pygame.PixelArray(surf)
-    if bg_color:
-        pixels.replace(pygame.Color('black'), bg_color)
-    pixels.replace(pygame.Color('white'), color)
-    pixels.close()
+
+    _text_cache[key] = surf
+    if len(_text_cache) > TEXT_CACHE_SIZE:
+        # drop the least recently used text
+        _text_cache.popitem(last=False)
     return surf
 
 
@@ -78,7 +122,8 @@ def draw_text(surface, text, position, color, background_color=None, center_x=Fa
 
 def grab_sheet(x: int, y: int, width: int, height: int) -> pygame.Surface:
     """
-    Get a pixel rectangle from an the spritesheet resource
+    Get a pixel rectangle from an the spritesheet resource, as a new subsurface each call.
+    Images drawn every frame should come from the frame atlas instead (setup.add_frame)
     """
     return setup.get_image('sheet').subsurface((x, y, width, height))
 
@@ -201,6 +246,13 @@ def calc_formation_pos(formation_x, formation_y, formation_spread, formation_x_o
     return x, y
 
 
+def new_seed() -> int:
+    """
+    Pick a fresh seed for a game session's random number generator
+    """
+    return random.SystemRandom().getrandbits(32)
+
+
 def time_millis():
     return time.perf_counter_ns() // 1_000_000
 
@@ -0,0 +1,749 @@
+"""
+Many games stepped in lockstep, for training agents
+
+VectorEnv keeps the state of every game instance (player, enemies, missiles, formation
+and the play state's timers) in NumPy arrays and advances all of them with one
+step(actions) call. The rules follow Play.update step for step, leaving out what is
+only drawn or heard, so an instance plays out exactly like the play state does with
+the same seed and input. Paths come from the same pattern code as the sprites; only
+the dive paths are generated per attack, the entrance paths and their tracks are
+tabulated per stage layout once. Enemies follow tracks like in an EnemyTable.
+
+Actions are input bitmasks as in source.replay (INPUT_LEFT, INPUT_RIGHT, INPUT_FIRE).
+Rewards are the points of the enemies hit during the step, as Enemy.get_points gives them.
+
+Needs NumPy. Importing this module sets up pygame like the game does, with a window and
+audio unless GALAGA_HEADLESS=1 is set before (see check_vector_env.py).
+"""
+import math
+import random
+
+import numpy as np
+import pygame
+
+from . import constants as c, replay, sprites
+from .challenging_stage import ChallengingStage
+from .enemy_table import ENTRANCE_PATH, ATTACK_PATH, compile_track, track_positions
+from .formation import Formation, calc_attack_frequency, calc_fire_cooldown
+from .path_cache import path_cache
+from .patterns import DIVE_TEMPLATES
+from .play import (STAGE_BOUNDS, START_DURATION, STAGE_DURATION, READY_DURATION, GAME_OVER_DURATION,
+                   FIRE_COOLDOWN, PLAYER_MISSILE_SPEED, ENEMY_MISSILE_SPEED)
+from .stage_data import stages
+
+# Enemy types, indices into the tables below
+ZAKO, GOEI, BOSS = range(3)
+ENEMY_CLASSES = (sprites.Zako, sprites.Goei, sprites.BossGalaga)
+TYPE_NAMES = tuple(cls(0, 0).enemy_type for cls in ENEMY_CLASSES)
+
+
+def _points_table():
+    """POINTS[type, is attacking, escort count], filled in by the enemies' get_points()"""
+    points = np.zeros((len(ENEMY_CLASSES), 2, 3), dtype=np.int64)
+    for enemy_type, cls in enumerate(ENEMY_CLASSES):
+        enemy = cls(0, 0)
+        for is_attacking in (False, True):
+            for escort_count in range(3):
+                enemy.is_attacking = is_attacking
+                enemy.escort_count = escort_count
+                points[enemy_type, int(is_attacking), escort_count] = enemy.get_points()
+    return points
+
+
+POINTS = _points_table()
+HITS = np.array([getattr(cls(0, 0), 'hits_remaining', 1) for cls in ENEMY_CLASSES])
+CAN_FIRE = np.array([cls(0, 0).can_fire for cls in ENEMY_CLASSES])
+ENEMY_SIZE = sprites.Zako(0, 0).rect.size
+PATH_SPEED = sprites.Zako(0, 0).path_speed
+PLAYER_SIZE = sprites.Player(0, 0).rect.size
+MISSILE_SIZE = sprites.Missile(0, 0, pygame.math.Vector2(), False).rect.size
+
+PLAYER_START_X = c.GAME_SIZE.width // 2
+PLAYER_Y = c.STAGE_BOTTOM_Y - 16
+DEFAULT_TARGET = (c.GAME_SIZE.width // 2, c.STAGE_BOTTOM_Y - 16)  # what enemies dive at without a player
+
+PLAYER_MISSILES = 8  # more than can be on screen at the fire rate
+ENEMY_MISSILES = 32  # grows when needed
+NOT_SPAWNED = np.iinfo(np.int64).max
+
+
+class StageLayouts:
+    """
+    The stage formations as tables: per layout and enemy slot (in spawn order) the type,
+    grid position, spawn delay, entrance path and its track (from the path's first point).
+    Every layout of stage_layouts is built at once, so the tables have room for the largest
+    """
+
+    def __init__(self):
+        self.names = list(dict.fromkeys(stages.stage_layouts))
+        self.layout_of_stage = [self.names.index(name) for name in stages.stage_layouts]
+        self._build([stages.layout_groups(name) for name in self.names])
+
+    def for_stage(self, stage_num: int) -> int:
+        """The layout of a stage, like Formation.get_stage_groups"""
+        return self.layout_of_stage[stage_num % len(self.layout_of_stage)]
+
+    def _build(self, all_groups):
+        layouts = []
+        for groups in all_groups:
+            slots = []
+            for group in groups:
+                for idx, enemy_data in enumerate(group['enemies']):
+                    path = path_cache.entrance_path(group['pattern'], idx, (enemy_data['row'], enemy_data['col']))
+                    slots.append((TYPE_NAMES.index(enemy_data['type']), enemy_data['row'], enemy_data['col'],
+                                  group['delay'] + idx * 50, path))
+            # Formation.update spawns from the front of the list, slots must come due in order
+            assert all(a[3] <= b[3] for a, b in zip(slots, slots[1:])), "spawn delays out of order"
+            layouts.append(slots)
+
+        num_slots = max([len(slots) for slots in layouts], default=1)
+        path_length = max([len(slot[4]) for slots in layouts for slot in slots], default=1)
+        shape = (max(len(layouts), 1), num_slots)
+        self.count = np.zeros(shape[0], dtype=np.int64)
+        self.type = np.zeros(shape, dtype=np.int64)
+        self.row = np.zeros(shape, dtype=np.int64)
+        self.col = np.zeros(shape, dtype=np.int64)
+        self.delay = np.full(shape, NOT_SPAWNED, dtype=np.int64)
+        self.path = np.zeros(shape + (path_length, 2), dtype=np.int64)
+        self.path_length = np.zeros(shape, dtype=np.int64)
+        for layout, slots in enumerate(layouts):
+            self.count[layout] = len(slots)
+            for slot, (enemy_type, row, col, delay, path) in enumerate(slots):
+                self.type[layout, slot] = enemy_type
+                self.row[layout, slot] = row
+                self.col[layout, slot] = col
+                self.delay[layout, slot] = delay
+                self.path_length[layout, slot] = len(path)
+                if len(path):
+                    self.path[layout, slot, :len(path)] = path
+
+        tracks = [[compile_track(path[0], path) if len(path) else (np.zeros((2, 2)), 1.0, 0.0)
+                   for enemy_type, row, col, delay, path in slots] for slots in layouts]
+        track_width = max([len(track[0]) for layout in tracks for track in layout], default=2)
+        self.track = np.zeros(shape + (track_width, 2))
+        self.track_spaces = np.ones(shape, dtype=np.int64)
+        self.track_spacing = np.ones(shape)
+        self.track_length = np.zeros(shape)
+        for layout, layout_tracks in enumerate(tracks):
+            for slot, (samples, spacing, length) in enumerate(layout_tracks):
+                self.track[layout, slot, :len(samples)] = samples
+                self.track_spaces[layout, slot] = len(samples) - 1
+                self.track_spacing[layout, slot] = spacing
+                self.track_length[layout, slot] = length
+
+    @property
+    def num_slots(self):
+        return self.type.shape[1]
+
+
+class VectorEnv:
+    """
+    n games of Galaga advanced together, one simulation step (c.SIM_STEP) per step() call
+    """
+
+    def __init__(self, difficulty=c.DEFAULT_DIFFICULTY):
+        self.difficulty = difficulty
+        self.layouts = StageLayouts()
+        self.n = 0
+
+    def reset(self, seeds, indices=None):
+        """
+        Start new games from the given seeds, for all instances, or only the given ones
+        (then there is one seed per index)
+        """
+        seeds = list(seeds)
+        if indices is None:
+            self._allocate(len(seeds))
+            indices = np.arange(len(seeds))
+        indices = np.asarray(indices, dtype=np.int64)
+        for i, seed in zip(indices, seeds):
+            # A game re-seeds the session's generator with its seed
+            self.rngs[i] = random.Random(seed)
+            self.seeds[i] = seed
+
+        # Play.__init__
+        self.time[indices] = 0
+        self.done[indices] = False
+        self.score[indices] = 0
+        self.num_shots[indices] = 0
+        self.num_hits[indices] = 0
+        self.stage_num[indices] = 0
+        self.extra_lives[indices] = 3
+        self.is_player_alive[indices] = False
+        self.player_x[indices] = PLAYER_START_X
+        self.can_control_player[indices] = False
+        self.last_fire_time[indices] = 0
+        self.blocking_timer[indices] = 0
+        self.is_starting[indices] = True
+        self.should_show_stage[indices] = False
+        self.should_show_ready[indices] = False
+        self.should_show_game_over[indices] = False
+        self.should_advance_stage[indices] = False
+        self.is_ready[indices] = False
+
+        # Formation.__init__
+        self.layout[indices] = 0
+        self.spawn_next[indices] = 0
+        self.spawn_count[indices] = 0
+        self.entrance_delay_timer[indices] = 0
+        self.attack_timer[indices] = 0
+        self.attack_frequency[indices] = self.difficulty.base_attack_frequency
+        self.cycle_time[indices] = 0
+        self.grid[indices] = -1
+        self.enemy_alive[indices] = False
+
+        self.missile_alive[indices] = False
+        self.enemy_missile_alive[indices] = False
+        self.missile_count[indices] = 0
+        return self.observe()
+
+    def _allocate(self, n):
+        self.n = n
+        num_slots = self.layouts.num_slots
+        self.rngs = [None] * n
+        self.seeds = np.zeros(n, dtype=np.int64)
+
+        # Play state
+        self.time = np.zeros(n, dtype=np.int64)
+        self.done = np.zeros(n, dtype=bool)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.num_shots = np.zeros(n, dtype=np.int64)
+        self.num_hits = np.zeros(n, dtype=np.int64)
+        self.stage_num = np.zeros(n, dtype=np.int64)
+        self.extra_lives = np.zeros(n, dtype=np.int64)
+        self.is_player_alive = np.zeros(n, dtype=bool)
+        self.player_x = np.zeros(n, dtype=np.int64)
+        self.can_control_player = np.zeros(n, dtype=bool)
+        self.last_fire_time = np.zeros(n, dtype=np.int64)
+        self.blocking_timer = np.zeros(n, dtype=np.int64)
+        self.is_starting = np.zeros(n, dtype=bool)
+        self.should_show_stage = np.zeros(n, dtype=bool)
+        self.should_show_ready = np.zeros(n, dtype=bool)
+        self.should_show_game_over = np.zeros(n, dtype=bool)
+        self.should_advance_stage = np.zeros(n, dtype=bool)
+        self.is_ready = np.zeros(n, dtype=bool)
+
+        # Formation, the spawn list is the layout's slots from spawn_next up to spawn_count
+        self.layout = np.zeros(n, dtype=np.int64)
+        self.spawn_next = np.zeros(n, dtype=np.int64)
+        self.spawn_count = np.zeros(n, dtype=np.int64)
+        self.entrance_delay_timer = np.zeros(n, dtype=np.int64)
+        self.attack_timer = np.zeros(n, dtype=np.int64)
+        self.attack_frequency = np.zeros(n, dtype=np.int64)
+        self.cycle_time = np.zeros(n, dtype=np.int64)
+        self.grid = np.full((n, Formation.ROWS, Formation.COLS), -1, dtype=np.int64)  # enemy slot or -1
+
+        # Enemies, by slot in spawn order (the order of the enemies group)
+        shape = (n, num_slots)
+        self.enemy_alive = np.zeros(shape, dtype=bool)
+        self.enemy_type = np.zeros(shape, dtype=np.int64)
+        self.enemy_row = np.zeros(shape, dtype=np.int64)
+        self.enemy_col = np.zeros(shape, dtype=np.int64)
+        self.enemy_x = np.zeros(shape, dtype=np.int64)
+        self.enemy_y = np.zeros(shape, dtype=np.int64)
+        self.is_entering = np.zeros(shape, dtype=bool)
+        self.is_attacking = np.zeros(shape, dtype=bool)
+        self.following = np.zeros(shape, dtype=bool)
+        self.current_path = np.zeros(shape, dtype=np.int8)  # ENTRANCE_PATH or ATTACK_PATH
+        self.path_time = np.zeros(shape)
+        self.hits_remaining = np.zeros(shape, dtype=np.int64)
+        self.escort_count = np.zeros(shape, dtype=np.int64)
+        self.enemy_last_fire_time = np.zeros(shape, dtype=np.int64)
+        self.fire_cooldown = np.zeros(shape, dtype=np.int64)
+        # Enemies only attack with the dive of their type, kept as where it starts and its target
+        self.dive_start = np.zeros(shape + (2,), dtype=np.int64)
+        self.dive_target = np.zeros(shape, dtype=np.int64)
+        # The track being followed, as wide as any so far
+        self.track = np.zeros(shape + self.layouts.track.shape[2:])
+        self.track_spaces = np.ones(shape, dtype=np.int64)
+        self.track_spacing = np.ones(shape)
+        self.track_length = np.zeros(shape)
+
+        # Missiles, in any slot, ordered by a per-instance sequence number like a sprite group
+        self.missile_count = np.zeros(n, dtype=np.int64)
+        self.missile_x = np.zeros((n, PLAYER_MISSILES), dtype=np.int64)
+        self.missile_y = np.zeros((n, PLAYER_MISSILES), dtype=np.int64)
+        self.missile_seq = np.zeros((n, PLAYER_MISSILES), dtype=np.int64)
+        self.missile_alive = np.zeros((n, PLAYER_MISSILES), dtype=bool)
+        self.enemy_missile_x = np.zeros((n, ENEMY_MISSILES), dtype=np.int64)
+        self.enemy_missile_y = np.zeros((n, ENEMY_MISSILES), dtype=np.int64)
+        self.enemy_missile_vx = np.zeros((n, ENEMY_MISSILES), dtype=np.float64)
+        self.enemy_missile_vy = np.zeros((n, ENEMY_MISSILES), dtype=np.float64)
+        self.enemy_missile_seq = np.zeros((n, ENEMY_MISSILES), dtype=np.int64)
+        self.enemy_missile_alive = np.zeros((n, ENEMY_MISSILES), dtype=bool)
+
+    def observe(self) -> dict:
+        """The state of all instances as arrays, enemy and missile arrays have one row per instance"""
+        return {
+            'time': self.time.copy(),
+            'stage_num': self.stage_num.copy(),
+            'score': self.score.copy(),
+            'extra_lives': self.extra_lives.copy(),
+            'is_ready': self.is_ready.copy(),
+            'is_player_alive': self.is_player_alive.copy(),
+            'player_x': self.player_x.copy(),
+            'enemy_alive': self.enemy_alive.copy(),
+            'enemy_type': self.enemy_type.copy(),
+            'enemy_x': self.enemy_x.copy(),
+            'enemy_y': self.enemy_y.copy(),
+            'enemy_attacking': self.is_attacking & self.enemy_alive,
+            'missile_alive': self.missile_alive.copy(),
+            'missile_x': self.missile_x.copy(),
+            'missile_y': self.missile_y.copy(),
+            'enemy_missile_alive': self.enemy_missile_alive.copy(),
+            'enemy_missile_x': self.enemy_missile_x.copy(),
+            'enemy_missile_y': self.enemy_missile_y.copy(),
+            'done': self.done.copy(),
+        }
+
+    def step(self, actions):
+        """
+        Advance every game that isn't over by one step with the given input bitmasks
+        Returns the rewards and which games are over
+        """
+        actions = np.asarray(actions, dtype=np.int64)
+        active = ~self.done
+        delta_time = c.SIM_STEP
+        self.time[active] += delta_time
+
+        # Play.update
+        self._update_timers(active, delta_time)
+        self._update_player(active, actions, delta_time)
+        self._update_enemies(active, delta_time)
+        self._shoot(active, actions)
+        rewards = self._update_missiles(active, delta_time)
+        return rewards, self.done.copy()
+
+    # Play state flow
+
+    def _update_timers(self, active, delta_time):
+        # Only the first waiting message counts, like the elif chain in Play.update_timers
+        starting = active & self.is_starting
+        showing_stage = active & ~self.is_starting & self.should_show_stage
+        rest = active & ~self.is_starting & ~self.should_show_stage
+        showing_ready = rest & self.should_show_ready
+        rest &= ~self.should_show_ready
+        showing_game_over = rest & self.should_show_game_over
+        advancing = rest & ~self.should_show_game_over & self.should_advance_stage
+
+        self.blocking_timer[starting | showing_stage | showing_ready | showing_game_over | advancing] += delta_time
+
+        done_starting = starting & (self.blocking_timer >= START_DURATION)
+        if done_starting.any():
+            self.is_starting[done_starting] = False
+            self.blocking_timer[done_starting] = 0
+            self._spawn_player(done_starting)
+            self.stage_num[done_starting] = 0
+            self._next_stage(done_starting)
+            self.should_show_stage[done_starting] = True
+
+        done_showing_stage = showing_stage & (self.blocking_timer >= STAGE_DURATION)
+        self.should_show_stage[done_showing_stage] = False
+        self.blocking_timer[done_showing_stage] = 0
+        self.should_show_ready[done_showing_stage] = True
+
+        done_with_ready = showing_ready & (self.blocking_timer >= READY_DURATION)
+        self.should_show_ready[done_with_ready] = False
+        self.can_control_player[done_with_ready] = True
+        self.blocking_timer[done_with_ready] = 0
+        self.is_ready[done_with_ready] = True
+
+        done_showing_game_over = showing_game_over & (self.blocking_timer >= GAME_OVER_DURATION)
+        self.should_show_game_over[done_showing_game_over] = False
+        self.done[done_showing_game_over] = True
+
+        done_advancing = advancing & (self.blocking_timer >= STAGE_DURATION)
+        if done_advancing.any():
+            self.should_advance_stage[done_advancing] = False
+            self.blocking_timer[done_advancing] = 0
+            self._next_stage(done_advancing)
+            self.should_show_stage[done_advancing] = True
+
+    def _spawn_player(self, mask):
+        game_over = mask & (self.extra_lives == 0)
+        self.should_show_game_over[game_over] = True
+        spawn = mask & ~game_over
+        self.extra_lives[spawn] -= 1
+        self.is_player_alive[spawn] = True
+        self.player_x[spawn] = PLAYER_START_X
+
+    def _kill_player(self, mask):
+        self.is_player_alive[mask] = False
+        # reform_enemies() and done_reforming_enemies()
+        self.is_ready[mask] = False
+        self.should_show_ready[mask] = True
+        self._spawn_player(mask)
+
+    def _next_stage(self, mask):
+        self.stage_num[mask] += 1
+        stage_num = self.stage_num
+        is_challenging = np.zeros(self.n, dtype=bool)
+        is_challenging[mask] = [ChallengingStage.is_challenging_stage(int(stage)) for stage in stage_num[mask]]
+        challenging = mask & is_challenging
+        self._clear_formation(challenging)
+        for stage in np.unique(stage_num[mask & ~is_challenging]):
+            self._create_stage_formation(mask & ~is_challenging & (stage_num == stage), int(stage))
+
+    def _clear_formation(self, mask):
+        self.grid[mask] = -1
+        self.enemy_alive[mask] = False
+
+    def _create_stage_formation(self, mask, stage_num):
+        self._clear_formation(mask)
+        layout = self.layouts.for_stage(stage_num)
+        self.layout[mask] = layout
+        self.spawn_next[mask] = 0
+        self.spawn_count[mask] = self.layouts.count[layout]
+        self.entrance_delay_timer[mask] = 0
+
+        # New enemies
+        enemy_type = self.layouts.type[layout]
+        self.enemy_type[mask] = enemy_type
+        self.enemy_row[mask] = self.layouts.row[layout]
+        self.enemy_col[mask] = self.layouts.col[layout]
+        self.is_entering[mask] = False
+        self.is_attacking[mask] = False
+        self.following[mask] = False
+        self.hits_remaining[mask] = HITS[enemy_type]
+        self.escort_count[mask] = 0
+        self.enemy_last_fire_time[mask] = 0
+
+        # Formation.set_difficulty
+        self.attack_frequency[mask] = calc_attack_frequency(self.difficulty, stage_num)
+        cooldowns = np.array([calc_fire_cooldown(self.difficulty, stage_num, name) for name in TYPE_NAMES])
+        self.fire_cooldown[mask] = cooldowns[enemy_type]
+
+    # Formation and enemies
+
+    def _update_enemies(self, active, delta_time):
+        has_player = active & self.is_player_alive
+        self._update_formation(active, has_player, delta_time)
+        self._follow_paths(active, delta_time)
+
+        # Attacking enemies fire at the player
+        can_fire = has_player & self.is_ready
+        if can_fire.any():
+            px = self.player_x[:, None]
+            py = PLAYER_Y
+            fires = (can_fire[:, None] & self.enemy_alive & CAN_FIRE[self.enemy_type] & self.is_attacking
+                     & (self.time[:, None] - self.enemy_last_fire_time >= self.fire_cooldown)
+                     & (self.enemy_y < py - 50))
+            if fires.any():
+                dx = px - self.enemy_x
+                dy = py - self.enemy_y
+                distance = np.power((dx * dx + dy * dy).astype(np.float64), 0.5)
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    vx = dx / distance * ENEMY_MISSILE_SPEED
+                    vy = dy / distance * ENEMY_MISSILE_SPEED
+                self._add_enemy_missiles(fires & (distance > 0), vx, vy)
+                self.enemy_last_fire_time[fires] = np.broadcast_to(self.time[:, None], fires.shape)[fires]
+
+        # All enemies destroyed, advance to the next stage
+        advance = (active & self.is_ready & ~self.enemy_alive.any(axis=1) & ~self.should_show_game_over
+                   & ~self.should_advance_stage)
+        if advance.any():
+            self.is_ready[advance] = False
+            self.blocking_timer[advance] = 0
+            self.missile_alive[advance] = False
+            self.enemy_missile_alive[advance] = False
+            self.should_advance_stage[advance] = True
+
+    def _update_formation(self, active, has_player, delta_time):
+        # Spawn the enemies whose delay has passed
+        spawning = active & (self.spawn_next < self.spawn_count)
+        if spawning.any():
+            self.entrance_delay_timer[spawning] += delta_time
+            due = (self.layouts.delay[self.layout] <= self.entrance_delay_timer[:, None]).sum(axis=1)
+            spawn_next = np.where(spawning, np.maximum(self.spawn_next, np.minimum(due, self.spawn_count)),
+                                  self.spawn_next)
+            slots = np.arange(self.layouts.num_slots)
+            new = (slots >= self.spawn_next[:, None]) & (slots < spawn_next[:, None])
+            self.spawn_next = spawn_next
+            ii, ss = np.nonzero(new)
+            layout = self.layout[ii]
+            has_path = self.layouts.path_length[layout, ss] > 0
+            self.enemy_x[ii[has_path], ss[has_path]] = self.layouts.path[layout, ss, 0, 0][has_path]
+            self.enemy_y[ii[has_path], ss[has_path]] = self.layouts.path[layout, ss, 0, 1][has_path]
+            self.is_entering[ii, ss] = True
+            self._copy_entrance_tracks(ii, ss)
+            self.enemy_alive[ii, ss] = True
+            self.grid[ii, self.enemy_row[ii, ss], self.enemy_col[ii, ss]] = ss
+
+        # Attack waves once everybody is in
+        attacking = active & (self.spawn_next >= self.spawn_count)
+        self.attack_timer[attacking] += delta_time
+        trigger = attacking & (self.attack_timer >= self.attack_frequency)
+        for i in np.nonzero(trigger)[0]:
+            player_pos = (int(self.player_x[i]), PLAYER_Y) if has_player[i] else DEFAULT_TARGET
+            self._trigger_attack_wave(i, player_pos)
+        self.attack_timer[trigger] = 0
+
+        # Breathing and swaying, the same float math as Formation.update
+        self.cycle_time[active] += delta_time
+        spread = np.zeros(self.n)
+        x_offset = np.zeros(self.n, dtype=np.int64)
+        for cycle_time in np.unique(self.cycle_time[active]):
+            cycle_progress = (int(cycle_time) % c.FORMATION_CYCLE_TIME) / c.FORMATION_CYCLE_TIME
+            if cycle_progress < 0.5:
+                value = c.FORMATION_MIN_SPREAD + (c.FORMATION_MAX_SPREAD - c.FORMATION_MIN_SPREAD) * (
+                    cycle_progress * 2)
+            else:
+                value = c.FORMATION_MAX_SPREAD - (c.FORMATION_MAX_SPREAD - c.FORMATION_MIN_SPREAD) * (
+                    (cycle_progress - 0.5) * 2)
+            same = active & (self.cycle_time == cycle_time)
+            spread[same] = value
+            x_offset[same] = int(c.FORMATION_MAX_X * math.sin(cycle_progress * 2 * 3.14159))
+
+        # Formation.get_position for every column and row
+        cols = np.arange(Formation.COLS)
+        center_col = Formation.COLS / 2.0
+        spread_factor = np.abs(cols - center_col) / center_col
+        side = np.where(cols >= center_col, 1, -1)
+        col_x = (Formation.BASE_X + (cols - Formation.COLS // 2) * Formation.COL_SPACING)[None, :] + x_offset[:, None]
+        col_x = (col_x + spread[:, None] * spread_factor[None, :] * side[None, :]).astype(np.int64)
+        row_y = Formation.BASE_Y + np.arange(Formation.ROWS) * Formation.ROW_SPACING
+
+        # Enemies resting in the formation follow it
+        ii, rr, cc = np.nonzero((self.grid >= 0) & active[:, None, None])
+        ss = self.grid[ii, rr, cc]
+        resting = ~self.is_attacking[ii, ss] & ~self.is_entering[ii, ss]
+        ii, rr, cc, ss = ii[resting], rr[resting], cc[resting], ss[resting]
+        self.enemy_x[ii, ss] = col_x[ii, cc]
+        self.enemy_y[ii, ss] = row_y[rr]
+
+    def _trigger_attack_wave(self, i, player_pos):
+        """Formation.trigger_attack_wave for instance i, with its random number generator"""
+        grid = self.grid[i]
+        available = [int(slot) for slot in grid.ravel()
+                     if slot >= 0 and not self.is_attacking[i, slot] and not self.is_entering[i, slot]]
+        if not available:
+            return
+        rng = self.rngs[i]
+        bosses = [slot for slot in available if self.enemy_type[i, slot] == BOSS]
+        if bosses and rng.randrange(3) == 0:
+            boss = bosses[0]
+            boss_row, boss_col = self.enemy_row[i, boss], self.enemy_col[i, boss]
+            escorts = []
+            for row in range(1, 3):
+                for col_offset in [-1, 0, 1]:
+                    col = boss_col + col_offset
+                    if 0 <= col < Formation.COLS:
+                        slot = grid[row, col]
+                        if slot >= 0 and self.enemy_type[i, slot] == GOEI and not self.is_attacking[i, slot]:
+                            escorts.append(int(slot))
+            escorts = escorts[:2]
+            self._start_attack(i, boss, player_pos)
+            self.escort_count[i, boss] = len(escorts)
+            for escort in escorts:
+                self._start_attack(i, escort, player_pos)
+        else:
+            num_attackers = min(rng.randint(1, 3), len(available))
+            for slot in rng.sample(available, num_attackers):
+                self._start_attack(i, slot, player_pos)
+
+    def _start_attack(self, i, slot, player_pos):
+        """Enemy.start_dive"""
+        self.dive_start[i, slot] = self.enemy_x[i, slot], self.enemy_y[i, slot]
+        self.dive_target[i, slot] = player_pos[0]
+        # EnemyTable.set_dive: an escort that is still entering starts its entrance over
+        if self.is_entering[i, slot] and self.layouts.path_length[self.layout[i], slot]:
+            self._follow(i, slot, ENTRANCE_PATH)
+        else:
+            self._follow(i, slot, ATTACK_PATH)
+        self.is_attacking[i, slot] = True
+
+    def _widen_tracks(self, width):
+        track = np.zeros(self.track.shape[:2] + (width, 2))
+        track[:, :, :self.track.shape[2]] = self.track
+        self.track = track
+
+    def _copy_entrance_tracks(self, ii, ss):
+        """Start the spawned enemies on their entrance tracks, compiled with the layout"""
+        layout = self.layout[ii]
+        self.track[ii, ss, :self.layouts.track.shape[2]] = self.layouts.track[layout, ss]
+        self.track_spaces[ii, ss] = self.layouts.track_spaces[layout, ss]
+        self.track_spacing[ii, ss] = self.layouts.track_spacing[layout, ss]
+        self.track_length[ii, ss] = self.layouts.track_length[layout, ss]
+        self.current_path[ii, ss] = ENTRANCE_PATH
+        self.path_time[ii, ss] = 0.0
+        self.following[ii, ss] = self.layouts.path_length[layout, ss] > 0
+
+    def _follow(self, i, slot, which):
+        """EnemyTable._follow and the making of its track, right away"""
+        if which == ENTRANCE_PATH:
+            layout = self.layout[i]
+            path = self.layouts.path[layout, slot, :self.layouts.path_length[layout, slot]]
+        else:
+            path = DIVE_TEMPLATES[TYPE_NAMES[self.enemy_type[i, slot]]].apply(self.dive_start[i, slot][None],
+                                                                             self.dive_target[i, slot][None])[0]
+        self.current_path[i, slot] = which
+        self.path_time[i, slot] = 0.0
+        self.following[i, slot] = len(path) > 0
+        if not len(path):
+            return
+        samples, spacing, length = compile_track((self.enemy_x[i, slot], self.enemy_y[i, slot]), path)
+        if len(samples) > self.track.shape[2]:
+            self._widen_tracks(len(samples) + 32)  # the arrays are large, grow them a little at a time
+        self.track[i, slot, :len(samples)] = samples
+        self.track_spaces[i, slot] = len(samples) - 1
+        self.track_spacing[i, slot] = spacing
+        self.track_length[i, slot] = length
+
+    def _finish_path(self, i, slot):
+        """EnemyTable._finish_path"""
+        self.enemy_x[i, slot], self.enemy_y[i, slot] = np.rint(self.track[i, slot, self.track_spaces[i, slot]])
+        if self.current_path[i, slot] == ENTRANCE_PATH:
+            self.is_entering[i, slot] = False
+            if self.is_attacking[i, slot]:
+                time_left = self.path_time[i, slot] - self.track_length[i, slot] / PATH_SPEED
+                self._follow(i, slot, ATTACK_PATH)
+                self.path_time[i, slot] = time_left
+                return
+        else:
+            self.is_attacking[i, slot] = False
+        self.following[i, slot] = False
+
+    def _follow_paths(self, active, delta_time):
+        """EnemyTable.follow_paths: move along the entrance or attack track"""
+        ii, ss = np.nonzero(active[:, None] & self.enemy_alive & self.following)
+        if not len(ii):
+            return
+        self.path_time[ii, ss] += delta_time
+        ended = self.path_time[ii, ss] * PATH_SPEED >= self.track_length[ii, ss]
+        if ended.any():
+            for i, slot in zip(ii[ended].tolist(), ss[ended].tolist()):
+                self._finish_path(i, slot)
+            following = self.following[ii, ss]
+            ii, ss = ii[following], ss[following]
+        distance = np.minimum(self.path_time[ii, ss] * PATH_SPEED, self.track_length[ii, ss])
+        width = self.track.shape[2]
+        position = track_positions(self.track.reshape(-1, 2), (ii * self.track.shape[1] + ss) * width,
+                                   self.track_spaces[ii, ss], self.track_spacing[ii, ss], distance)
+        self.enemy_x[ii, ss] = position[:, 0]
+        self.enemy_y[ii, ss] = position[:, 1]
+
+    # Player and missiles
+
+    def _update_player(self, active, actions, delta_time):
+        alive = active & self.is_player_alive
+        moves = alive & self.can_control_player
+        speed = round(c.PLAYER_SPEED * delta_time)
+        right = (actions & replay.INPUT_RIGHT) != 0
+        left = (actions & replay.INPUT_LEFT) != 0
+        self.player_x[moves & right] += speed
+        self.player_x[moves & ~right & left] -= speed
+
+        # Stay on the stage
+        width = PLAYER_SIZE[0]
+        left_edge = self.player_x - width // 2
+        self.player_x[alive & (left_edge < STAGE_BOUNDS.left)] = STAGE_BOUNDS.left + width // 2
+        self.player_x[alive & (left_edge + width > STAGE_BOUNDS.right)] = STAGE_BOUNDS.right - width + width // 2
+
+    def _shoot(self, active, actions):
+        shoots = (active & ((actions & replay.INPUT_FIRE) != 0) & self.is_player_alive & self.can_control_player
+                  & (self.time >= self.last_fire_time + FIRE_COOLDOWN))
+        if not shoots.any():
+            return
+        ii = np.nonzero(shoots)[0]
+        free = np.argmin(self.missile_alive[ii], axis=1)
+        assert not self.missile_alive[ii, free].any(), "out of player missile slots"
+        self.missile_x[ii, free] = self.player_x[ii]
+        self.missile_y[ii, free] = PLAYER_Y - PLAYER_SIZE[1] // 2 + 10
+        self.missile_seq[ii, free] = self.missile_count[ii]
+        self.missile_alive[ii, free] = True
+        self.missile_count[ii] += 1
+        self.num_shots[ii] += 1
+        self.last_fire_time[ii] = self.time[ii]
+
+    def _add_enemy_missiles(self, new, vx, vy):
+        """Add missiles where new is set, in slot order, with the velocities at those places"""
+        count = new.sum(axis=1)
+        free = (~self.enemy_missile_alive).sum(axis=1)
+        if (count > free).any():
+            self._grow_enemy_missiles(int((count - free).max()))
+        free_slots = np.argsort(self.enemy_missile_alive, axis=1, kind='stable')
+        rank = np.cumsum(new, axis=1) - 1
+        ii, ss = np.nonzero(new)
+        slot = free_slots[ii, rank[ii, ss]]
+        self.enemy_missile_x[ii, slot] = self.enemy_x[ii, ss]
+        self.enemy_missile_y[ii, slot] = self.enemy_y[ii, ss]
+        self.enemy_missile_vx[ii, slot] = vx[ii, ss]
+        self.enemy_missile_vy[ii, slot] = vy[ii, ss]
+        self.enemy_missile_seq[ii, slot] = self.missile_count[ii] + rank[ii, ss]
+        self.enemy_missile_alive[ii, slot] = True
+        self.missile_count += count
+
+    def _grow_enemy_missiles(self, extra):
+        extra = max(extra, self.enemy_missile_alive.shape[1])
+        for name in ('enemy_missile_x', 'enemy_missile_y', 'enemy_missile_vx', 'enemy_missile_vy',
+                     'enemy_missile_seq', 'enemy_missile_alive'):
+            array = getattr(self, name)
+            setattr(self, name, np.concatenate([array, np.zeros((self.n, extra), dtype=array.dtype)], axis=1))
+
+    def _update_missiles(self, active, delta_time):
+        rewards = np.zeros(self.n, dtype=np.int64)
+        missile_w, missile_h = MISSILE_SIZE
+        enemy_w, enemy_h = ENEMY_SIZE
+
+        # Player missiles in the order they were fired, each can hit the first enemy it touches
+        order = np.argsort(np.where(self.missile_alive, self.missile_seq, NOT_SPAWNED), axis=1)
+        move_y = round(-PLAYER_MISSILE_SPEED * delta_time)
+        rows = np.arange(self.n)
+        for k in range(order.shape[1]):
+            slot = order[:, k]
+            moving = active & self.missile_alive[rows, slot]
+            if not moving.any():
+                break
+            self.missile_y[moving, slot[moving]] += move_y
+            mx = self.missile_x[rows, slot] - missile_w // 2
+            my = self.missile_y[rows, slot] - missile_h // 2
+            ex = self.enemy_x - enemy_w // 2
+            ey = self.enemy_y - enemy_h // 2
+            touches = (moving[:, None] & self.enemy_alive
+                       & (mx[:, None] < ex + enemy_w) & (mx[:, None] + missile_w > ex)
+                       & (my[:, None] < ey + enemy_h) & (my[:, None] + missile_h > ey))
+            hits = touches.any(axis=1)
+            if hits.any():
+                ii = np.nonzero(hits)[0]
+                ss = np.argmax(touches[ii], axis=1)
+                enemy_type = self.enemy_type[ii, ss]
+                self.hits_remaining[ii, ss] -= 1
+                destroyed = self.hits_remaining[ii, ss] <= 0
+                di, ds = ii[destroyed], ss[destroyed]
+                self.grid[di, self.enemy_row[di, ds], self.enemy_col[di, ds]] = -1
+                self.enemy_alive[di, ds] = False
+                self.missile_alive[ii, slot[ii]] = False
+                self.num_hits[ii] += 1
+                points = POINTS[enemy_type, self.is_attacking[ii, ss].astype(np.int64),
+                                np.minimum(self.escort_count[ii, ss], 2)]
+                self.score[ii] += points
+                rewards[ii] += points
+
+            # Off the stage
+            outside = ((mx < STAGE_BOUNDS.left) | (my < STAGE_BOUNDS.top)
+                       | (mx + missile_w > STAGE_BOUNDS.right) | (my + missile_h > STAGE_BOUNDS.bottom))
+            self.missile_alive[moving & outside, slot[moving & outside]] = False
+
+        # Enemy missiles in order, until the first one that hits the player
+        alive = active[:, None] & self.enemy_missile_alive
+        if not alive.any():
+            return rewards
+        order_key = np.where(alive, self.enemy_missile_seq, NOT_SPAWNED)
+        x = self.enemy_missile_x + np.rint(self.enemy_missile_vx * delta_time).astype(np.int64)
+        y = self.enemy_missile_y + np.rint(self.enemy_missile_vy * delta_time).astype(np.int64)
+        mx = x - missile_w // 2
+        my = y - missile_h // 2
+        player_w, player_h = PLAYER_SIZE
+        px = (self.player_x - player_w // 2)[:, None]
+        py = PLAYER_Y - player_h // 2
+        touches = (alive & self.is_player_alive[:, None]
+                   & (mx < px + player_w) & (mx + missile_w > px) & (my < py + player_h) & (my + missile_h > py))
+        first_hit = np.where(touches, order_key, NOT_SPAWNED).min(axis=1)
+        moves = alive & (order_key < first_hit[:, None])
+        self.enemy_missile_x[moves] = x[moves]
+        self.enemy_missile_y[moves] = y[moves]
+        outside = ((mx < STAGE_BOUNDS.left) | (my < STAGE_BOUNDS.top)
+                   | (mx + missile_w > STAGE_BOUNDS.right) | (my + missile_h > STAGE_BOUNDS.bottom))
+        self.enemy_missile_alive[(moves & outside) | (alive & (order_key == first_hit[:, None]))] = False
+        self._kill_player(first_hit < NOT_SPAWNED)
+        return rewards